@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Alert Rules
+Threshold and crossover rules over daily bars of the tracked universe, e.g.
+
+    rsi crosses_above 70            close crosses_below sma20
+    pred_gap_pct above 2            change_pct below -3
+
+Each refresh syncs the universe into the local price store and builds its
+date x symbol panel. Every field (close, sma20, rsi, pred_close, ...) is then
+a vector over all symbols for the newest and the previous bar. Rules are
+grouped by (field, op, reference): one NumPy comparison per group yields a
+symbols x rules mask. Python never loops over symbols or individual rules,
+only over the few groups.
+
+A rule fires at most once per symbol and bar. Alerts are appended to an
+outbox table, readable as a queue at /api/alerts?after=<id>, and POSTed in
+batches to ALERT_WEBHOOK_URL when one is set (retried until accepted).
+
+The web app runs the watcher itself (AlertEngine.start): every ALERT_EVERY
+seconds one process, holding a lease in the alerts DB, refreshes the universe
+and delivers; any process re-evaluates right after the price store ingests
+new bars (e.g. a dashboard fetch). ALERT_WATCH=off leaves it to the CLI.
+
+    python alerts.py --add "rsi crosses_above 70" --add "close crosses_below sma20"
+    python alerts.py --watch --every 300       # standalone watcher
+    python alerts.py --list
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+import datetime as dt
+
+import numpy as np
+import requests
+
+import backtest
+import price_store
+
+# --- CONFIGURATION ---
+ALERTS_DB = os.environ.get(
+    "ALERTS_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "alerts.sqlite"),
+)
+ALERT_WEBHOOK_URL = os.environ.get("ALERT_WEBHOOK_URL", "")
+WEBHOOK_TIMEOUT = 5
+WEBHOOK_BATCH = 100
+LOOKBACK_DAYS = 400         # daily history per refresh (~1y of bars for pred_close)
+DEFAULT_EVERY = 300         # seconds between refreshes in --watch mode
+ALERT_EVERY = int(os.environ.get("ALERT_EVERY", DEFAULT_EVERY))
+ALERT_WATCH = os.environ.get("ALERT_WATCH", "on").lower() not in ("0", "off", "false", "no")
+INGEST_DELAY = 2            # seconds to let a batch of ingested symbols land first
+ALERT_RETENTION_DAYS = int(os.environ.get("ALERT_RETENTION_DAYS", 30))   # outbox history kept
+
+OPS = ("above", "below", "crosses_above", "crosses_below")
+FIELDS = ("open", "high", "low", "close", "volume", "sma20", "rsi", "pred_close",
+          "change_pct", "pred_gap_pct")
+
+
+def parse_rule(text):
+    """'rsi crosses_above 70' or 'close crosses_below sma20' -> (field, op, value, ref)"""
+    parts = text.split()
+    if len(parts) != 3:
+        raise ValueError("rule must look like '<field> <op> <number or field>'")
+    field, op, target = parts
+    try:
+        return field, op, float(target), None
+    except ValueError:
+        return field, op, None, target
+
+
+def universe_fields(t, bars):
+    """Field -> (newest, previous) vectors over the panel's symbols"""
+    close = bars["close"]
+    window = max(2, min(backtest.TREND_WINDOW, len(t)))
+    panel = {"dates": t.astype("datetime64[D]"), "close": close,
+             "high": bars["high"], "low": bars["low"]}
+    preds = backtest.predict_panel(panel, window=window)
+
+    matrices = dict(bars)
+    matrices["sma20"] = backtest._rolling_sum(close, 20) / 20
+    matrices["rsi"] = preds["rsi"]
+    matrices["pred_close"] = preds["predicted_close"]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change = np.full_like(close, np.nan)
+        change[1:] = (close[1:] / close[:-1] - 1) * 100
+        matrices["change_pct"] = change
+        matrices["pred_gap_pct"] = (preds["predicted_close"] / close - 1) * 100
+
+    if len(t) < 2:
+        nothing = np.full(close.shape[1], np.nan)
+        return {k: (nothing, nothing) for k in matrices}
+    return {k: (m[-1], m[-2]) for k, m in matrices.items()}
+
+
+def evaluate_rules(fields, rules, scope):
+    """symbols x rules bool matrix of the rules whose condition holds now.
+
+    rules: list of dicts with field/op/value/ref; scope: symbols x rules bool.
+    """
+    n = len(next(iter(fields.values()))[0])
+    hits = np.zeros((n, len(rules)), dtype=bool)
+    groups = {}
+    for j, rule in enumerate(rules):
+        groups.setdefault((rule["field"], rule["op"], rule["ref"]), []).append(j)
+
+    with np.errstate(invalid='ignore'):
+        for (field, op, ref), columns in groups.items():
+            now, prev = (v[:, None] for v in fields[field])
+            if ref is None:
+                level = np.array([rules[j]["value"] for j in columns])[None, :]
+                level_now = level_prev = level
+            else:
+                level_now, level_prev = (v[:, None] for v in fields[ref])
+            if op == "above":
+                mask = now > level_now
+            elif op == "below":
+                mask = now < level_now
+            elif op == "crosses_above":
+                mask = (prev <= level_prev) & (now > level_now)
+            else:
+                mask = (prev >= level_prev) & (now < level_now)
+            hits[:, columns] = np.broadcast_to(mask, (n, len(columns)))
+    return hits & scope
+
+
+class AlertEngine:
+    """Rules, the alert outbox and the evaluation loop, shared via SQLite"""
+
+    def __init__(self, path=ALERTS_DB, webhook=ALERT_WEBHOOK_URL):
+        self.path = path
+        self.webhook = webhook
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._watcher_pid = None
+        self._rules_changed = False
+        self._syncing = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rules ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, field TEXT, op TEXT, value REAL,"
+                " ref TEXT, symbols TEXT, note TEXT, created REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS alerts ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, rule_id INTEGER, symbol TEXT, t INTEGER,"
+                " fired REAL, payload TEXT, delivered INTEGER DEFAULT 0,"
+                " UNIQUE (rule_id, symbol, t))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS alerts_fired ON alerts (fired)")
+            conn.execute("CREATE TABLE IF NOT EXISTS lease (name TEXT PRIMARY KEY, owner TEXT, until REAL)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # --- RULES ---
+    def add_rule(self, field, op, value=None, ref=None, symbols=None, note=""):
+        """Store a rule (symbols None = whole universe); returns its id"""
+        if field not in FIELDS:
+            raise ValueError(f"field must be one of {list(FIELDS)}")
+        if op not in OPS:
+            raise ValueError(f"op must be one of {list(OPS)}")
+        if (value is None) == (ref is None):
+            raise ValueError("give either a number or a reference field")
+        if ref is not None and ref not in FIELDS:
+            raise ValueError(f"reference field must be one of {list(FIELDS)}")
+        cursor = self._conn().execute(
+            "INSERT INTO rules (field, op, value, ref, symbols, note, created)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (field, op, value, ref, ",".join(symbols) if symbols else None, note, time.time()))
+        self._changed()
+        return cursor.lastrowid
+
+    def delete_rule(self, rule_id):
+        deleted = self._conn().execute("DELETE FROM rules WHERE id = ?", (rule_id,)).rowcount > 0
+        self._changed()
+        return deleted
+
+    def _changed(self):
+        # A running watcher syncs the (possibly larger) universe right away
+        self._rules_changed = True
+        self._wake.set()
+
+    def rules(self):
+        rows = self._conn().execute(
+            "SELECT id, field, op, value, ref, symbols, note FROM rules ORDER BY id").fetchall()
+        return [{"id": r[0], "field": r[1], "op": r[2], "value": r[3], "ref": r[4],
+                 "symbols": r[5].split(",") if r[5] else None, "note": r[6]} for r in rows]
+
+    @staticmethod
+    def describe(rule):
+        target = rule["ref"] if rule["ref"] is not None else f"{rule['value']:g}"
+        return f"{rule['field']} {rule['op']} {target}"
+
+    # --- EVALUATION ---
+    def universe(self, rules):
+        from pipeline import COMMON_STOCKS
+
+        named = [s for rule in rules for s in (rule["symbols"] or ())]
+        return list(dict.fromkeys(COMMON_STOCKS + named))
+
+    def evaluate(self, sync=True):
+        """Refresh the universe, evaluate every rule, queue new alerts; returns them"""
+        rules = self.rules()
+        if not rules:
+            return []
+        symbols = self.universe(rules)
+        today = dt.date.today()
+        start = today - dt.timedelta(days=LOOKBACK_DAYS)
+
+        if sync:
+            from pipeline import fetch_history_batch
+            from export import EXPORT_BATCH
+
+            # The bars this sync writes are evaluated below, not via notify()
+            self._syncing.active = True
+            try:
+                for i in range(0, len(symbols), EXPORT_BATCH):
+                    try:
+                        price_store.store.ensure_many(symbols[i:i + EXPORT_BATCH], start, today,
+                                                      fetch_history_batch)
+                    except Exception as e:
+                        print(f"⚠️ History sync failed: {str(e)[:60]}")
+            finally:
+                self._syncing.active = False
+
+        t, bars = price_store.store.panel(symbols, "1d", start, today)
+        if len(t) == 0:
+            return []
+        fields = universe_fields(t, bars)
+
+        position = {s: i for i, s in enumerate(symbols)}
+        scope = np.zeros((len(symbols), len(rules)), dtype=bool)
+        for j, rule in enumerate(rules):
+            if rule["symbols"] is None:
+                scope[:, j] = True
+            else:
+                scope[[position[s] for s in rule["symbols"]], j] = True
+
+        hits = evaluate_rules(fields, rules, scope)
+        return self._queue(hits, rules, symbols, fields, int(t[-1]))
+
+    def _queue(self, hits, rules, symbols, fields, t):
+        """Insert the hits not already alerted for this bar"""
+        conn = self._conn()
+        fired = set(conn.execute("SELECT rule_id, symbol FROM alerts WHERE t = ?", (t,)).fetchall())
+        date = price_store.from_epoch_day(t).isoformat()
+        new = []
+        for i, j in zip(*np.nonzero(hits)):
+            rule, symbol = rules[j], symbols[i]
+            if (rule["id"], symbol) in fired:
+                continue
+            payload = {
+                "rule_id": rule["id"], "rule": self.describe(rule), "note": rule["note"],
+                "symbol": symbol, "date": date,
+                "value": round(float(fields[rule["field"]][0][i]), 4),
+                "close": round(float(fields["close"][0][i]), 4),
+            }
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO alerts (rule_id, symbol, t, fired, payload)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (rule["id"], symbol, t, time.time(), json.dumps(payload)))
+            if cursor.rowcount:
+                payload["id"] = cursor.lastrowid
+                new.append(payload)
+        return new
+
+    # --- DELIVERY ---
+    def alerts(self, after=0, limit=100):
+        """Queued alerts with id > after, oldest first (the consumer keeps its cursor)"""
+        rows = self._conn().execute(
+            "SELECT id, payload, fired, delivered FROM alerts WHERE id > ? ORDER BY id LIMIT ?",
+            (after, limit)).fetchall()
+        return [dict(json.loads(p), id=i, fired=f, delivered=bool(d)) for i, p, f, d in rows]
+
+    def deliver(self):
+        """POST undelivered alerts to the webhook; returns how many were accepted"""
+        if not self.webhook:
+            return 0
+        conn = self._conn()
+        sent = 0
+        while True:
+            rows = conn.execute("SELECT id, payload FROM alerts WHERE delivered = 0 ORDER BY id LIMIT ?",
+                                (WEBHOOK_BATCH,)).fetchall()
+            if not rows:
+                return sent
+            batch = [dict(json.loads(p), id=i) for i, p in rows]
+            try:
+                response = requests.post(self.webhook, json={"alerts": batch}, timeout=WEBHOOK_TIMEOUT)
+                response.raise_for_status()
+            except Exception as e:
+                print(f"⚠️ Alert webhook failed ({str(e)[:60]}), will retry")
+                return sent
+            conn.executemany("UPDATE alerts SET delivered = 1 WHERE id = ?", [(r[0],) for r in rows])
+            sent += len(rows)
+
+    def prune(self, max_age_days=ALERT_RETENTION_DAYS):
+        """Drop alerts fired more than max_age_days ago, delivered or not"""
+        return self._conn().execute("DELETE FROM alerts WHERE fired < ?",
+                                    (time.time() - max_age_days * 86400,)).rowcount
+
+    def run_once(self, sync=True, deliver=True):
+        began = time.perf_counter()
+        new = self.evaluate(sync=sync)
+        for alert in new:
+            print(f"🔔 {alert['symbol']}: {alert['rule']} ({alert['value']}) on {alert['date']}")
+        delivered = self.deliver() if deliver else 0
+        if sync:
+            self.prune()
+        print(f"🔔 {len(new)} new alerts, {delivered} delivered "
+              f"in {(time.perf_counter() - began) * 1000:.0f} ms")
+        return new
+
+    # --- WATCHER ---
+    def _lease(self, every):
+        """Take or renew the watcher lease; True if this process holds it"""
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        now = time.time()
+        conn = self._conn()
+        conn.execute("INSERT OR IGNORE INTO lease VALUES ('watch', '', 0)")
+        return conn.execute(
+            "UPDATE lease SET owner = ?, until = ? WHERE name = 'watch' AND (owner = ? OR until < ?)",
+            (owner, now + 2 * every + 60, owner, now)).rowcount > 0
+
+    def notify(self, symbol, last_t):
+        """Price store listener: new bars arrived, evaluate again soon"""
+        if not getattr(self._syncing, "active", False):
+            self._wake.set()
+
+    def watch(self, every=DEFAULT_EVERY):
+        """Refresh, evaluate and deliver every `every` seconds, and right after a
+        rule change, while holding the lease; any process re-evaluates from the
+        store when notified of new bars or changed rules"""
+        due = 0.0
+        while True:
+            woken = self._wake.wait(max(0.0, due - time.time()))
+            if woken:
+                time.sleep(INGEST_DELAY)
+            self._wake.clear()
+            try:
+                leader = self._lease(every)
+                due_now = time.time() >= due
+                if due_now:
+                    due = time.time() + every
+                # Only the lease holder goes upstream; the others read the store
+                sync = leader and (due_now or self._rules_changed)
+                self._rules_changed = False
+                if sync or woken:
+                    self.run_once(sync=sync, deliver=leader)
+            except Exception as e:
+                print(f"❌ Alert evaluation failed: {e}")
+
+    def start(self, every=ALERT_EVERY):
+        """Run watch() in a background thread of this process (once per process)"""
+        with self._lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+        price_store.store.subscribe(self.notify)
+        threading.Thread(target=self.watch, args=(every,), daemon=True,
+                         name="alert-watcher").start()
+        print(f"👀 Alert watcher running (every {every}s)")
+
+
+engine = AlertEngine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage and evaluate alert rules")
+    parser.add_argument('--add', action='append', default=[], metavar="RULE",
+                        help="e.g. 'rsi crosses_above 70' or 'close crosses_below sma20'")
+    parser.add_argument('--symbols', help="Comma list the added rules apply to (default: all)")
+    parser.add_argument('--note', default="", help="Text sent along with the added rules' alerts")
+    parser.add_argument('--delete', type=int, action='append', default=[], metavar="ID")
+    parser.add_argument('--list', action='store_true', help="Show rules and recent alerts")
+    parser.add_argument('--watch', action='store_true', help="Evaluate after every refresh")
+    parser.add_argument('--every', type=int, default=DEFAULT_EVERY, help="Seconds between refreshes")
+    parser.add_argument('--once', action='store_true', help="Evaluate once (e.g. from cron)")
+    args = parser.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(",")] if args.symbols else None
+    for text in args.add:
+        try:
+            field, op, value, ref = parse_rule(text)
+            rule_id = engine.add_rule(field, op, value, ref, symbols, args.note)
+        except ValueError as e:
+            print(f"❌ {text!r}: {e}")
+            sys.exit(1)
+        print(f"✅ Rule {rule_id}: {text}")
+    for rule_id in args.delete:
+        print(f"🗑️ Rule {rule_id} {'deleted' if engine.delete_rule(rule_id) else 'not found'}")
+
+    if args.list:
+        for rule in engine.rules():
+            scope = ",".join(rule["symbols"]) if rule["symbols"] else "all"
+            print(f"  #{rule['id']:<4} {engine.describe(rule):<32} [{scope}] {rule['note']}")
+        for alert in engine.alerts()[-20:]:
+            print(f"  🔔 {alert['date']} {alert['symbol']}: {alert['rule']} ({alert['value']})")
+    if args.watch:
+        print(f"👀 Evaluating {len(engine.rules())} rules every {args.every}s")
+        engine.watch(args.every)
+    elif args.once:
+        engine.run_once()
+    elif not (args.add or args.delete or args.list):
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
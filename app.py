@@ -6,7 +6,7 @@ A cross-platform Flask application for stock analysis with retry logic
 
 import sys
 import os
-import time
+import html
 
 # --- VERSION CHECK ---
 if sys.version_info < (3, 7):
@@ -14,18 +14,25 @@ if sys.version_info < (3, 7):
     sys.exit(1)
 
 try:
-    import yfinance as yf
-    import pandas as pd
+    from flask import Flask, request, jsonify, Response
     import numpy as np
-    from sklearn.linear_model import LinearRegression
-    import datetime as dt
-    import plotly.graph_objects as go
-    from plotly.subplots import make_subplots
-    import requests
-    import xml.etree.ElementTree as ET
-    from nltk.sentiment.vader import SentimentIntensityAnalyzer
-    import nltk
-    from flask import Flask, request, jsonify
+    from pipeline import (
+        COMMON_STOCKS, DEFAULT_STOCK, AUTO_INTERVAL, DEFAULT_PERIOD, PERIODS,
+        INTRADAY_INTERVALS, INTERVAL_CHOICES,
+        fetch_stock_data, get_ticker_from_name, history_range, analyze, stream_dashboard,
+        dashboard_pipeline,
+    )
+    from ohlcv import plot_values
+    import live
+    import assets
+    import upstream
+    import export
+    import profiling
+    import symbols
+    import correlation
+    from cache import cache
+    import alerts
+    from forecast import FORECASTERS, DEFAULT_FORECASTER
 except ImportError as e:
     print(f"❌ Missing dependency: {e}")
     print("\n📦 Installing required packages...")
@@ -33,303 +40,26 @@ except ImportError as e:
     print("\n✅ Installation complete! Please run the script again.")
     sys.exit(1)
 
-# --- NLTK SETUP ---
-try:
-    nltk.data.find('sentiment/vader_lexicon.zip')
-except LookupError:
-    print("📥 Downloading VADER sentiment lexicon...")
-    nltk.download('vader_lexicon', quiet=True)
-
-app = Flask(__name__)
-
-# --- CONFIGURATION ---
-COMMON_STOCKS = [
-    "IRB.NS", "TCS.NS", "INFY.NS", "WIPRO.NS", "HCLTECH.NS",
-    "RELIANCE.NS", "HDFC.NS", "ICICIBANK.NS", "SBIN.NS", "BAJAJFINSV.NS",
-    "ADANIPORTS.NS", "MARUTI.NS", "NTPC.NS", "POWERGRID.NS", "COAL.NS"
-]
-
-DEFAULT_STOCK = "IRB.NS"
-MAX_RETRIES = 3
-
-
-def fetch_stock_data(symbol, retries=MAX_RETRIES):
-    """Fetch stock data with retry logic for reliability"""
-    for attempt in range(retries):
-        try:
-            print(f"📥 Fetching data for {symbol} (attempt {attempt + 1}/{retries})...")
-            df = yf.download(symbol, period='1y', interval='1d', progress=False)
-            
-            if df is None or df.empty:
-                if attempt < retries - 1:
-                    print(f"⚠️ Empty result, retrying...")
-                    time.sleep(1)
-                continue
-            
-            return df.reset_index()
-            
-        except Exception as e:
-            error_msg = str(e)[:60]
-            print(f"⚠️ Attempt {attempt + 1} failed: {error_msg}")
-            
-            if attempt < retries - 1:
-                print(f"🔄 Retrying in 2 seconds...")
-                time.sleep(2)
-    
-    print(f"❌ Failed to fetch data after {retries} attempts")
-    return None
+app = Flask(__name__, static_folder=None)
+assets.register(app)
+profiling.register(app)
 
-def get_ticker_from_name(query):
-    """Dynamically find ticker from company name using Yahoo API"""
-    query = str(query).strip()
-    
-    # If it's likely already a ticker (no spaces, mostly uppercase)
-    if " " not in query and sum(1 for c in query if c.isupper()) > len(query) / 2:
-        if not (query.endswith('.NS') or query.endswith('.BO')):
-            return query.upper() + ".NS"
-        return query.upper()
-        
-    url = f"https://query2.finance.yahoo.com/v1/finance/search?q={query}"
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    })
-    
-    try:
-        response = session.get(url, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            quotes = data.get('quotes', [])
-            
-            # Look for NSE or BSE matches
-            for quote in quotes:
-                symbol = quote.get('symbol', '')
-                exchange = quote.get('exchange', '')
-                if exchange in ['NSI', 'BSE'] or symbol.endswith('.NS') or symbol.endswith('.BO'):
-                    return symbol
-                    
-            if quotes:
-                return quotes[0].get('symbol', '')
-                
-    except Exception as e:
-        print(f"⚠️ Search error for {query}: {e}")
-        
-    # Fallback to the original dumb behavior if API fails
-    fallback = query.replace(" ", "").upper()
-    if not (fallback.endswith('.NS') or fallback.endswith('.BO')):
-        return fallback + ".NS"
-    return fallback
 
+def poll_live(symbol, interval):
+    """Refresh bars for the live feed; unchanged bars hit the pipeline cache"""
+    result = analyze(symbol, interval, targets=("indicators", "prediction", "sentiment"),
+                     refresh=("fetch",))
+    return result["indicators"], result["prediction"], result["sentiment"]["avg"]
 
-def generate_dashboard(symbol):
-    """Generate stock dashboard for given symbol"""
-    
-    # 1. AUTO-FIX TICKER (Use new search API)
-    original_query = symbol
-    symbol = get_ticker_from_name(symbol)
-    
-    print(f"--- 🚀 ANALYZING: {symbol} (from '{original_query}') ---")
 
-    try:
-        # --- PART 1: FETCH DATA with RETRIES ---
-        df = fetch_stock_data(symbol, retries=MAX_RETRIES)
-        if df is None or df.empty:
-            print(f"❌ No data available for {symbol}")
-            return None
-
-        # Flatten MultiIndex columns if present
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.droplevel(1)
-
-        # --- PART 2: NEWS & SENTIMENT ---
-        print("📡 Fetching news...")
-        encoded_symbol = symbol.replace(".NS", "").replace(".BO", "")
-        rss_url = f"https://news.google.com/rss/search?q={encoded_symbol}+stock+india&hl=en-IN&gl=IN&ceid=IN:en"
-
-        vader = SentimentIntensityAnalyzer()
-        sentiment_score = 0
-        news_count = 0
-        latest_headlines = []
-
-        try:
-            response = requests.get(rss_url, timeout=5)
-            root = ET.fromstring(response.content)
-            
-            for item in root.findall('.//item')[:10]:
-                title_elem = item.find('title')
-                pubDate_elem = item.find('pubDate')
-                
-                if title_elem is not None and pubDate_elem is not None:
-                    title = title_elem.text
-                    pubDate = pubDate_elem.text
-                    
-                    score = vader.polarity_scores(title)['compound']
-                    sentiment_score += score
-                    news_count += 1
-                    
-                    sentiment_label = "🟢" if score > 0.05 else "🔴" if score < -0.05 else "⚪"
-                    latest_headlines.append(f"{sentiment_label} {title} ({pubDate[:16]})")
-
-            avg_sentiment = sentiment_score / news_count if news_count > 0 else 0
-        except Exception as e:
-            print(f"⚠️ News error: {str(e)[:40]}")
-            avg_sentiment = 0
-
-        # --- PART 3: PREDICTION MODEL ---
-        print("🤖 Running ML model...")
-        
-        if len(df) < 10:
-            print("⚠️ Not enough data for prediction")
-            return None
-            
-        df['Date_Ordinal'] = df['Date'].map(dt.datetime.toordinal)
-        X = df[['Date_Ordinal']]
-        y = df['Close']
-        model = LinearRegression()
-        model.fit(X, y)
-
-        last_date = df['Date'].iloc[-1]
-        tomorrow_date = last_date + dt.timedelta(days=1)
-        if tomorrow_date.weekday() >= 5:
-            tomorrow_date += dt.timedelta(days=(7 - tomorrow_date.weekday()))
-
-        tomorrow_ordinal = np.array([[tomorrow_date.toordinal()]])
-        base_price = float(model.predict(tomorrow_ordinal)[0])
-
-        volatility = 0.025
-        news_impact = base_price * (avg_sentiment * volatility)
-        predicted_close = base_price + news_impact
-
-        recent_volatility = (df['High'] - df['Low']).tail(14).mean()
-        predicted_high = predicted_close + (recent_volatility * 0.8)
-        predicted_low = predicted_close - (recent_volatility * 0.8)
-
-        # --- PART 4: CREATE CHART ---
-        print("🎨 Creating chart...")
-        
-        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
-                            vertical_spacing=0.05, row_heights=[0.7, 0.3],
-                            subplot_titles=(f"{symbol} Price Action", "Volume"))
-
-        fig.add_trace(go.Candlestick(x=df['Date'],
-                        open=df['Open'], high=df['High'],
-                        low=df['Low'], close=df['Close'],
-                        name='OHLC'), row=1, col=1)
-
-        fig.add_trace(go.Scatter(x=df['Date'], y=model.predict(X),
-                                 mode='lines', name='Trend Line',
-                                 line=dict(color='orange', width=1, dash='dot')), row=1, col=1)
-
-        fig.add_trace(go.Scatter(x=[tomorrow_date], y=[predicted_close],
-                                 mode='markers+text', name='Prediction',
-                                 marker=dict(color='cyan', size=15, symbol='star'),
-                                 text=[f"{predicted_close:.1f}"], textposition="top center"), row=1, col=1)
-
-        fig.add_trace(go.Scatter(x=[tomorrow_date, tomorrow_date], 
-                                 y=[predicted_low, predicted_high],
-                                 mode='lines', name='Pred Range',
-                                 line=dict(color='cyan', width=4)), row=1, col=1)
-
-        colors = ['red' if row['Open'] - row['Close'] >= 0 else 'green' for index, row in df.iterrows()]
-        fig.add_trace(go.Bar(x=df['Date'], y=df['Volume'], name='Volume', marker_color=colors), row=2, col=1)
-
-        last_close = df['Close'].iloc[-1]
-        change = last_close - df['Close'].iloc[-2]
-        pct_change = (change / df['Close'].iloc[-2]) * 100
-        color_change = "green" if change >= 0 else "red"
-
-        dashboard_title = (
-            f"<b>{symbol}</b>: ₹{last_close:.2f} "
-            f"<span style='color:{color_change}'>({change:+.2f} / {pct_change:+.2f}%)</span><br>"
-            f"<span style='font-size: 14px; color: gray'>Mood: {avg_sentiment:.3f}</span>"
-        )
-
-        fig.update_layout(
-            title=dashboard_title,
-            yaxis_title='Price (INR)',
-            template='plotly_dark',
-            height=800,
-            showlegend=False,
-            hovermode="x unified"
-        )
-
-        # --- PART 5: GENERATE HTML ---
-        html_content = f"""
-<html>
-<head><style>
-body{{font-family: sans-serif; background-color: #111; color: #ddd; text-align: center;}}
-.box{{display: inline-block; background: #222; padding: 20px; margin: 10px; border-radius: 10px; border: 1px solid #444; vertical-align: top; width: 300px;}}
-h2{{color: #00ccff;}} .pos{{color: #00ff00;}} .neg{{color: #ff3333;}}
-.selector{{padding: 20px; background: #222; border-radius: 10px; margin: 20px; border: 2px solid #00ccff;}}
-select, input{{padding: 10px; font-size: 16px; border-radius: 5px; background: #111; color: #0ff; border: 1px solid #0ff; cursor: pointer;}}
-input{{width: 200px;}}
-button{{padding: 10px 20px; margin-left: 10px; font-size: 16px; border-radius: 5px; background: #00ccff; color: #111; border: none; cursor: pointer; font-weight: bold;}}
-button:hover{{background: #00ffff;}}
-hr{{border: 1px solid #444; width: 50%;}}
-.error-msg{{background: #ff333344; padding: 10px; border-radius: 5px; margin: 10px; color: #ff6666;}}
-</style></head>
-<body>
-    <div class="selector">
-        <h1>🤖 AI Stock Report Dashboard</h1>
-        <h3 style="color: #00ccff;">📊 Current Stock: <b>{symbol}</b></h3>
-        
-        <form method="GET" action="/" style="margin-bottom: 20px;">
-            <label for="symbol" style="font-size: 18px; color: #00ccff;"><b>Select Stock:</b></label><br><br>
-            <select name="symbol" id="symbol">
-                <option value="">-- Choose a stock --</option>
-                {''.join([f'<option value="{s}">{s}</option>' for s in COMMON_STOCKS])}
-            </select>
-            <button type="submit">Analyze</button>
-        </form>
-        
-        <hr>
-        
-        <form method="GET" action="/">
-            <label style="font-size: 18px; color: #00ccff;"><b>Search Custom Stock:</b></label><br><br>
-            <input type="text" name="symbol" placeholder="e.g., TATAMOTORS, ADANIGREEN" required>
-            <button type="submit">Search</button>
-        </form>
-    </div>
-
-    <h2 style="color: #00ccff; margin-top: 40px;">📊 Analysis Results</h2>
-    
-    <div class="box">
-        <h2>📅 Previous Day</h2>
-        <p><b>Date:</b> {last_date.date()}</p>
-        <p><b>Close:</b> ₹{last_close:.2f}</p>
-        <p><b>High:</b> ₹{df['High'].iloc[-1]:.2f}</p>
-        <p><b>Low:</b> ₹{df['Low'].iloc[-1]:.2f}</p>
-        <p><b>Vol:</b> {int(df['Volume'].iloc[-1]/1000)}k</p>
-    </div>
-
-    <div class="box">
-        <h2>🚀 Tomorrow's Prediction</h2>
-        <p><b>Target Date:</b> {tomorrow_date.date()}</p>
-        <p style="font-size: 20px; font-weight: bold; color: cyan;">Target: ₹{predicted_close:.2f}</p>
-        <p><b>Likely High:</b> ₹{predicted_high:.2f}</p>
-        <p><b>Likely Low:</b> ₹{predicted_low:.2f}</p>
-        <p><i>(News adjusted by {avg_sentiment:.2f})</i></p>
-    </div>
-
-    <div class="box" style="width: 600px; text-align: left;">
-        <h2>📰 Top Market News</h2>
-        <ul style="font-size: 13px; line-height: 1.6;">
-            {''.join([f'<li>{h}</li>' for h in latest_headlines]) if latest_headlines else '<li>No news found</li>'}
-        </ul>
-    </div>
-</body>
-</html>
-"""
+live_hub = live.LiveHub(poll=poll_live, intervals=INTRADAY_INTERVALS)
 
-        chart_html = fig.to_html(include_plotlyjs='cdn')
-        final_report = chart_html.replace("<body>", "<body>" + html_content)
-        
-        print("✅ Dashboard generated successfully")
-        return final_report
-    
-    except Exception as e:
-        print(f"❌ Error generating dashboard: {e}")
-        return None
+
+@app.before_request
+def start_alert_watcher():
+    """Alert rules are evaluated in the app: one watcher thread per worker process"""
+    if alerts.ALERT_WATCH:
+        alerts.engine.start()
 
 
 # --- FLASK ROUTES ---
@@ -337,15 +67,34 @@ hr{{border: 1px solid #444; width: 50%;}}
 def dashboard():
     """Main dashboard route"""
     symbol = request.args.get('symbol', DEFAULT_STOCK).strip()
+    interval = request.args.get('interval', AUTO_INTERVAL).strip()
+    period = request.args.get('period', DEFAULT_PERIOD).strip()
+    start = request.args.get('start', '').strip()
+    end = request.args.get('end', '').strip()
+    forecaster = request.args.get('forecaster', DEFAULT_FORECASTER).strip()
     
     if not symbol:
         symbol = DEFAULT_STOCK
+    if interval not in INTERVAL_CHOICES:
+        interval = AUTO_INTERVAL
+    if period not in PERIODS:
+        period = DEFAULT_PERIOD
+    if forecaster not in FORECASTERS:
+        forecaster = DEFAULT_FORECASTER
     
-    print(f"\n📨 Request received for: {symbol}")
-    result = generate_dashboard(symbol)
-    
-    if result is None:
-        error_html = f"""
+    print(f"\n📨 Request received for: {symbol} ({interval}, {start or period})")
+    try:
+        pieces = stream_dashboard(symbol, interval, period, start, end, forecaster)
+    except ValueError as e:
+        print(f"❌ Error generating dashboard: {e}")
+        return not_available_page(symbol), 200
+
+    # Shell and forms go out at once; each box follows when its stages finish
+    return Response(pieces, mimetype='text/html', headers={'X-Accel-Buffering': 'no'})
+
+
+def not_available_page(symbol):
+    return f"""
         <html>
         <head><style>
         body{{background: #111; color: #ddd; font-family: sans-serif; text-align: center; padding: 50px;}}
@@ -358,7 +107,7 @@ def dashboard():
         <body>
         <div class="error-box">
             <h1>❌ Data Not Available</h1>
-            <p>Stock '{symbol}' not found or Yahoo Finance API is temporarily unavailable.</p>
+            <p>Stock '{html.escape(symbol)}' not found or Yahoo Finance API is temporarily unavailable.</p>
             <p>Please try:</p>
             <ul>
                 <li>Check the stock symbol is correct</li>
@@ -370,9 +119,180 @@ def dashboard():
         </body>
         </html>
         """
-        return error_html, 200
-    
-    return result
+
+
+@app.route('/stream')
+def stream():
+    """Server-Sent Events feed of new intraday bars and predictions"""
+    symbol = get_ticker_from_name(request.args.get('symbol', DEFAULT_STOCK))
+    interval = request.args.get('interval', '')
+    if interval not in INTRADAY_INTERVALS:
+        return jsonify({"error": f"interval must be one of {list(INTRADAY_INTERVALS)}"}), 400
+
+    # Browsers resend the last event id on reconnect, so resume from there
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    events = live_hub.stream(symbol, interval, since)
+    if events is None:
+        # Every viewer holds a worker thread; keep the rest for normal pages
+        return (jsonify({"error": "too many live viewers, retrying shortly"}), 503,
+                {'Retry-After': str(live.RETRY_MS // 1000)})
+    return Response(
+        events,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.route('/api/history')
+def history():
+    """OHLCV bars for any period or start/end range, from the local price store"""
+    query = request.args.get('symbol', DEFAULT_STOCK)
+    interval = request.args.get('interval', AUTO_INTERVAL)
+    period = request.args.get('period', DEFAULT_PERIOD)
+    start, end = request.args.get('start'), request.args.get('end')
+    try:
+        resolved, range_start, range_end = history_range(interval, period, start, end)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        result = analyze(query, interval, targets=("resolve", "fetch"),
+                         period=period, start=start, end=end)
+    except Exception as e:
+        return jsonify({"error": f"No data for {query}: {str(e)[:100]}"}), 404
+
+    series = result["fetch"]
+    return jsonify({
+        "symbol": result["resolve"],
+        "interval": resolved,
+        "start": range_start.isoformat() if range_start else None,
+        "end": range_end.isoformat() if range_end else None,
+        "bars": {
+            "date": np.datetime_as_string(series.dates()).tolist(),
+            "open": plot_values(series.open).tolist(),
+            "high": plot_values(series.high).tolist(),
+            "low": plot_values(series.low).tolist(),
+            "close": plot_values(series.close).tolist(),
+            "volume": series.volume.tolist(),
+        },
+    })
+
+
+@app.route('/api/export')
+def export_data():
+    """Stream bars, indicators and predictions for many symbols as CSV, NDJSON or Arrow"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in export.FORMATS:
+        return jsonify({"error": f"format must be one of {list(export.FORMATS)}"}), 400
+    if not export.format_available(fmt):
+        return jsonify({"error": "Arrow export needs pyarrow (pip install pyarrow)"}), 501
+
+    interval = request.args.get('interval', AUTO_INTERVAL)
+    try:
+        resolved, start, end = history_range(interval, request.args.get('period', DEFAULT_PERIOD),
+                                             request.args.get('start'), request.args.get('end'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if resolved in INTRADAY_INTERVALS:
+        return jsonify({"error": "export covers daily, weekly and monthly bars only"}), 400
+
+    queries = [q.strip() for arg in request.args.getlist('symbols') for q in arg.split(',')]
+    queries += request.args.getlist('symbol')
+    symbols = list(dict.fromkeys(get_ticker_from_name(q) for q in queries if q.strip()))
+    if not symbols:
+        return jsonify({"error": "pass symbols=TCS.NS,INFY.NS (or repeated symbol=)"}), 400
+    if len(symbols) > export.MAX_EXPORT_SYMBOLS:
+        return jsonify({"error": f"at most {export.MAX_EXPORT_SYMBOLS} symbols per export"}), 400
+
+    mimetype, extension = export.FORMATS[fmt]
+    print(f"\n📤 Exporting {len(symbols)} symbols ({resolved}, {fmt})")
+    return Response(
+        export.stream(symbols, fmt, resolved, start, end),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=export.{extension}',
+                 'X-Accel-Buffering': 'no'},
+    )
+
+
+def correlation_snapshot():
+    """Parse the correlation arguments and compute; raises ValueError on bad input"""
+    queries = [q.strip() for arg in request.args.getlist('symbols') for q in arg.split(',')]
+    symbols = list(dict.fromkeys(get_ticker_from_name(q) for q in queries if q.strip()))
+    try:
+        window = int(request.args.get('window', correlation.DEFAULT_WINDOW))
+    except ValueError:
+        raise ValueError("window must be an integer")
+    return correlation.correlation(symbols or COMMON_STOCKS,
+                                   interval=request.args.get('interval', '1d'), window=window,
+                                   benchmark=request.args.get('benchmark', correlation.BENCHMARK).strip())
+
+
+@app.route('/api/correlation')
+def correlation_data():
+    """Rolling return correlation, beta and volatility for a list of symbols"""
+    try:
+        return jsonify(correlation_snapshot())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route('/correlation')
+def correlation_heatmap():
+    """Correlation heatmap page"""
+    try:
+        return correlation.heatmap_html(correlation_snapshot())
+    except ValueError as e:
+        return f"<h1>Error</h1><p class='error-msg'>{e}</p>", 400
+
+
+@app.route('/api/rules', methods=['GET', 'POST'])
+def rules():
+    """List alert rules, or add one (admin): {"rule": "rsi crosses_above 70", "symbols": [...]}"""
+    if request.method == 'GET':
+        return jsonify({"rules": alerts.engine.rules()})
+    if not profiling.is_admin():
+        return jsonify({"error": "admin only"}), 403
+    body = request.get_json(silent=True) or {}
+    symbols = [get_ticker_from_name(s) for s in body.get("symbols") or [] if str(s).strip()]
+    try:
+        field, op, value, ref = alerts.parse_rule(str(body.get("rule", "")))
+        rule_id = alerts.engine.add_rule(field, op, value, ref, symbols or None,
+                                         str(body.get("note", "")))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"id": rule_id}), 201
+
+
+@app.route('/api/rules/<int:rule_id>', methods=['DELETE'])
+def delete_rule(rule_id):
+    """Remove an alert rule (admin)"""
+    if not profiling.is_admin():
+        return jsonify({"error": "admin only"}), 403
+    if not alerts.engine.delete_rule(rule_id):
+        return jsonify({"error": "no such rule"}), 404
+    return jsonify({"deleted": rule_id})
+
+
+@app.route('/api/alerts')
+def alert_queue():
+    """Alerts queued after ?after=<id>, oldest first"""
+    try:
+        after = int(request.args.get('after', 0))
+        limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+    except ValueError:
+        return jsonify({"error": "after and limit must be integers"}), 400
+    return jsonify({"alerts": alerts.engine.alerts(after, limit)})
+
+
+@app.route('/api/suggest')
+def suggest():
+    """Ticker suggestions for a partial company name or symbol, from the offline index"""
+    query = request.args.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.args.get('limit', symbols.SUGGEST_LIMIT)), 50))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify({"query": query, "suggestions": symbols.suggest(query, limit) if query else []})
 
 
 @app.route('/api/stocks')
@@ -381,10 +301,18 @@ def get_stocks():
     return jsonify({"stocks": COMMON_STOCKS})
 
 
+@app.route('/admin/cache')
+def cache_stats():
+    """Cache hit rates, bytes and evictions per namespace (admin)"""
+    if not profiling.is_admin():
+        return jsonify({"error": "admin only"}), 403
+    return jsonify({"pipeline": dashboard_pipeline.stats(), "cache": cache.stats()})
+
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "ok", "version": "1.1"}), 200
+    return jsonify({"status": "ok", "version": "1.1", "upstream": upstream.guard.status()}), 200
 
 
 if __name__ == '__main__':
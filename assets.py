@@ -0,0 +1,130 @@
+"""
+Static Asset Pipeline
+Serves plotly.js and the dashboard CSS/JS from the app itself (no CDN, so it
+works on air-gapped hosts) under content-hash filenames such as
+/assets/plotly.3f9a1c2b7d4e.js. A new build gets a new URL, so responses can
+be cached forever with Cache-Control: immutable.
+
+plotly.js comes from the installed plotly package by default. Set
+PLOTLY_JS_BUNDLE to the path of a smaller custom build instead, e.g. the
+official "finance" partial bundle (scatter, bar, candlestick, ...) that covers
+every trace the dashboard draws.
+"""
+
+import os
+import gzip
+import hashlib
+import threading
+
+from flask import Response, abort, request
+
+# --- CONFIGURATION ---
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+PLOTLY_JS_BUNDLE = os.environ.get("PLOTLY_JS_BUNDLE", "")
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+HASH_LENGTH = 12
+
+MIMETYPES = {
+    ".js": "application/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+}
+
+
+def _read_static(name):
+    with open(os.path.join(STATIC_DIR, name), "rb") as f:
+        return f.read()
+
+
+def _read_plotly():
+    if PLOTLY_JS_BUNDLE:
+        with open(PLOTLY_JS_BUNDLE, "rb") as f:
+            return f.read()
+    from plotly.offline import get_plotlyjs
+    return get_plotlyjs().encode("utf-8")
+
+
+# logical name -> loader returning the file's bytes
+SOURCES = {
+    "plotly.js": _read_plotly,
+    "dashboard.css": lambda: _read_static("dashboard.css"),
+    "live.js": lambda: _read_static("live.js"),
+    "search.js": lambda: _read_static("search.js"),
+}
+
+
+class Asset:
+    """One fingerprinted file, kept in memory raw and gzip-compressed"""
+
+    __slots__ = ("name", "filename", "mimetype", "body", "gzipped", "etag")
+
+    def __init__(self, name, body):
+        stem, ext = os.path.splitext(name)
+        digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+        self.name = name
+        self.filename = f"{stem}.{digest}{ext}"
+        self.mimetype = MIMETYPES.get(ext, "application/octet-stream")
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9)
+        self.etag = digest
+
+
+_assets = {}
+_by_filename = {}
+_lock = threading.Lock()
+
+
+def _load(name):
+    with _lock:
+        asset = _assets.get(name)
+        if asset is None:
+            asset = Asset(name, SOURCES[name]())
+            _assets[name] = asset
+            _by_filename[asset.filename] = asset
+        return asset
+
+
+def get(name):
+    """The Asset for a logical name (body, gzipped copy, fingerprinted filename)"""
+    return _load(name)
+
+
+def url(name):
+    """Fingerprinted URL for a logical asset name, e.g. url('plotly.js')"""
+    return f"/assets/{_load(name).filename}"
+
+
+def relative(page, base="assets/"):
+    """Point a page's asset links at base instead of /assets/ (for static copies)"""
+    return page.replace('="/assets/', f'="{base}')
+
+
+def head_tags():
+    """<script>/<link> tags every dashboard page needs in its <head>"""
+    return (f'<script src="{url("plotly.js")}"></script>'
+            f'<link rel="stylesheet" href="{url("dashboard.css")}">'
+            f'<script src="{url("search.js")}" defer></script>')
+
+
+def serve(filename):
+    """Flask view for /assets/<filename>"""
+    if not _by_filename:
+        for name in SOURCES:
+            _load(name)
+    asset = _by_filename.get(filename)
+    if asset is None:
+        abort(404)
+
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": f'"{asset.etag}"',
+               "Vary": "Accept-Encoding"}
+    if request.headers.get("If-None-Match") == f'"{asset.etag}"':
+        return Response(status=304, headers=headers)
+
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(asset.gzipped, content_type=asset.mimetype, headers=headers)
+    return Response(asset.body, content_type=asset.mimetype, headers=headers)
+
+
+def register(app):
+    """Add the /assets/<filename> route to a Flask app"""
+    app.add_url_rule("/assets/<path:filename>", "assets", serve)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Walk-Forward Backtester for the Dashboard Prediction Formula
+Replays the trend x sentiment x RSI prediction for every day and every
+symbol using rolling-window sums instead of refitting LinearRegression
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION (mirrors generate_dashboard) ---
+TREND_WINDOW = 250        # ~1y of daily bars, same as period='1y'
+RSI_WINDOW = 14
+RANGE_WINDOW = 14
+RANGE_MULTIPLIER = 0.8
+NEWS_VOLATILITY = 0.025
+RSI_OVERBOUGHT = 70
+RSI_OVERSOLD = 30
+RSI_PULLBACK = 0.99
+RSI_BOUNCE = 1.01
+
+
+def load_panel(frames):
+    """Align {symbol: OHLCV DataFrame} into date x symbol NumPy matrices"""
+    symbols = list(frames)
+    closes, opens, highs, lows = {}, {}, {}, {}
+
+    for symbol in symbols:
+        df = frames[symbol]
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.copy()
+            df.columns = df.columns.droplevel(1)
+        if 'Date' in df.columns:
+            df = df.set_index('Date')
+        index = pd.DatetimeIndex(df.index).normalize()
+        opens[symbol] = pd.Series(df['Open'].to_numpy(), index=index)
+        highs[symbol] = pd.Series(df['High'].to_numpy(), index=index)
+        lows[symbol] = pd.Series(df['Low'].to_numpy(), index=index)
+        closes[symbol] = pd.Series(df['Close'].to_numpy(), index=index)
+
+    close = pd.DataFrame(closes).sort_index()
+    dates = close.index
+    return {
+        'symbols': symbols,
+        'dates': dates.values.astype('datetime64[D]'),
+        'open': pd.DataFrame(opens).reindex(dates)[symbols].to_numpy(dtype=np.float64),
+        'high': pd.DataFrame(highs).reindex(dates)[symbols].to_numpy(dtype=np.float64),
+        'low': pd.DataFrame(lows).reindex(dates)[symbols].to_numpy(dtype=np.float64),
+        'close': close[symbols].to_numpy(dtype=np.float64),
+    }
+
+
+def _rolling_sum(values, window):
+    """Trailing window sum along axis 0 (NaN where the window is incomplete)"""
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+
+    csum = np.cumsum(filled, axis=0)
+    ccount = np.cumsum(valid, axis=0)
+    total = csum.copy()
+    count = ccount.copy()
+    total[window:] -= csum[:-window]
+    count[window:] -= ccount[:-window]
+
+    total[:window - 1] = np.nan
+    total[count < window] = np.nan
+    return total
+
+
+def next_trading_day(dates):
+    """Vectorized version of the dashboard's 'tomorrow, skipping weekends' rule"""
+    tomorrow = dates + np.timedelta64(1, 'D')
+    # 1970-01-01 was a Thursday, so weekday (Mon=0) is (days + 3) % 7
+    weekday = (tomorrow.astype(np.int64) + 3) % 7
+    shift = np.where(weekday >= 5, 7 - weekday, 0)
+    return tomorrow + shift.astype('timedelta64[D]')
+
+
+def rolling_trend(dates, close, window=TREND_WINDOW):
+    """Fit y = a + b*x over every trailing window; return (slope, intercept)"""
+    # Ordinals are re-based to the first bar so the sums stay well-conditioned
+    x = (dates.astype(np.int64) - dates.astype(np.int64)[0]).astype(np.float64)
+    x = np.broadcast_to(x[:, None], close.shape)
+    x = np.where(np.isnan(close), np.nan, x)
+
+    n = float(window)
+    sx = _rolling_sum(x, window)
+    sy = _rolling_sum(close, window)
+    sxx = _rolling_sum(x * x, window)
+    sxy = _rolling_sum(x * close, window)
+
+    denom = n * sxx - sx * sx
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (n * sxy - sx * sy) / denom
+    intercept = (sy - slope * sx) / n
+    return slope, intercept
+
+
+def rolling_rsi(close, window=RSI_WINDOW):
+    """RSI with simple rolling means, as ohlcv.rsi() computes it (without back-fill)"""
+    delta = np.full_like(close, np.nan)
+    delta[1:] = close[1:] - close[:-1]
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    # A symbol's first bar counts as no change (like pandas' where() on the
+    # leading NaN diff); bars before its listing stay missing
+    gain[np.isnan(close)] = np.nan
+    loss[np.isnan(close)] = np.nan
+
+    avg_gain = _rolling_sum(gain, window) / window
+    avg_loss = _rolling_sum(loss, window) / window
+    avg_loss = np.where(avg_loss == 0, 0.0001, avg_loss)
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def predict_panel(panel, window=TREND_WINDOW, sentiment=None, target_dates=None):
+    """Compute the dashboard prediction for every (day, symbol) in the panel.
+
+    target_dates defaults to the next trading day (daily bars).
+    """
+    dates, close = panel['dates'], panel['close']
+
+    slope, intercept = rolling_trend(dates, close, window)
+    if target_dates is None:
+        target_dates = next_trading_day(dates)
+    x_next = (target_dates.astype(np.int64) - dates.astype(np.int64)[0]).astype(np.float64)
+    base_price = intercept + slope * x_next[:, None]
+
+    if sentiment is None:
+        # Historical headlines are not available, so news is treated as neutral
+        sentiment = 0.0
+    news_impact = base_price * (sentiment * NEWS_VOLATILITY)
+
+    rsi = rolling_rsi(close)
+    rsi_factor = np.where(rsi > RSI_OVERBOUGHT, RSI_PULLBACK,
+                          np.where(rsi < RSI_OVERSOLD, RSI_BOUNCE, 1.0))
+    predicted_close = (base_price + news_impact) * rsi_factor
+
+    spread = _rolling_sum(panel['high'] - panel['low'], RANGE_WINDOW) / RANGE_WINDOW
+    band = spread * RANGE_MULTIPLIER
+
+    return {
+        'target_dates': target_dates,
+        'predicted_close': predicted_close,
+        'predicted_high': predicted_close + band,
+        'predicted_low': predicted_close - band,
+        'rsi': rsi,
+    }
+
+
+def evaluate(panel, window=TREND_WINDOW, sentiment=None):
+    """Score next-bar predictions; returns per-symbol metrics DataFrame"""
+    preds = predict_panel(panel, window, sentiment)
+    close = panel['close']
+
+    # Prediction made at the close of day t is judged against day t+1
+    predicted = preds['predicted_close'][:-1]
+    low = preds['predicted_low'][:-1]
+    high = preds['predicted_high'][:-1]
+    last_close = close[:-1]
+    actual = close[1:]
+
+    valid = ~(np.isnan(predicted) | np.isnan(actual) | np.isnan(last_close) | np.isnan(low))
+    count = valid.sum(axis=0)
+
+    hits = (np.sign(predicted - last_close) == np.sign(actual - last_close)) & valid
+    abs_err = np.where(valid, np.abs(predicted - actual), 0.0)
+    pct_err = np.where(valid, abs_err / np.where(valid, actual, 1.0), 0.0)
+    inside = (actual >= low) & (actual <= high) & valid
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        metrics = pd.DataFrame({
+            'samples': count,
+            'hit_rate': hits.sum(axis=0) / count,
+            'mae': abs_err.sum(axis=0) / count,
+            'mape': pct_err.sum(axis=0) / count * 100,
+            'band_coverage': inside.sum(axis=0) / count,
+        }, index=pd.Index(panel['symbols'], name='symbol'))
+
+    total = count.sum()
+    summary = {
+        'symbols': int((count > 0).sum()),
+        'samples': int(total),
+        'hit_rate': float(hits.sum() / total) if total else float('nan'),
+        'mae': float(abs_err.sum() / total) if total else float('nan'),
+        'mape': float(pct_err.sum() / total * 100) if total else float('nan'),
+        'band_coverage': float(inside.sum() / total) if total else float('nan'),
+    }
+    return metrics, summary
+
+
+def synthetic_panel(n_symbols, n_days, seed=0):
+    """Random-walk OHLC panel used for benchmarking the engine offline"""
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset('2005-01-03', np.arange(n_days), roll='forward')
+    returns = rng.normal(0.0003, 0.018, size=(n_days, n_symbols))
+    close = 100 * np.exp(np.cumsum(returns, axis=0))
+    open_ = close * (1 + rng.normal(0, 0.005, size=close.shape))
+    spread = np.abs(rng.normal(0, 0.012, size=close.shape)) * close
+    return {
+        'symbols': [f"SYM{i:04d}.NS" for i in range(n_symbols)],
+        'dates': dates.astype('datetime64[D]'),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+    }
+
+
+def fetch_panel(symbols, period):
+    """Download all symbols in one batched yfinance call"""
+    import yfinance as yf
+    import upstream
+
+    print(f"📥 Fetching {len(symbols)} symbols ({period})...")
+    with upstream.guard.call('yahoo', max_wait=60):
+        raw = yf.download(symbols, period=period, interval='1d',
+                          group_by='ticker', progress=False)
+    if raw is None or raw.empty:
+        return None
+
+    frames = {}
+    for symbol in symbols:
+        try:
+            df = raw[symbol] if isinstance(raw.columns, pd.MultiIndex) else raw
+        except KeyError:
+            continue
+        df = df.dropna(how='all')
+        if not df.empty:
+            frames[symbol] = df
+    return load_panel(frames) if frames else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the dashboard prediction formula")
+    parser.add_argument('symbols', nargs='*', help="Tickers to evaluate (default: COMMON_STOCKS)")
+    parser.add_argument('--period', default='5y', help="History to download (default: 5y)")
+    parser.add_argument('--window', type=int, default=TREND_WINDOW, help="Trend fit window in bars")
+    parser.add_argument('--bench', type=int, metavar='N', help="Benchmark on N synthetic symbols")
+    parser.add_argument('--days', type=int, default=2520, help="Synthetic history length (with --bench)")
+    args = parser.parse_args()
+
+    if args.bench:
+        panel = synthetic_panel(args.bench, args.days)
+    else:
+        symbols = args.symbols
+        if not symbols:
+            from pipeline import COMMON_STOCKS
+            symbols = COMMON_STOCKS
+        panel = fetch_panel(symbols, args.period)
+        if panel is None:
+            print("❌ No data available")
+            sys.exit(1)
+
+    start = time.perf_counter()
+    metrics, summary = evaluate(panel, window=args.window)
+    elapsed = time.perf_counter() - start
+
+    with pd.option_context('display.max_rows', 50, 'display.width', 120):
+        print(metrics.round(4).to_string())
+    print("\n" + "=" * 60)
+    print(f"📊 {summary['symbols']} symbols, {summary['samples']} predictions "
+          f"in {elapsed:.2f}s")
+    print(f"🎯 Hit rate:      {summary['hit_rate']:.2%}")
+    print(f"📏 MAE:           {summary['mae']:.3f}  (MAPE {summary['mape']:.2f}%)")
+    print(f"📦 Band coverage: {summary['band_coverage']:.2%}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,462 @@
+"""
+Bounded Cache
+One cache for everything the app keeps around between requests (pipeline
+stage results, resolved tickers, news, rendered HTML, correlation matrices),
+bounded by bytes rather than entry counts so a worker cannot grow until it
+is OOM-killed.
+
+Two tiers, looked up in order:
+    memory  per process, sizes estimated per value (numpy arrays by nbytes).
+            Over budget, the least recently used entries go, but a new entry
+            only displaces them if it has been asked for more often lately
+            (TinyLFU: a count-min sketch of recent lookups, halved as it
+            fills), so one-off symbols do not flush the popular ones.
+    disk    SQLite file shared by all workers on the host (pickled values),
+            for namespaces that opt in. Hits are promoted to memory. Byte
+            totals per namespace are kept up to date by triggers, so a write
+            only evicts (least recently used first, down to DISK_LOW_WATER
+            of the budget) once a quota is actually exceeded.
+
+Every namespace has its own TTL (how long an entry is fresh), retention (how
+long an expired entry is kept for stale-on-error fallbacks) and memory/disk
+quotas. stats() reports hits, misses, bytes and evictions per namespace.
+
+    CACHE_MEMORY_BYTES   memory budget per process (default 256 MiB)
+    CACHE_DISK_BYTES     disk budget for the host (default 1 GiB)
+    CACHE_DB             SQLite path (default data/cache.sqlite, "off" disables)
+    CACHE_POLICY         tinylfu (default) or lru
+"""
+
+import os
+import sys
+import time
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+# --- CONFIGURATION ---
+MEMORY_BYTES = int(os.environ.get("CACHE_MEMORY_BYTES", 256 * 1024 * 1024))
+DISK_BYTES = int(os.environ.get("CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+CACHE_DB = os.environ.get(
+    "CACHE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cache.sqlite"),
+)
+POLICY = os.environ.get("CACHE_POLICY", "tinylfu")
+SKETCH_WIDTH = 1 << 14      # counters per sketch row
+SKETCH_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+SKETCH_MAX = 15             # counters saturate here (4-bit, as in TinyLFU)
+ENTRY_OVERHEAD = 200        # bookkeeping per memory entry (bytes, rough)
+DISK_LOW_WATER = 0.9        # a disk trim frees down to this share of the quota
+EVICT_BATCH = 64            # rows read per eviction step
+EXPIRE_EVERY = 100          # disk writes per namespace between sweeps of expired rows
+
+Entry = namedtuple("Entry", "value stored_at fresh")
+
+
+def sizeof(value, depth=0):
+    """Approximate bytes held by a value (arrays by nbytes, containers recursively)"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return sys.getsizeof(value)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes + 64
+    if depth > 6:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k, depth + 1) + sizeof(v, depth + 1)
+                                          for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)) or hasattr(value, "popleft"):
+        return sys.getsizeof(value) + sum(sizeof(v, depth + 1) for v in value)
+    fields = getattr(value, "__dict__", None)
+    if fields is None and hasattr(value, "__slots__"):
+        fields = {k: getattr(value, k, None) for k in value.__slots__}
+    if fields is not None:
+        return sys.getsizeof(value) + sizeof(fields, depth + 1)
+    return sys.getsizeof(value)
+
+
+class FrequencySketch:
+    """Count-min sketch of recent lookups; counts halve every 10 x width additions"""
+
+    def __init__(self, width=SKETCH_WIDTH):
+        self.table = np.zeros((len(SKETCH_SEEDS), width), dtype=np.uint8)
+        self.mask = width - 1
+        self.sample = 10 * width
+        self.additions = 0
+
+    def _slots(self, item):
+        h = hash(item) & 0xFFFFFFFFFFFFFFFF
+        return [((h * seed) & 0xFFFFFFFFFFFFFFFF) >> 40 & self.mask for seed in SKETCH_SEEDS]
+
+    def increment(self, item):
+        for row, col in enumerate(self._slots(item)):
+            if self.table[row, col] < SKETCH_MAX:
+                self.table[row, col] += 1
+        self.additions += 1
+        if self.additions >= self.sample:
+            self.table >>= 1
+            self.additions //= 2
+
+    def frequency(self, item):
+        return min(int(self.table[row, col]) for row, col in enumerate(self._slots(item)))
+
+
+class Namespace:
+    """Limits and counters for one kind of cached value"""
+
+    def __init__(self, name, ttl=None, keep=None, quota=None, disk=False, disk_quota=None):
+        self.name = name
+        self.ttl = ttl              # seconds an entry is fresh (None: until evicted)
+        self.keep = keep if keep is not None else ttl   # seconds it is retained at all
+        self.quota = quota          # memory bytes (None: only the global budget)
+        self.disk = disk
+        self.disk_quota = disk_quota
+        self.entries = OrderedDict()    # key -> [value, stored_at, size, last_use]
+        self.bytes = 0
+        self.disk_writes = 0
+        self.counters = dict.fromkeys(
+            ("hits", "disk_hits", "misses", "expired", "sets", "evictions", "rejected",
+             "disk_evictions"), 0)
+
+    def stats(self):
+        lookups = self.counters["hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hits = self.counters["hits"] + self.counters["disk_hits"]
+        return dict(self.counters, entries=len(self.entries), bytes=self.bytes, quota=self.quota,
+                    ttl=self.ttl, disk=self.disk,
+                    hit_rate=round(hits / lookups, 4) if lookups else None)
+
+
+class Cache:
+    """Namespaced two-tier cache; see the module docstring"""
+
+    def __init__(self, memory_bytes=MEMORY_BYTES, disk_path=CACHE_DB, disk_bytes=DISK_BYTES,
+                 policy=POLICY):
+        self.memory_bytes = memory_bytes
+        self.disk_path = None if disk_path in ("", "off") else disk_path
+        self.disk_bytes = disk_bytes
+        self.policy = policy
+        self.namespaces = {}
+        self.sketch = FrequencySketch()
+        self.bytes = 0
+        self.clock = 0
+        self.lock = threading.RLock()
+        self._local = threading.local()
+
+    def namespace(self, name, ttl=None, keep=None, quota=None, disk=False, disk_quota=None):
+        """Declare (or re-configure) a namespace before use"""
+        with self.lock:
+            ns = self.namespaces.get(name)
+            if ns is None:
+                ns = self.namespaces[name] = Namespace(name, ttl, keep, quota, disk, disk_quota)
+            else:
+                ns.ttl, ns.keep = ttl, keep if keep is not None else ttl
+                ns.quota, ns.disk, ns.disk_quota = quota, disk, disk_quota
+            return ns
+
+    def _ns(self, name):
+        ns = self.namespaces.get(name)
+        return ns if ns is not None else self.namespace(name)
+
+    # --- LOOKUPS ---
+    def lookup(self, name, key, ttl=False):
+        """Entry(value, stored_at, fresh) or None.
+
+        Expired entries still inside the namespace's retention come back with
+        fresh=False (for stale-on-error fallbacks). ttl overrides the
+        namespace's for this lookup (None: never stale).
+        """
+        now = time.time()
+        with self.lock:
+            ns = self._ns(name)
+            ttl = ns.ttl if ttl is False else ttl
+            self.sketch.increment((name, key))
+            item = ns.entries.get(key)
+            if item is not None and ns.keep is not None and now - item[1] >= ns.keep:
+                self._drop(ns, key)
+                item = None
+            if item is not None:
+                self.clock += 1
+                item[3] = self.clock
+                ns.entries.move_to_end(key)
+                fresh = ttl is None or now - item[1] < ttl
+                ns.counters["hits" if fresh else "expired"] += 1
+                return Entry(item[0], item[1], fresh)
+
+        found = self._disk_get(ns, key, now) if ns.disk else None
+        with self.lock:
+            if found is None:
+                ns.counters["misses"] += 1
+                return None
+            value, stored_at = found
+            fresh = ttl is None or now - stored_at < ttl
+            ns.counters["disk_hits" if fresh else "expired"] += 1
+            self._admit(ns, key, value, stored_at)
+            return Entry(value, stored_at, fresh)
+
+    def get(self, name, key, default=None, ttl=False):
+        """The fresh value, or default"""
+        entry = self.lookup(name, key, ttl)
+        return entry.value if entry is not None and entry.fresh else default
+
+    def set(self, name, key, value, stored_at=None, size=None):
+        """Store in memory (subject to admission) and, if the namespace has one, on disk"""
+        stored_at = time.time() if stored_at is None else stored_at
+        with self.lock:
+            ns = self._ns(name)
+            ns.counters["sets"] += 1
+            self._admit(ns, key, value, stored_at, size)
+        if ns.disk:
+            self._disk_set(ns, key, value, stored_at)
+
+    def delete(self, name, key):
+        with self.lock:
+            ns = self._ns(name)
+            if key in ns.entries:
+                self._drop(ns, key)
+        if ns.disk and self.disk_path:
+            try:
+                self._conn().execute("DELETE FROM entries WHERE ns = ? AND key = ?", (name, key))
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️ Cache delete failed ({name}): {str(e)[:60]}")
+
+    def clear(self, name=None, disk=False):
+        """Forget a namespace (or everything) in memory, and on disk too if asked"""
+        with self.lock:
+            for ns in ([self._ns(name)] if name else list(self.namespaces.values())):
+                self.bytes -= ns.bytes
+                ns.entries.clear()
+                ns.bytes = 0
+        if disk and self.disk_path:
+            try:
+                if name:
+                    self._conn().execute("DELETE FROM entries WHERE ns = ?", (name,))
+                else:
+                    self._conn().execute("DELETE FROM entries")
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️ Cache clear failed ({name or 'all'}): {str(e)[:60]}")
+
+    # --- MEMORY TIER ---
+    def _drop(self, ns, key):
+        item = ns.entries.pop(key)
+        ns.bytes -= item[2]
+        self.bytes -= item[2]
+
+    def _oldest(self, exclude):
+        """(namespace, key) used longest ago across all namespaces"""
+        best = None
+        for ns in self.namespaces.values():
+            for key, item in ns.entries.items():
+                if (ns.name, key) in exclude:
+                    continue
+                if best is None or item[3] < best[2]:
+                    best = (ns, key, item[3])
+                break
+        return best
+
+    def _victims(self, ns, key, size):
+        """Entries that must go to fit `size` more bytes, LRU first"""
+        victims = []
+        chosen = set()
+        freed_ns = freed_all = 0
+        if ns.quota is not None:
+            for other in ns.entries:
+                if ns.bytes - freed_ns + size <= ns.quota:
+                    break
+                if other != key:
+                    victims.append((ns, other))
+                    chosen.add((ns.name, other))
+                    freed_ns += ns.entries[other][2]
+            freed_all = freed_ns
+        while self.bytes - freed_all + size > self.memory_bytes:
+            oldest = self._oldest(chosen | {(ns.name, key)})
+            if oldest is None:
+                break
+            victim_ns, victim_key, _ = oldest
+            victims.append((victim_ns, victim_key))
+            chosen.add((victim_ns.name, victim_key))
+            freed_all += victim_ns.entries[victim_key][2]
+        return victims
+
+    def _admit(self, ns, key, value, stored_at, size=None):
+        size = (sizeof(value) if size is None else size) + ENTRY_OVERHEAD
+        if size > self.memory_bytes or (ns.quota is not None and size > ns.quota):
+            ns.counters["rejected"] += 1
+            return False
+        resident = key in ns.entries
+        victims = self._victims(ns, key, size - (ns.entries[key][2] if resident else 0))
+        if victims and not resident and self.policy == "tinylfu":
+            wanted = self.sketch.frequency((ns.name, key))
+            if any(self.sketch.frequency((v.name, k)) >= wanted for v, k in victims):
+                ns.counters["rejected"] += 1
+                return False
+        for victim_ns, victim_key in victims:
+            self._drop(victim_ns, victim_key)
+            victim_ns.counters["evictions"] += 1
+        if resident:
+            self._drop(ns, key)
+        self.clock += 1
+        ns.entries[key] = [value, stored_at, size, self.clock]
+        ns.bytes += size
+        self.bytes += size
+        return True
+
+    # --- DISK TIER ---
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.disk_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.disk_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " ns TEXT, key TEXT, stored_at REAL, used REAL, size INTEGER, value BLOB,"
+                " PRIMARY KEY (ns, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (ns, used, size)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (used, size)")
+            self._create_usage(conn)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _create_usage(conn):
+        """usage(ns, bytes): running totals of entries.size, maintained by triggers"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'usage'").fetchone() is None:
+                conn.execute("CREATE TABLE usage (ns TEXT PRIMARY KEY, bytes INTEGER)")
+                conn.execute("INSERT INTO usage SELECT ns, SUM(size) FROM entries GROUP BY ns")
+                conn.execute(
+                    "CREATE TRIGGER entries_added AFTER INSERT ON entries BEGIN"
+                    " INSERT INTO usage VALUES (new.ns, new.size)"
+                    " ON CONFLICT (ns) DO UPDATE SET bytes = bytes + new.size; END")
+                conn.execute(
+                    "CREATE TRIGGER entries_resized AFTER UPDATE OF size ON entries BEGIN"
+                    " UPDATE usage SET bytes = bytes - old.size + new.size WHERE ns = new.ns; END")
+                conn.execute(
+                    "CREATE TRIGGER entries_removed AFTER DELETE ON entries BEGIN"
+                    " UPDATE usage SET bytes = bytes - old.size WHERE ns = old.ns; END")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _disk_get(self, ns, key, now):
+        if not self.disk_path:
+            return None
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT value, stored_at FROM entries WHERE ns = ? AND key = ?",
+                               (ns.name, key)).fetchone()
+            if row is None:
+                return None
+            if ns.keep is not None and now - row[1] >= ns.keep:
+                conn.execute("DELETE FROM entries WHERE ns = ? AND key = ?", (ns.name, key))
+                return None
+            conn.execute("UPDATE entries SET used = ? WHERE ns = ? AND key = ?",
+                         (now, ns.name, key))
+            return pickle.loads(row[0]), row[1]
+        except (sqlite3.Error, OSError, pickle.UnpicklingError, AttributeError, EOFError) as e:
+            print(f"⚠️ Cache read failed ({ns.name}): {str(e)[:60]}")
+            return None
+
+    def _disk_set(self, ns, key, value, stored_at):
+        if not self.disk_path:
+            return
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        try:
+            conn = self._conn()
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete
+            # doesn't fire the usage triggers
+            conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)"
+                         " ON CONFLICT (ns, key) DO UPDATE SET stored_at = excluded.stored_at,"
+                         " used = excluded.used, size = excluded.size, value = excluded.value",
+                         (ns.name, key, stored_at, time.time(), len(blob), blob))
+            evicted = self._trim(conn, ns)
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Cache write failed ({ns.name}): {str(e)[:60]}")
+            return
+        if evicted:
+            with self.lock:
+                ns.counters["disk_evictions"] += evicted
+
+    def _trim(self, conn, ns):
+        """Sweep expired rows now and then; evict only when a quota is exceeded"""
+        evicted = 0
+        ns.disk_writes += 1
+        if ns.keep is not None and ns.disk_writes % EXPIRE_EVERY == 1:
+            evicted += conn.execute("DELETE FROM entries WHERE ns = ? AND stored_at < ?",
+                                    (ns.name, time.time() - ns.keep)).rowcount
+        if ns.disk_quota is not None:
+            row = conn.execute("SELECT bytes FROM usage WHERE ns = ?", (ns.name,)).fetchone()
+            if row is not None and row[0] > ns.disk_quota:
+                evicted += self._evict(conn, "WHERE ns = ?", (ns.name,),
+                                       row[0] - int(ns.disk_quota * DISK_LOW_WATER))
+        total = conn.execute("SELECT SUM(bytes) FROM usage").fetchone()[0] or 0
+        if total > self.disk_bytes:
+            evicted += self._evict(conn, "", (), total - int(self.disk_bytes * DISK_LOW_WATER))
+        return evicted
+
+    @staticmethod
+    def _evict(conn, where, params, excess):
+        """Delete least recently used rows until `excess` bytes are freed"""
+        evicted = 0
+        while excess > 0:
+            rows = conn.execute(f"SELECT rowid, size FROM entries {where} ORDER BY used LIMIT ?",
+                                params + (EVICT_BATCH,)).fetchall()
+            if not rows:
+                break
+            victims = []
+            for rowid, size in rows:
+                victims.append((rowid,))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM entries WHERE rowid = ?", victims)
+            evicted += len(victims)
+        return evicted
+
+    # --- STATS ---
+    def stats(self):
+        """Per-namespace and total counters, memory bytes and disk bytes"""
+        with self.lock:
+            namespaces = {name: ns.stats() for name, ns in self.namespaces.items()}
+        disk = {}
+        if self.disk_path and os.path.exists(self.disk_path):
+            try:
+                for name, count, size in self._conn().execute(
+                        "SELECT ns, COUNT(*), SUM(size) FROM entries GROUP BY ns"):
+                    disk[name] = {"entries": count, "bytes": size}
+            except (sqlite3.Error, OSError):
+                pass
+        for name, ns_stats in namespaces.items():
+            ns_stats["disk_entries"] = disk.get(name, {}).get("entries", 0)
+            ns_stats["disk_bytes"] = disk.get(name, {}).get("bytes", 0)
+
+        totals = {k: sum(s[k] for s in namespaces.values())
+                  for k in ("hits", "disk_hits", "misses", "expired", "evictions", "rejected",
+                            "disk_evictions", "entries")}
+        lookups = totals["hits"] + totals["disk_hits"] + totals["misses"]
+        totals["hit_rate"] = (round((totals["hits"] + totals["disk_hits"]) / lookups, 4)
+                              if lookups else None)
+        return {
+            "policy": self.policy,
+            "memory": {"bytes": self.bytes, "budget": self.memory_bytes},
+            "disk": {"path": self.disk_path, "bytes": sum(d["bytes"] for d in disk.values()),
+                     "budget": self.disk_bytes},
+            "totals": totals,
+            "namespaces": namespaces,
+        }
+
+
+cache = Cache()
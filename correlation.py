@@ -0,0 +1,298 @@
+"""
+Cross-Symbol Correlation
+Rolling-window correlation, beta and volatility for many symbols at once,
+from the aligned matrix of log returns (one row per bar date, one column per
+symbol, NaN where a symbol has no bar). Pairs are compared over the dates both
+traded.
+
+The window keeps running sums (pairwise counts, sums, sums of squares and
+cross products, all N x N), so a new bar is one rank-1 update in and one out
+instead of a pass over the whole window. A matrix stays in memory between
+requests (the "correlation" cache namespace, see cache.py) and only reads the
+bars that landed since its last refresh. The newest bar can still change
+during the session, so like the forecasters (forecast.py) it is applied on top
+of the settled sums, never added to them.
+"""
+
+import html
+import time
+import threading
+import datetime as dt
+from collections import deque
+
+import numpy as np
+import plotly.graph_objects as go
+
+import price_store
+from cache import cache
+
+# --- CONFIGURATION ---
+DEFAULT_WINDOW = 60         # bars
+MIN_WINDOW = 10
+MAX_WINDOW = 750
+MAX_SYMBOLS = 500
+BENCHMARK = "^NSEI"         # Nifty 50, for beta
+MIN_OVERLAP = 10            # pairs sharing fewer returns report null
+REFRESH_SECONDS = 60        # re-read the store at most this often per matrix
+MATRIX_BYTES = 128 * 1024 * 1024    # memory for live matrices per process (LRU/TinyLFU beyond)
+REBUILD_EVERY = 2000        # bars between exact re-sums (undoes float drift)
+INTERVALS = ("1d", "1wk", "1mo")
+DAYS_PER_BAR = {"1d": 2, "1wk": 8, "1mo": 32}     # generous, for the first read
+
+
+class RollingCovariance:
+    """Pairwise-complete sums over the last `window` return rows"""
+
+    def __init__(self, n, window):
+        self.window = window
+        self.rows = deque()
+        self.pushed = 0
+        shape = (n, n)
+        self.count = np.zeros(shape)    # rows where both i and j have a return
+        self.sx = np.zeros(shape)       # sum of x_i over those rows
+        self.sxx = np.zeros(shape)      # sum of x_i^2 over those rows
+        self.sxy = np.zeros(shape)      # sum of x_i * x_j
+
+    @staticmethod
+    def _terms(row):
+        valid = ~np.isnan(row)
+        x = np.where(valid, row, 0.0)
+        m = valid.astype(np.float64)
+        return np.outer(m, m), np.outer(x, m), np.outer(x * x, m), np.outer(x, x)
+
+    def _totals(self):
+        return (self.count, self.sx, self.sxx, self.sxy)
+
+    def _add(self, row, sign):
+        for total, term in zip(self._totals(), self._terms(row)):
+            if sign > 0:
+                total += term
+            else:
+                total -= term
+
+    def push(self, row):
+        self.rows.append(row)
+        self._add(row, 1)
+        if len(self.rows) > self.window:
+            self._add(self.rows.popleft(), -1)
+        self.pushed += 1
+        if self.pushed % REBUILD_EVERY == 0:
+            for total in self._totals():
+                total[:] = 0
+            for kept in self.rows:
+                self._add(kept, 1)
+
+    def sums(self, provisional=None):
+        """(count, sx, sxx, sxy), with one more row on top that is not kept"""
+        if provisional is None:
+            return self._totals()
+        totals = [total + term for total, term in zip(self._totals(), self._terms(provisional))]
+        if len(self.rows) >= self.window:
+            for total, term in zip(totals, self._terms(self.rows[0])):
+                total -= term
+        return totals
+
+    def statistics(self, provisional=None, benchmark=None):
+        """(correlation matrix, per-column volatility, beta against column `benchmark`)"""
+        count, sx, sxx, sxy = self.sums(provisional)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = count * sxy - sx * sx.T
+            var = count * sxx - sx * sx         # x_i over rows where x_j exists too
+            corr = np.clip(cov / np.sqrt(var * var.T), -1.0, 1.0)
+            corr[count < MIN_OVERLAP] = np.nan
+
+            own = np.diag(count)
+            vol = np.sqrt(np.diag(var) / (own * (own - 1)))
+            vol[own < MIN_OVERLAP] = np.nan
+
+            beta = None
+            if benchmark is not None:
+                b = benchmark
+                beta = cov[:, b] / var[b, :]
+                beta[count[:, b] < MIN_OVERLAP] = np.nan
+        return corr, vol, beta
+
+
+def returns_matrix(closes, last_close):
+    """Log returns of a (dates x symbols) close matrix with NaN gaps.
+
+    Each return is against the symbol's previous known close (last_close for
+    the first row), so a missing bar does not break the chain.
+    """
+    stacked = np.vstack([last_close, closes])
+    rows = np.arange(len(stacked))[:, None]
+    latest = np.maximum.accumulate(np.where(np.isnan(stacked), 0, rows), axis=0)
+    previous = stacked[latest, np.arange(stacked.shape[1])]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.log(stacked[1:] / previous[:-1])
+
+
+def cluster_order(corr):
+    """Column order that puts co-moving symbols next to each other (leading eigenvector)"""
+    filled = np.nan_to_num(corr)
+    _, vectors = np.linalg.eigh(filled)
+    return np.argsort(vectors[:, -1])
+
+
+class CorrelationMatrix:
+    """Rolling statistics for one symbol list, kept current bar by bar"""
+
+    def __init__(self, symbols, interval, window, benchmark):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.window = window
+        self.benchmark = benchmark
+        self.columns = self.symbols + ([benchmark] if benchmark and benchmark not in symbols else [])
+        self.rolling = RollingCovariance(len(self.columns), window)
+        self.dates = deque(maxlen=window)
+        self.settled_t = None
+        self.last_close = np.full(len(self.columns), np.nan)
+        self.provisional = None
+        self.provisional_t = None
+        self.refreshed = 0.0
+        self.lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Sync the store, then push the bars that landed since the last refresh"""
+        if not force and time.time() - self.refreshed < REFRESH_SECONDS:
+            return
+        from pipeline import fetch_history_batch
+        from export import EXPORT_BATCH
+
+        today = dt.date.today()
+        if self.settled_t is None:
+            start = today - dt.timedelta(days=DAYS_PER_BAR[self.interval] * (self.window + 1))
+        else:
+            start = price_store.from_epoch_day(self.settled_t)
+        for i in range(0, len(self.columns), EXPORT_BATCH):
+            try:
+                price_store.store.ensure_many(self.columns[i:i + EXPORT_BATCH], start, today,
+                                              fetch_history_batch)
+            except Exception as e:
+                print(f"⚠️ History sync failed: {str(e)[:60]}")
+
+        t, bars = price_store.store.panel(self.columns, self.interval, start, today)
+        closes = bars["close"]
+        if self.settled_t is not None:
+            closes = closes[t > self.settled_t]
+            t = t[t > self.settled_t]
+        self.refreshed = time.time()
+        if len(t) == 0:
+            return
+
+        returns = returns_matrix(closes, self.last_close)
+
+        # Everything but the newest date is settled
+        for k in range(len(t) - 1):
+            self.rolling.push(returns[k])
+            self.dates.append(int(t[k]))
+        if len(t) > 1:
+            settled = closes[:-1]
+            seen = ~np.isnan(settled)
+            has = seen.any(axis=0)
+            last_row = len(settled) - 1 - np.argmax(seen[::-1], axis=0)
+            self.last_close[has] = settled[last_row[has], np.flatnonzero(has)]
+            self.settled_t = int(t[-2])
+        self.provisional = returns[-1]
+        self.provisional_t = int(t[-1])
+
+    def snapshot(self):
+        """JSON-ready correlation, beta and volatility (symbols without data left out)"""
+        b = self.columns.index(self.benchmark) if self.benchmark else None
+        corr, vol, beta = self.rolling.statistics(self.provisional, b)
+
+        dates = list(self.dates) + ([self.provisional_t] if self.provisional_t is not None else [])
+        dates = dates[-self.window:]
+        n = len(self.symbols)
+        present = [i for i in range(n) if not np.isnan(vol[i])]
+
+        def value(x, digits=4):
+            return None if np.isnan(x) else round(float(x), digits)
+
+        return {
+            "symbols": [self.symbols[i] for i in present],
+            "missing": [self.symbols[i] for i in range(n) if np.isnan(vol[i])],
+            "interval": self.interval,
+            "window": self.window,
+            "bars": len(dates),
+            "from": price_store.from_epoch_day(dates[0]).isoformat() if dates else None,
+            "to": price_store.from_epoch_day(dates[-1]).isoformat() if dates else None,
+            "benchmark": self.benchmark or None,
+            "correlation": [[value(corr[i, j]) for j in present] for i in present],
+            "volatility": [value(vol[i], 6) for i in present],
+            "beta": None if beta is None else [value(beta[i]) for i in present],
+        }
+
+
+cache.namespace("correlation", quota=MATRIX_BYTES)
+_lock = threading.Lock()
+
+
+def correlation(symbols, interval="1d", window=DEFAULT_WINDOW, benchmark=BENCHMARK):
+    """Current rolling statistics for a symbol list; raises ValueError on bad arguments"""
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {list(INTERVALS)}")
+    if not MIN_WINDOW <= window <= MAX_WINDOW:
+        raise ValueError(f"window must be between {MIN_WINDOW} and {MAX_WINDOW} bars")
+    if not 2 <= len(symbols) <= MAX_SYMBOLS:
+        raise ValueError(f"pass between 2 and {MAX_SYMBOLS} symbols")
+
+    key = repr((tuple(symbols), interval, window, benchmark))
+    with _lock:
+        matrix = cache.get("correlation", key)
+        if matrix is None:
+            matrix = CorrelationMatrix(symbols, interval, window, benchmark)
+            cache.set("correlation", key, matrix)
+    with matrix.lock:
+        matrix.refresh()
+        snapshot = matrix.snapshot()
+    # Stored again so the cache counts the bytes of the window as it fills
+    cache.set("correlation", key, matrix)
+    return snapshot
+
+
+def heatmap_html(snapshot):
+    """Plotly heatmap page, co-moving symbols grouped together"""
+    import assets
+
+    names = snapshot["symbols"]
+    corr = np.array(snapshot["correlation"], dtype=np.float64).reshape(len(names), len(names))
+    order = cluster_order(corr) if len(names) > 1 else np.arange(len(names))
+    labels = [names[i] for i in order]
+
+    hover = "%{y} / %{x}: %{z:.2f}<extra></extra>"
+    fig = go.Figure(go.Heatmap(z=corr[np.ix_(order, order)], x=labels, y=labels,
+                               zmin=-1, zmax=1, colorscale="RdBu", reversescale=True,
+                               hovertemplate=hover))
+    size = min(1400, max(500, 22 * len(labels) + 200))
+    fig.update_layout(
+        title=(f"<b>Return correlation</b> ({snapshot['window']} × {snapshot['interval']} bars, "
+               f"{snapshot['from']} → {snapshot['to']})"),
+        template='plotly_dark', height=size, width=size,
+        yaxis=dict(autorange="reversed"),
+    )
+
+    rows = []
+    if snapshot["beta"] is not None:
+        for i in order:
+            beta = snapshot["beta"][i]
+            vol = snapshot["volatility"][i]
+            # Symbols come from the request
+            rows.append(f"<tr><td>{html.escape(names[i])}</td>"
+                        f"<td>{'-' if beta is None else f'{beta:.2f}'}</td>"
+                        f"<td>{'-' if vol is None else f'{vol * 100:.2f}%'}</td></tr>")
+    table = ""
+    if rows:
+        benchmark = html.escape(snapshot['benchmark'])
+        table = (f"<div class=\"box\" style=\"width: 400px;\"><h2>β vs {benchmark}</h2>"
+                 f"<table style=\"margin: auto;\"><tr><th>Stock</th><th>Beta</th><th>Vol / bar</th></tr>"
+                 f"{''.join(rows)}</table></div>")
+    if snapshot["missing"]:
+        missing = ", ".join(html.escape(s) for s in snapshot["missing"])
+        table += f"<p class=\"error-msg\">No data: {missing}</p>"
+
+    page = fig.to_html(include_plotlyjs=False, full_html=True)
+    page = page.replace("</head>", assets.head_tags() + "</head>", 1)
+    header = "<h1>🔗 Stock Correlation</h1><p><a href=\"/\" style=\"color: #00ccff;\">← Dashboard</a></p>"
+    page = page.replace("<body>", "<body>" + header, 1)
+    return page.replace("</body>", table + "</body>", 1)
@@ -0,0 +1,193 @@
+"""
+Bulk Export
+Streams OHLCV, SMA 20 / RSI 14 and next-bar predictions for many symbols as
+CSV, NDJSON or Arrow IPC. Symbols are handled EXPORT_BATCH at a time: the
+batch is synced into the local price store with one batched upstream request,
+then each symbol is read back, encoded and sent before the next one is
+loaded, so memory stays flat however many symbols or years are requested.
+
+Predictions are the backtester's walk-forward version of the dashboard
+formula (trend over the trailing year of bars, see TREND_WINDOWS, RSI
+adjustment, range band) with neutral news, since past headlines are not
+available. Indicators and predictions are computed over warm-up bars read
+from before the requested start, then trimmed off; bars without enough
+history are left empty rather than back-filled.
+"""
+
+import io
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+import backtest
+import price_store
+from ohlcv import plot_values
+from pipeline import fetch_history_batch
+
+# --- CONFIGURATION ---
+EXPORT_BATCH = 50           # symbols per upstream request / store sync
+MAX_EXPORT_SYMBOLS = 1000
+SMA_WINDOW = 20
+# Trend fit window per bar size: a year of bars, like the dashboard's default period
+TREND_WINDOWS = {"1d": backtest.TREND_WINDOW, "1wk": 52, "1mo": 12}
+CALENDAR_DAYS_PER_BAR = {"1d": 1.5, "1wk": 7, "1mo": 31}   # generous, covers holidays
+
+COLUMNS = ["symbol", "date", "open", "high", "low", "close", "volume",
+           "sma20", "rsi", "pred_close", "pred_high", "pred_low"]
+
+# format -> (mimetype, file extension)
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+def next_bar_dates(dates, interval):
+    """Date each bar's prediction is for (next trading day / week / month)"""
+    if interval == "1wk":
+        return dates + np.timedelta64(7, 'D')
+    if interval == "1mo":
+        return (dates.astype('datetime64[M]') + 1).astype('datetime64[D]')
+    return backtest.next_trading_day(dates)
+
+
+def warmup_bars(interval):
+    """Look-back read before the first exported bar"""
+    return max(TREND_WINDOWS[interval], SMA_WINDOW, backtest.RSI_WINDOW + 1)
+
+
+def warmup_start(start, interval):
+    """Earlier start date whose bars give the first exported bar its full look-back"""
+    if start is None:
+        return None
+    return start - dt.timedelta(days=int(warmup_bars(interval) * CALENDAR_DAYS_PER_BAR[interval]))
+
+
+def symbol_frame(series, start=None):
+    """One symbol's bars, indicators and next-bar predictions, from `start` on.
+
+    series should begin warmup_bars() before start; SMA 20, RSI and the
+    predictions are NaN where the bars before a row do not fill their window.
+    """
+    dates = series.dates()
+    close = series.close.astype(np.float64)[:, None]
+    panel = {
+        'dates': dates,
+        'close': close,
+        'high': series.high.astype(np.float64)[:, None],
+        'low': series.low.astype(np.float64)[:, None],
+    }
+    preds = backtest.predict_panel(panel, window=TREND_WINDOWS[series.interval],
+                                   target_dates=next_bar_dates(dates, series.interval))
+    sma20 = backtest._rolling_sum(close, SMA_WINDOW)[:, 0] / SMA_WINDOW
+
+    rows = slice(None)
+    if start is not None:
+        # Same first bar as price_store.range(start=...): the week/month containing start
+        first_t = price_store.period_start(price_store.to_epoch_day(start), series.interval)
+        rows = slice(int(np.searchsorted(series.t, first_t)), None)
+
+    return pd.DataFrame({
+        "symbol": series.symbol,
+        "date": dates[rows],
+        "open": plot_values(series.open[rows]),
+        "high": plot_values(series.high[rows]),
+        "low": plot_values(series.low[rows]),
+        "close": plot_values(series.close[rows]),
+        "volume": series.volume[rows],
+        "sma20": plot_values(sma20[rows]),
+        "rsi": plot_values(preds['rsi'][rows, 0], 2),
+        "pred_close": np.round(preds['predicted_close'][rows, 0], 4),
+        "pred_high": np.round(preds['predicted_high'][rows, 0], 4),
+        "pred_low": np.round(preds['predicted_low'][rows, 0], 4),
+    }, columns=COLUMNS)
+
+
+# --- ENCODERS ---
+class CsvEncoder:
+    def __init__(self):
+        self.header = True
+
+    def encode(self, frame):
+        frame = frame.assign(date=np.datetime_as_string(frame["date"].to_numpy(), unit='D'))
+        chunk = frame.to_csv(index=False, header=self.header)
+        self.header = False
+        return chunk.encode()
+
+    def finish(self):
+        return b""
+
+
+class NdjsonEncoder:
+    def encode(self, frame):
+        frame = frame.assign(date=np.datetime_as_string(frame["date"].to_numpy(), unit='D'))
+        text = frame.to_json(orient="records", lines=True)
+        return (text if text.endswith("\n") else text + "\n").encode()
+
+    def finish(self):
+        return b""
+
+
+class ArrowEncoder:
+    """Arrow IPC stream: one schema message, then a record batch per symbol"""
+
+    def __init__(self):
+        self.schema = pa.schema([
+            ("symbol", pa.string()), ("date", pa.date32()),
+            ("open", pa.float64()), ("high", pa.float64()), ("low", pa.float64()),
+            ("close", pa.float64()), ("volume", pa.int64()),
+            ("sma20", pa.float64()), ("rsi", pa.float64()),
+            ("pred_close", pa.float64()), ("pred_high", pa.float64()), ("pred_low", pa.float64()),
+        ])
+        self.sink = io.BytesIO()
+        self.writer = pa.ipc.new_stream(self.sink, self.schema)
+
+    def _drain(self):
+        chunk = self.sink.getvalue()
+        self.sink.seek(0)
+        self.sink.truncate()
+        return chunk
+
+    def encode(self, frame):
+        frame = frame.assign(date=frame["date"].to_numpy().astype('datetime64[D]'))
+        self.writer.write_batch(pa.RecordBatch.from_pandas(frame, schema=self.schema,
+                                                           preserve_index=False))
+        return self._drain()
+
+    def finish(self):
+        self.writer.close()
+        return self._drain()
+
+
+ENCODERS = {"csv": CsvEncoder, "ndjson": NdjsonEncoder, "arrow": ArrowEncoder}
+
+
+def format_available(fmt):
+    return fmt in ENCODERS and (fmt != "arrow" or pa is not None)
+
+
+def stream(symbols, fmt="csv", interval="1d", start=None, end=None):
+    """Generator of encoded chunks, one per symbol (plus the format's header/footer)"""
+    encoder = ENCODERS[fmt]()
+    read_from = warmup_start(start, interval)
+    for i in range(0, len(symbols), EXPORT_BATCH):
+        batch = symbols[i:i + EXPORT_BATCH]
+        try:
+            price_store.store.ensure_many(batch, read_from, end, fetch_history_batch)
+        except Exception as e:
+            print(f"⚠️ Export sync failed, using stored history: {str(e)[:60]}")
+
+        for symbol in batch:
+            series = price_store.store.range(symbol, interval, read_from, end)
+            frame = symbol_frame(series, start) if len(series) else None
+            if frame is None or frame.empty:
+                print(f"⚠️ No data for {symbol}, skipped in export")
+                continue
+            yield encoder.encode(frame)
+    yield encoder.finish()
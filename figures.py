@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Dashboard Figure Builder
+Writes the dashboard chart (price + SMA/trend/prediction, volume, RSI) as the
+plain Plotly JSON spec, straight from the OHLCV arrays.
+
+Building it through plotly.graph_objects validated and copied every array on
+each request (make_subplots, add_trace, add_hline...), which was most of the
+render time. The spec below is what that code produced, written out once: the
+layout is constant apart from a few strings, and the traces are the series'
+arrays as they are. Plotly's own serializer still writes the JSON, so the page
+is byte-for-byte the same (test_figures.py checks it against the old path).
+
+    python figures.py --bars 250        # old vs new build + serialize time
+"""
+
+import time
+import argparse
+import datetime as dt
+
+import numpy as np
+import plotly.io as pio
+
+from ohlcv import plot_values, volume_colors
+
+# --- CONFIGURATION ---
+TEMPLATE = "plotly_dark"
+HEIGHT = 900
+
+_template = None
+
+
+def template():
+    """The theme's layout.template, exactly as a Figure carries it (built once)"""
+    global _template
+    if _template is None:
+        import plotly.graph_objects as go
+        _template = go.Figure(layout={'template': TEMPLATE}).to_dict()['layout']['template']
+    return _template
+
+
+def x_values(series):
+    """Bar timestamps as the strings Plotly writes for them"""
+    return np.datetime_as_string(series.dates()).tolist()
+
+
+def subplot_title(text, y):
+    return {'font': {'size': 16}, 'showarrow': False, 'text': text, 'x': 0.5, 'xanchor': 'center',
+            'xref': 'paper', 'y': y, 'yanchor': 'bottom', 'yref': 'paper'}
+
+
+def rsi_line(y, color):
+    return {'line': {'color': color, 'dash': 'dash'}, 'type': 'line', 'x0': 0, 'x1': 1,
+            'xref': 'x3 domain', 'y0': y, 'y1': y, 'yref': 'y3'}
+
+
+def dashboard_title(symbol, close, sentiment, prediction):
+    last_close = close[-1]
+    change = last_close - close[-2]
+    pct_change = (change / close[-2]) * 100
+    color_change = "green" if change >= 0 else "red"
+    return (
+        f"<b>{symbol}</b>: ₹{last_close:.2f} "
+        f"<span style='color:{color_change}'>({change:+.2f} / {pct_change:+.2f}%)</span><br>"
+        f"<span style='font-size: 14px; color: gray'>Mood: {sentiment['avg']:.3f} | "
+        f"RSI: {prediction['current_rsi']:.1f}</span>"
+    )
+
+
+def dashboard_figure(symbol, series, prediction, sentiment):
+    """{'data': [...], 'layout': {...}} for the dashboard chart"""
+    tomorrow_date = prediction['tomorrow_date']
+    predicted_close = prediction['predicted_close']
+    x = x_values(series)
+    close = plot_values(series.close)
+
+    trend_x, trend_y = x, plot_values(prediction['trend'])
+    if series.unit != 'D':
+        # Intraday: a straight line only needs its endpoints, which keeps live updates small
+        trend_x, trend_y = [x[0], x[-1]], trend_y[[0, -1]]
+
+    data = [
+        {'close': close, 'high': plot_values(series.high), 'low': plot_values(series.low),
+         'name': 'OHLC', 'open': plot_values(series.open), 'x': x,
+         'type': 'candlestick', 'xaxis': 'x', 'yaxis': 'y'},
+        {'line': {'color': 'orange', 'dash': 'dot', 'width': 1}, 'mode': 'lines',
+         'name': 'Trend Line', 'x': trend_x, 'y': trend_y,
+         'type': 'scatter', 'xaxis': 'x', 'yaxis': 'y'},
+        {'line': {'color': 'yellow', 'width': 1}, 'mode': 'lines', 'name': 'SMA 20',
+         'x': x, 'y': plot_values(series.sma20), 'type': 'scatter', 'xaxis': 'x', 'yaxis': 'y'},
+        {'marker': {'color': 'cyan', 'size': 15, 'symbol': 'star'}, 'mode': 'markers+text',
+         'name': 'Prediction', 'text': [f"{predicted_close:.1f}"], 'textposition': 'top center',
+         'x': [tomorrow_date], 'y': [predicted_close], 'type': 'scatter', 'xaxis': 'x', 'yaxis': 'y'},
+        {'line': {'color': 'cyan', 'width': 4}, 'mode': 'lines', 'name': 'Pred Range',
+         'x': [tomorrow_date, tomorrow_date],
+         'y': [prediction['predicted_low'], prediction['predicted_high']],
+         'type': 'scatter', 'xaxis': 'x', 'yaxis': 'y'},
+        {'marker': {'color': volume_colors(series).tolist()}, 'name': 'Volume', 'x': x,
+         'y': series.volume, 'type': 'bar', 'xaxis': 'x2', 'yaxis': 'y2'},
+        {'line': {'color': '#ff00ff', 'width': 2}, 'name': 'RSI', 'x': x,
+         'y': plot_values(series.rsi, 2), 'type': 'scatter', 'xaxis': 'x3', 'yaxis': 'y3'},
+    ]
+
+    layout = {
+        'template': template(),
+        'xaxis': {'anchor': 'y', 'domain': [0.0, 1.0], 'matches': 'x3', 'showticklabels': False},
+        'yaxis': {'anchor': 'x', 'domain': [0.52, 1.0], 'title': {'text': 'Price (INR)'}},
+        'xaxis2': {'anchor': 'y2', 'domain': [0.0, 1.0], 'matches': 'x3', 'showticklabels': False},
+        'yaxis2': {'anchor': 'x2', 'domain': [0.26, 0.5]},
+        'xaxis3': {'anchor': 'y3', 'domain': [0.0, 1.0]},
+        'yaxis3': {'anchor': 'x3', 'domain': [0.0, 0.24]},
+        'annotations': [subplot_title(f"{symbol} Price Action", 1.0),
+                        subplot_title("Volume", 0.5),
+                        subplot_title("RSI (Momentum)", 0.24)],
+        'shapes': [rsi_line(70, 'red'), rsi_line(30, 'green'),
+                   {'fillcolor': 'gray', 'line': {'width': 0}, 'opacity': 0.1, 'type': 'rect',
+                    'x0': 0, 'x1': 1, 'xref': 'x3 domain', 'y0': 30, 'y1': 70, 'yref': 'y3'}],
+        'title': {'text': dashboard_title(symbol, close, sentiment, prediction)},
+        'height': HEIGHT,
+        'showlegend': False,
+        'hovermode': 'x unified',
+    }
+    return {'data': data, 'layout': layout}
+
+
+def figure_html(figure, div_id):
+    """HTML fragment for a figure spec; plotly.js is served separately, see assets.py"""
+    return pio.to_html(figure, include_plotlyjs=False, full_html=False, div_id=div_id,
+                       validate=False)
+
+
+# --- REFERENCE ---
+def plotly_figure_html(symbol, series, prediction, sentiment, div_id):
+    """The graph_objects version this module replaced; the tests compare against it"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    intraday = series.unit != 'D'
+    tomorrow_date = prediction['tomorrow_date']
+    predicted_close = prediction['predicted_close']
+    dates = series.dates()
+    close = plot_values(series.close)
+
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True,
+                        vertical_spacing=0.02, row_heights=[0.5, 0.25, 0.25],
+                        subplot_titles=(f"{symbol} Price Action", "Volume", "RSI (Momentum)"))
+    fig.add_trace(go.Candlestick(x=dates,
+                    open=plot_values(series.open), high=plot_values(series.high),
+                    low=plot_values(series.low), close=close,
+                    name='OHLC'), row=1, col=1)
+    trend_x, trend_y = dates, plot_values(prediction['trend'])
+    if intraday:
+        trend_x, trend_y = trend_x[[0, -1]], trend_y[[0, -1]]
+    fig.add_trace(go.Scatter(x=trend_x, y=trend_y,
+                             mode='lines', name='Trend Line',
+                             line=dict(color='orange', width=1, dash='dot')), row=1, col=1)
+    fig.add_trace(go.Scatter(x=dates, y=plot_values(series.sma20),
+                             mode='lines', name='SMA 20',
+                             line=dict(color='yellow', width=1)), row=1, col=1)
+    fig.add_trace(go.Scatter(x=[tomorrow_date], y=[predicted_close],
+                             mode='markers+text', name='Prediction',
+                             marker=dict(color='cyan', size=15, symbol='star'),
+                             text=[f"{predicted_close:.1f}"], textposition="top center"), row=1, col=1)
+    fig.add_trace(go.Scatter(x=[tomorrow_date, tomorrow_date],
+                             y=[prediction['predicted_low'], prediction['predicted_high']],
+                             mode='lines', name='Pred Range',
+                             line=dict(color='cyan', width=4)), row=1, col=1)
+    fig.add_trace(go.Bar(x=dates, y=series.volume, name='Volume',
+                         marker_color=volume_colors(series)), row=2, col=1)
+    fig.add_trace(go.Scatter(x=dates, y=plot_values(series.rsi, 2), name='RSI',
+                             line=dict(color='#ff00ff', width=2)), row=3, col=1)
+    fig.add_hline(y=70, line_dash="dash", line_color="red", row=3, col=1)
+    fig.add_hline(y=30, line_dash="dash", line_color="green", row=3, col=1)
+    fig.add_hrect(y0=30, y1=70, fillcolor="gray", opacity=0.1, line_width=0, row=3, col=1)
+    fig.update_layout(
+        title=dashboard_title(symbol, close, sentiment, prediction),
+        yaxis_title='Price (INR)',
+        template=TEMPLATE,
+        height=HEIGHT,
+        showlegend=False,
+        hovermode="x unified"
+    )
+    return fig.to_html(include_plotlyjs=False, full_html=False, div_id=div_id)
+
+
+# --- BENCHMARK ---
+def sample_inputs(bars, interval="1d", seed=0):
+    """Series, prediction and sentiment shaped like the pipeline's, from synthetic bars"""
+    from ohlcv import OHLCV, _synthetic_frame, linear_trend
+
+    intraday = not interval.endswith(('d', 'wk', 'mo'))
+    frame = _synthetic_frame(bars, seed)
+    if intraday:
+        frame['Date'] = dt.datetime(2026, 10, 16, 9, 15) + np.arange(bars) * dt.timedelta(minutes=5)
+    series = OHLCV.from_frame(frame, "BENCH.NS", interval).with_indicators()
+    x = series.ordinals()
+    slope, intercept = linear_trend(x, series.close)
+    last = series.datetime_at(-1)
+    close = float(series.close[-1])
+    prediction = {
+        'tomorrow_date': last + (dt.timedelta(minutes=5) if intraday else dt.timedelta(days=3)),
+        'trend': intercept + slope * x,
+        'current_rsi': float(series.rsi[-1]),
+        'predicted_close': close * 1.004,
+        'predicted_high': close * 1.02,
+        'predicted_low': close * 0.98,
+    }
+    sentiment = {'avg': 0.1234, 'headlines': []}
+    return series, prediction, sentiment
+
+
+def _timed(fn, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare graph_objects vs direct figure spec")
+    parser.add_argument('--bars', type=int, default=250, help="Bars in the chart (default: 250)")
+    parser.add_argument('--interval', default="1d", help="1d (default) or an intraday interval")
+    parser.add_argument('--repeat', type=int, default=50, help="Timed iterations")
+    args = parser.parse_args()
+
+    inputs = ("BENCH.NS",) + sample_inputs(args.bars, args.interval)
+    old = plotly_figure_html(*inputs, div_id="chart")
+    new = figure_html(dashboard_figure(*inputs), "chart")
+
+    old_ms = _timed(lambda: plotly_figure_html(*inputs, div_id="chart"), args.repeat)
+    new_ms = _timed(lambda: figure_html(dashboard_figure(*inputs), "chart"), args.repeat)
+
+    print("\n" + "=" * 60)
+    print(f"🎨 Chart build + serialize, CPU per request ({args.bars} bars, {args.interval})")
+    print(f"   graph_objects: {old_ms:8.2f} ms")
+    print(f"   direct spec:   {new_ms:8.2f} ms  ({old_ms / new_ms:.1f}x less)")
+    print(f"   output {len(new)} B, identical: {old == new}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Forecaster Engine
+Pluggable next-bar forecasters with fitted state persisted per symbol:
+
+    linear     least-squares trend on the bar dates (the original model)
+    ridge      ridge regression of the next return on lagged returns, RSI and
+               distance from SMA 20
+    holt       Holt's linear exponential smoothing (level + trend)
+
+Every forecaster keeps incremental state (sums, X'X / X'y, smoothed level),
+so new bars are absorbed without revisiting old ones, and bars that leave a
+rolling window are subtracted again. Fitted models are stored in SQLite, one
+per symbol, interval and forecaster, along with the bars they have seen. A
+request whose window continues the stored bars (same bars where they overlap)
+slides the model forward: bars before its start are forgotten and only the
+new ones are fed in. An unchanged window reuses the model as is. The newest
+bar can still change during the session, so it is never persisted, only
+applied to a throwaway copy.
+
+Train the whole universe ahead of the first requests, e.g. nightly from cron:
+
+    python forecast.py --nightly --workers 4
+"""
+
+import os
+import sys
+import copy
+import time
+import pickle
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ohlcv import sma, rsi
+import price_store
+
+# --- CONFIGURATION ---
+MODEL_STORE_DB = os.environ.get(
+    "MODEL_STORE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "models.sqlite"),
+)
+DEFAULT_FORECASTER = "linear"
+MODEL_RETENTION_DAYS = 7        # models nobody asked for since are pruned
+
+RIDGE_LAGS = 5
+RIDGE_ALPHA = 1.0
+RIDGE_WARMUP = 20               # bars before SMA 20 / RSI 14 are meaningful
+HOLT_ALPHA = 0.5
+HOLT_BETA = 0.1
+
+
+class Forecaster:
+    """Incrementally fitted next-bar model over a sliding window of bars;
+    subclasses implement _absorb, _forget and next_value"""
+
+    name = None
+
+    def __init__(self):
+        self.t = np.empty(0, dtype=np.int64)    # times of the bars in the window
+        self.close = np.empty(0)                # and their closes
+
+    @property
+    def n(self):
+        return len(self.t)
+
+    def continues(self, series):
+        """True if series starts within the window and agrees with it where they overlap"""
+        if self.n == 0 or len(series) == 0 or series.t[0] < self.t[0]:
+            return False
+        first = int(np.searchsorted(self.t, series.t[0]))
+        overlap = self.n - first
+        return (0 < overlap <= len(series)
+                and np.array_equal(self.t[first:], series.t[:overlap])
+                and np.array_equal(self.close[first:], series.close[:overlap]))
+
+    def update(self, series):
+        """Slide to series' window: forget older bars, absorb the ones after the last seen"""
+        drop = int(np.searchsorted(self.t, series.t[0])) if self.n else 0
+        if drop:
+            self._forget(drop, series)
+            self.t, self.close = self.t[drop:], self.close[drop:]
+        start = self.n
+        if len(series) > start:
+            self._absorb(series, start)
+            self.t = np.concatenate([self.t, series.t[start:]])
+            self.close = np.concatenate([self.close, series.close[start:].astype(np.float64)])
+        return self
+
+    def absorbed(self, series):
+        """Copy that has also seen the trailing (possibly still changing) bars"""
+        return copy.deepcopy(self).update(series)
+
+    def forecast(self, series, next_x):
+        """Next-bar close; next_x is the next bar's x in series.ordinals() units"""
+        return self.absorbed(series).next_value(series, next_x)
+
+    def _absorb(self, series, start):
+        raise NotImplementedError
+
+    def _forget(self, count, series):
+        """Remove the oldest `count` bars; series is the new window"""
+        raise NotImplementedError
+
+    def next_value(self, series, next_x):
+        raise NotImplementedError
+
+
+class LinearTrend(Forecaster):
+    """close = intercept + slope * x, from running sums (x re-based for precision)"""
+
+    name = "linear"
+
+    def __init__(self):
+        super().__init__()
+        self.x0 = None
+        self.x = np.empty(0)        # re-based x of the bars in the window
+        self.sums = np.zeros(5)     # n, sx, sy, sxx, sxy
+
+    @staticmethod
+    def _sums(x, y):
+        return np.array([len(x), x.sum(), y.sum(), np.dot(x, x), np.dot(x, y)])
+
+    def _absorb(self, series, start):
+        x = series.ordinals()[start:]
+        if self.x0 is None:
+            self.x0 = float(x[0])
+        x = x - self.x0
+        self.sums += self._sums(x, series.close[start:].astype(np.float64))
+        self.x = np.concatenate([self.x, x])
+
+    def _forget(self, count, series):
+        self.sums -= self._sums(self.x[:count], self.close[:count])
+        self.x = self.x[count:]
+
+    def coefficients(self):
+        """(slope, intercept) in the series' own x units"""
+        n, sx, sy, sxx, sxy = self.sums
+        slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        intercept = (sy - slope * sx) / n
+        return float(slope), float(intercept - slope * self.x0)
+
+    def next_value(self, series, next_x):
+        slope, intercept = self.coefficients()
+        return intercept + slope * next_x
+
+
+class RidgeReturns(Forecaster):
+    """Ridge on [lagged % returns, RSI, % from SMA 20] -> next % return"""
+
+    name = "ridge"
+    n_features = RIDGE_LAGS + 3     # lags, rsi, sma gap, bias
+
+    def __init__(self):
+        super().__init__()
+        self.xtx = np.zeros((self.n_features, self.n_features))
+        self.xty = np.zeros(self.n_features)
+        # Training rows in the sums, with the time of the bar each one predicts
+        self.rows = np.empty((0, self.n_features))
+        self.targets = np.empty(0)
+        self.row_t = np.empty(0, dtype=np.int64)
+
+    @staticmethod
+    def features(series):
+        """Feature row for every bar (rows before the warm-up are not used)"""
+        close = series.close.astype(np.float64)
+        returns = np.zeros(len(close))
+        returns[1:] = np.diff(np.log(close)) * 100
+
+        lags = np.zeros((len(close), RIDGE_LAGS))
+        for k in range(RIDGE_LAGS):
+            lags[k:, k] = returns[:len(close) - k]
+        momentum = (rsi(series.close).astype(np.float64) - 50) / 50
+        gap = (close / sma(series.close).astype(np.float64) - 1) * 100
+        return np.column_stack([lags, momentum, gap, np.ones(len(close))]), returns
+
+    def _absorb(self, series, start):
+        X, returns = self.features(series)
+        # Row j pairs the features at bar j-1 with the return into bar j
+        first = max(start, RIDGE_WARMUP + 1)
+        if first >= len(series):
+            return
+        rows = X[first - 1:-1]
+        target = returns[first:]
+        self.xtx += rows.T @ rows
+        self.xty += rows.T @ target
+        self.rows = np.concatenate([self.rows, rows])
+        self.targets = np.concatenate([self.targets, target])
+        self.row_t = np.concatenate([self.row_t, series.t[first:]])
+
+    def _forget(self, count, series):
+        # A fresh fit on the new window skips its warm-up bars, so drop those
+        # rows too. Later rows only depend on the last 20 bars (rolling SMA and
+        # RSI), so they are what a refit would compute.
+        cutoff = series.t[RIDGE_WARMUP + 1] if len(series) > RIDGE_WARMUP + 1 else np.inf
+        drop = int(np.searchsorted(self.row_t, cutoff))
+        if drop:
+            rows, target = self.rows[:drop], self.targets[:drop]
+            self.xtx -= rows.T @ rows
+            self.xty -= rows.T @ target
+            self.rows, self.targets, self.row_t = self.rows[drop:], self.targets[drop:], self.row_t[drop:]
+
+    def next_value(self, series, next_x):
+        if self.xtx[-1, -1] == 0:
+            return float(series.close[-1])      # still warming up: no change expected
+        penalty = np.eye(self.n_features) * RIDGE_ALPHA
+        penalty[-1, -1] = 0.0       # don't shrink the bias
+        weights = np.linalg.solve(self.xtx + penalty, self.xty)
+        X, _ = self.features(series)
+        expected = float(X[-1] @ weights)
+        return float(series.close[-1]) * float(np.exp(expected / 100))
+
+
+class HoltSmoothing(Forecaster):
+    """Holt's linear exponential smoothing, one recursion step per new bar"""
+
+    name = "holt"
+
+    def __init__(self, alpha=HOLT_ALPHA, beta=HOLT_BETA):
+        super().__init__()
+        self.alpha = alpha
+        self.beta = beta
+        self.level = None
+        self.trend = 0.0
+
+    def _absorb(self, series, start):
+        alpha, beta = self.alpha, self.beta
+        level, trend = self.level, self.trend
+        for value in series.close[start:].tolist():
+            if level is None:
+                level = value
+                continue
+            previous = level
+            level = alpha * value + (1 - alpha) * (level + trend)
+            trend = beta * (level - previous) + (1 - beta) * trend
+        self.level, self.trend = level, trend
+
+    def _forget(self, count, series):
+        # Smoothing has already discounted bars this old by (1 - alpha) ** window
+        pass
+
+    def next_value(self, series, next_x):
+        return self.level + self.trend
+
+
+FORECASTERS = {cls.name: cls for cls in (LinearTrend, RidgeReturns, HoltSmoothing)}
+
+
+class ModelStore:
+    """Fitted forecasters in SQLite, one per symbol/interval/forecaster"""
+
+    def __init__(self, path=MODEL_STORE_DB):
+        self.path = path
+        self._local = threading.local()
+        self.hits = 0
+        self.updates = 0
+        self.fits = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = [r[1] for r in conn.execute("PRAGMA table_info(models)")]
+            if "first_t" in columns:
+                # Models used to be kept per window start; they are refit on demand
+                conn.execute("DROP TABLE models")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS models ("
+                " symbol TEXT, interval TEXT, forecaster TEXT,"
+                " bars INTEGER, state BLOB, updated REAL,"
+                " PRIMARY KEY (symbol, interval, forecaster))"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def fitted(self, series, name=DEFAULT_FORECASTER):
+        """Forecaster fitted on all but the newest bar, refit only as far as needed"""
+        settled = series.slice(0, len(series) - 1)
+        key = (series.symbol, series.interval, name)
+        row = self._conn().execute(
+            "SELECT state FROM models WHERE symbol = ? AND interval = ? AND forecaster = ?", key
+        ).fetchone()
+
+        model = pickle.loads(row[0]) if row is not None else None
+        if model is None or not model.continues(settled):
+            self.fits += 1
+            model = FORECASTERS[name]().update(settled)
+        elif model.t[0] == settled.t[0] and model.n == len(settled):
+            self.hits += 1
+            self._touch(key)
+            return model
+        else:
+            self.updates += 1
+            model.update(settled)
+
+        self._conn().execute(
+            "INSERT OR REPLACE INTO models VALUES (?, ?, ?, ?, ?, ?)",
+            key + (model.n, pickle.dumps(model, protocol=4), time.time()),
+        )
+        return model
+
+    def _touch(self, key):
+        self._conn().execute(
+            "UPDATE models SET updated = ? WHERE symbol = ? AND interval = ? AND forecaster = ?",
+            (time.time(),) + key)
+
+    def prune(self, max_age_days=MODEL_RETENTION_DAYS):
+        cursor = self._conn().execute("DELETE FROM models WHERE updated < ?",
+                                      (time.time() - max_age_days * 86400,))
+        return cursor.rowcount
+
+    def stats(self):
+        return {"hits": self.hits, "updates": self.updates, "fits": self.fits}
+
+
+models = ModelStore()
+
+
+# --- NIGHTLY BATCH ---
+def _train_symbol(symbol, interval, start, end, names):
+    """Worker: fit every forecaster for one symbol from the local price store"""
+    began = time.perf_counter()
+    series = price_store.store.range(symbol, interval, start, end)
+    if len(series) < 10:
+        return symbol, 0, 0.0
+    for name in names:
+        models.fitted(series, name)
+    return symbol, len(series), time.perf_counter() - began
+
+
+def train_universe(symbols, interval, start, end, names=tuple(FORECASTERS), workers=None):
+    """Sync history in batches, then fit all models on a process pool"""
+    from pipeline import fetch_history_batch
+    from export import EXPORT_BATCH
+
+    for i in range(0, len(symbols), EXPORT_BATCH):
+        price_store.store.ensure_many(symbols[i:i + EXPORT_BATCH], start, end, fetch_history_batch)
+
+    trained = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_train_symbol, s, interval, start, end, names) for s in symbols]
+        for future in as_completed(futures):
+            try:
+                symbol, bars, seconds = future.result()
+            except Exception as e:
+                print(f"⚠️ Training failed: {str(e)[:60]}")
+                continue
+            if bars:
+                trained += 1
+                print(f"🤖 {symbol}: {bars} bars in {seconds * 1000:.0f} ms")
+            else:
+                print(f"⚠️ {symbol}: not enough data, skipped")
+    return trained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit and persist forecasters for many symbols")
+    parser.add_argument('symbols', nargs='*', help="Tickers (default: COMMON_STOCKS)")
+    parser.add_argument('--nightly', action='store_true',
+                        help="Also prune models not used for MODEL_RETENTION_DAYS")
+    parser.add_argument('--period', default=None, help="History window (default: dashboard default)")
+    parser.add_argument('--interval', default=None, help="Bar size (default: dashboard default)")
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: CPU count)")
+    args = parser.parse_args()
+
+    from pipeline import (COMMON_STOCKS, AUTO_INTERVAL, DEFAULT_PERIOD, INTRADAY_INTERVALS,
+                          history_range)
+    interval, start, end = history_range(args.interval or AUTO_INTERVAL,
+                                         args.period or DEFAULT_PERIOD)
+    if interval in INTRADAY_INTERVALS:
+        print("❌ Intraday intervals are not trained in batch")
+        sys.exit(1)
+    symbols = args.symbols or COMMON_STOCKS
+
+    began = time.perf_counter()
+    trained = train_universe(symbols, interval, start, end, workers=args.workers)
+    print("\n" + "=" * 60)
+    print(f"🤖 {trained}/{len(symbols)} symbols trained ({interval}, {start} → {end}) "
+          f"in {time.perf_counter() - began:.1f}s")
+    if args.nightly:
+        print(f"🧹 Pruned {models.prune()} stale models")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
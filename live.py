@@ -0,0 +1,245 @@
+"""
+Live Intraday Feed
+Polls upstream once per (symbol, interval) no matter how many browsers are
+watching, and pushes only the new bars plus the refreshed prediction to
+every subscriber over Server-Sent Events
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+import assets
+from ohlcv import plot_values, volume_colors
+
+# --- CONFIGURATION ---
+CHART_DIV_ID = "stock-chart"
+MARKET_TIMEZONE = "Asia/Kolkata"
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 5000
+SUBSCRIBER_QUEUE_SIZE = 50
+# Each viewer holds a server thread while connected (16 per gthread worker, see
+# the Dockerfile); above this many the stream answers 503 so pages still load
+MAX_VIEWERS = int(os.environ.get("LIVE_MAX_VIEWERS", 12))
+
+# Trace order produced by the pipeline's figure stage
+TRACES = {"ohlc": 0, "trend": 1, "sma": 2, "prediction": 3, "range": 4, "volume": 5, "rsi": 6}
+
+
+def interval_delta(interval):
+    """Bar length for a yfinance interval string such as '5m'"""
+    return pd.Timedelta(minutes=int(interval[:-1]))
+
+
+def closed_bars(df, interval, timezone=MARKET_TIMEZONE):
+    """Drop the trailing bar if it is still forming.
+
+    df['Date'] holds naive wall-clock times of the exchange's timezone.
+    """
+    if df is None or df.empty:
+        return df
+    now = pd.Timestamp.now(tz=timezone or MARKET_TIMEZONE).tz_localize(None)
+    if df['Date'].iloc[-1] + interval_delta(interval) > now:
+        return df.iloc[:-1].reset_index(drop=True)
+    return df
+
+
+def _iso(value):
+    return pd.Timestamp(value).isoformat()
+
+
+def _parse_since(since):
+    if not since:
+        return None
+    try:
+        return pd.Timestamp(since)
+    except (ValueError, TypeError):
+        return None
+
+
+class Subscriber:
+    """One connected browser: its queue and the last bar it has received"""
+
+    __slots__ = ("queue", "since", "synced")
+
+    def __init__(self, since):
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.since = since
+        self.synced = False
+
+
+class SymbolFeed:
+    """Background poller for one (symbol, interval) shared by all its viewers"""
+
+    def __init__(self, hub, symbol, interval):
+        self.hub = hub
+        self.symbol = symbol
+        self.interval = interval
+        self.poll_seconds = hub.intervals[interval][1]
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.frame = None
+        self.prediction = None
+        self.sentiment = 0.0
+
+    def subscribe(self, since=None):
+        sub = Subscriber(_parse_since(since))
+        with self.lock:
+            self.subscribers.add(sub)
+            if self.frame is not None:
+                self._deliver(sub, {})
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True,
+                                               name=f"live-{self.symbol}-{self.interval}")
+                self.thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            self.subscribers.discard(sub)
+
+    def _run(self):
+        print(f"📡 Live feed started: {self.symbol} ({self.interval})")
+        while True:
+            # Same lock order as LiveHub._events, so nobody subscribes to a dropped feed
+            with self.hub.lock, self.lock:
+                if not self.subscribers:
+                    self.thread = None
+                    if self.hub.feeds.get((self.symbol, self.interval)) is self:
+                        del self.hub.feeds[(self.symbol, self.interval)]
+                    print(f"🛑 Live feed stopped: {self.symbol} ({self.interval})")
+                    return
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"⚠️ Live poll failed for {self.symbol}: {str(e)[:60]}")
+            time.sleep(self.poll_seconds)
+
+    def _poll(self):
+        df, prediction, sentiment = self.hub.poll(self.symbol, self.interval)
+        with self.lock:
+            self.frame = df
+            self.prediction = prediction
+            self.sentiment = sentiment
+            encoded = {}
+            for sub in list(self.subscribers):
+                self._deliver(sub, encoded)
+
+    def _deliver(self, sub, encoded):
+        """Queue the bars newer than sub.since; encoded caches per-since payloads"""
+        series = self.frame
+        if sub.since is None:
+            # Nothing rendered client-side yet, so only sync the prediction
+            start = len(series)
+        else:
+            start = int(np.searchsorted(series.t, series.to_t(sub.since), side='right'))
+
+        if start >= len(series) and sub.synced:
+            return
+
+        if start not in encoded:
+            encoded[start] = self._encode(start)
+        try:
+            sub.queue.put_nowait(encoded[start])
+        except queue.Full:
+            # Slow client: leave since untouched so the bars are resent next poll
+            return
+        sub.since = series.datetime_at(-1)
+        sub.synced = True
+
+    def _encode(self, start):
+        series = self.frame
+        bars = series.slice(start)
+        p = self.prediction
+        trend = p['trend']
+
+        payload = {
+            "bars": {
+                "t": [_iso(d) for d in bars.dates()],
+                "o": plot_values(bars.open, 2).tolist(),
+                "h": plot_values(bars.high, 2).tolist(),
+                "l": plot_values(bars.low, 2).tolist(),
+                "c": plot_values(bars.close, 2).tolist(),
+                "v": bars.volume.tolist(),
+                "sma": plot_values(bars.sma20, 2).tolist(),
+                "rsi": plot_values(bars.rsi, 1).tolist(),
+                "color": volume_colors(bars).tolist(),
+            },
+            "prediction": {
+                "t": _iso(p['tomorrow_date']),
+                "close": round(float(p['predicted_close']), 2),
+                "high": round(float(p['predicted_high']), 2),
+                "low": round(float(p['predicted_low']), 2),
+                "trend_t": [_iso(series.datetime_at(0)), _iso(series.datetime_at(-1))],
+                "trend_y": [round(float(trend[0]), 2), round(float(trend[-1]), 2)],
+                "sentiment": round(float(self.sentiment), 3),
+            },
+        }
+        last_id = _iso(series.datetime_at(-1))
+        return f"id: {last_id}\nevent: bars\ndata: {json.dumps(payload)}\n\n"
+
+
+class LiveHub:
+    """Registry of shared feeds; one per (symbol, interval)"""
+
+    def __init__(self, poll, intervals, max_viewers=MAX_VIEWERS):
+        # poll(symbol, interval) -> (OHLCV with SMA20/RSI, prediction, avg sentiment)
+        self.poll = poll
+        self.intervals = intervals
+        self.max_viewers = max_viewers
+        self.viewers = 0
+        self.feeds = {}
+        self.lock = threading.Lock()
+
+    def stream(self, symbol, interval, since=None):
+        """SSE generator for one browser connection, or None when max_viewers are connected"""
+        with self.lock:
+            if self.viewers >= self.max_viewers:
+                return None
+            self.viewers += 1
+        return self._events(symbol, interval, since)
+
+    def _events(self, symbol, interval, since):
+        key = (symbol, interval)
+        with self.lock:
+            feed = self.feeds.get(key)
+            if feed is None:
+                feed = self.feeds[key] = SymbolFeed(self, symbol, interval)
+            sub = feed.subscribe(since)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while True:
+                try:
+                    yield sub.queue.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            feed.unsubscribe(sub)
+            with self.lock:
+                self.viewers -= 1
+
+    def stats(self):
+        with self.lock:
+            return {f"{s}:{i}": len(f.subscribers) for (s, i), f in self.feeds.items()}
+
+
+def client_script(symbol, interval, last_date):
+    """Browser side: config for static/live.js, which extends the chart in place"""
+    config = {
+        "div": CHART_DIV_ID,
+        "url": "/stream?" + urlencode({"symbol": symbol, "interval": interval,
+                                        "since": _iso(last_date)}),
+        "traces": TRACES,
+        "retry": RETRY_MS,
+    }
+    # "</" would end the inline script early
+    config_json = json.dumps(config).replace("</", "<\\/")
+    return (f"<script>window.LIVE_CONFIG = {config_json};</script>"
+            f'<script src="{assets.url("live.js")}"></script>')
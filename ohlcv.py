@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Compact OHLCV Series
+Per-symbol price history as contiguous NumPy arrays (float32 prices, int64
+volume and timestamps) with slotted metadata. The request hot path works on
+these directly; pandas is only used at the I/O edges (from_frame/to_frame).
+
+Run this file to compare memory and CPU against the DataFrame path:
+
+    python ohlcv.py --bars 250 --repeat 200
+"""
+
+import sys
+import time
+import hashlib
+import argparse
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+PRICE_DTYPE = np.float32
+EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()   # datetime.toordinal() of epoch day 0
+
+
+class OHLCV:
+    """One symbol's bars: t is epoch days (unit 'D') or epoch seconds (unit 's')"""
+
+    __slots__ = ("symbol", "interval", "unit", "t", "open", "high", "low", "close",
+                 "volume", "sma20", "rsi")
+
+    def __init__(self, symbol, interval, unit, t, open, high, low, close, volume,
+                 sma20=None, rsi=None):
+        self.symbol = symbol
+        self.interval = interval
+        self.unit = unit
+        self.t = t
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.sma20 = sma20
+        self.rsi = rsi
+
+    # --- I/O EDGES ---
+    @classmethod
+    def from_frame(cls, df, symbol, interval='1d'):
+        """Build from a yfinance-style frame with a 'Date' column"""
+        unit = 'D' if interval.endswith(('d', 'wk', 'mo')) else 's'
+        dates = pd.DatetimeIndex(df['Date']).values.astype(f'datetime64[{unit}]')
+
+        def prices(column):
+            return np.ascontiguousarray(df[column].to_numpy(dtype=np.float64), dtype=PRICE_DTYPE)
+
+        volume = df['Volume'].to_numpy(dtype=np.float64)
+        return cls(symbol, interval, unit,
+                   np.ascontiguousarray(dates.astype(np.int64)),
+                   prices('Open'), prices('High'), prices('Low'), prices('Close'),
+                   np.nan_to_num(volume).astype(np.int64))
+
+    def to_frame(self):
+        """Back to a DataFrame (exports, plotting libraries, debugging)"""
+        df = pd.DataFrame({
+            'Date': self.dates(),
+            'Open': self.open, 'High': self.high, 'Low': self.low,
+            'Close': self.close, 'Volume': self.volume,
+        })
+        if self.sma20 is not None:
+            df['SMA20'] = self.sma20
+            df['RSI'] = self.rsi
+        return df
+
+    # --- ACCESSORS ---
+    def __len__(self):
+        return len(self.t)
+
+    @property
+    def nbytes(self):
+        arrays = (self.t, self.open, self.high, self.low, self.close, self.volume,
+                  self.sma20, self.rsi)
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def dates(self):
+        """Timestamps as a datetime64 array (what Plotly and pandas expect)"""
+        return self.t.astype(f'datetime64[{self.unit}]')
+
+    def datetime_at(self, i):
+        """Timestamp of bar i as a datetime.datetime"""
+        if self.unit == 'D':
+            return dt.datetime.fromordinal(int(self.t[i]) + EPOCH_ORDINAL)
+        return dt.datetime(1970, 1, 1) + dt.timedelta(seconds=int(self.t[i]))
+
+    def to_t(self, when):
+        """Convert a datetime/Timestamp to this series' time unit"""
+        return int(np.datetime64(pd.Timestamp(when).to_datetime64(), self.unit).astype(np.int64))
+
+    def ordinals(self):
+        """Regression x values: datetime.toordinal() for daily, epoch seconds intraday"""
+        if self.unit == 'D':
+            return self.t.astype(np.float64) + EPOCH_ORDINAL
+        return self.t.astype(np.float64)
+
+    def slice(self, start=None, stop=None):
+        """View of a range of bars (arrays are shared, not copied)"""
+        s = slice(start, stop)
+        return OHLCV(self.symbol, self.interval, self.unit, self.t[s],
+                     self.open[s], self.high[s], self.low[s], self.close[s], self.volume[s],
+                     None if self.sma20 is None else self.sma20[s],
+                     None if self.rsi is None else self.rsi[s])
+
+    def fingerprint(self):
+        h = hashlib.sha1(f"{self.symbol}|{self.interval}|{self.unit}".encode())
+        for a in (self.t, self.open, self.high, self.low, self.close, self.volume,
+                  self.sma20, self.rsi):
+            if a is not None:
+                h.update(a.tobytes())
+        return h.hexdigest()
+
+    # --- INDICATORS ---
+    def with_indicators(self):
+        """New series sharing the price arrays, plus SMA 20 and RSI 14"""
+        return OHLCV(self.symbol, self.interval, self.unit, self.t,
+                     self.open, self.high, self.low, self.close, self.volume,
+                     sma(self.close, 20), rsi(self.close, 14))
+
+
+def _rolling_mean(values, window):
+    """Trailing mean (float64 accumulation); NaN until the window fills"""
+    csum = np.cumsum(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1] = csum[window - 1]
+        out[window:] = csum[window:] - csum[:-window]
+        out /= window
+    return out
+
+
+def _bfill(values):
+    """Back-fill the leading NaNs (the rolling windows' warm-up)"""
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid):
+        values[:valid[0]] = values[valid[0]]
+    return values
+
+
+def sma(close, window=20):
+    """Simple moving average; the warm-up is back-filled with the first full window"""
+    return _bfill(_rolling_mean(close, window)).astype(PRICE_DTYPE)
+
+
+def rsi(close, window=14):
+    """RSI with simple rolling means, as pandas' rolling(14).mean() on the diffs
+    gives it; the warm-up is back-filled like sma()"""
+    delta = np.empty(len(close), dtype=np.float64)
+    # pandas' diff() starts with NaN, but delta.where(delta > 0, 0) turns it into a
+    # zero gain/loss, so the first full window (and RSI) ends at bar window - 1
+    delta[0] = 0.0
+    np.subtract(close[1:], close[:-1], out=delta[1:], dtype=np.float64)
+
+    avg_gain = _rolling_mean(np.maximum(delta, 0.0), window)
+    avg_loss = _rolling_mean(np.maximum(-delta, 0.0), window)
+    avg_loss[avg_loss == 0] = 0.0001
+    out = 100 - (100 / (1 + avg_gain / avg_loss))
+    return _bfill(out).astype(PRICE_DTYPE)
+
+
+def linear_trend(x, y):
+    """Least-squares y = intercept + slope * x; returns (slope, intercept)"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    slope = float(np.dot(dx, y - y_mean) / np.dot(dx, dx))
+    return slope, float(y_mean - slope * x_mean)
+
+
+def plot_values(values, decimals=4):
+    """float32 -> rounded float64 so serialized JSON reads 101.24, not 101.23999786"""
+    return np.round(np.asarray(values, dtype=np.float64), decimals)
+
+
+def volume_colors(series):
+    """Red/green volume bar colours without a per-row Python loop"""
+    return np.where(series.open - series.close >= 0, 'red', 'green')
+
+
+# --- BENCHMARK ---
+def _synthetic_frame(bars, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    open_ = close * (1 + rng.normal(0, 0.003, bars))
+    return pd.DataFrame({
+        'Date': pd.bdate_range(end='2026-10-16', periods=bars),
+        'Open': open_, 'High': np.maximum(open_, close) * 1.01,
+        'Low': np.minimum(open_, close) * 0.99, 'Close': close,
+        'Volume': rng.integers(1e5, 1e7, bars).astype(np.float64),
+    })
+
+
+def _dataframe_path(df):
+    """The previous hot path: pandas indicators, sklearn fit, iterrows colours"""
+    from sklearn.linear_model import LinearRegression
+
+    df = df.copy()
+    df['SMA20'] = df['Close'].rolling(window=20).mean()
+    delta = df['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    loss[loss == 0] = 0.0001
+    df['RSI'] = 100 - (100 / (1 + gain / loss))
+    df[['SMA20', 'RSI']] = df[['SMA20', 'RSI']].bfill()
+    df['Date_Ordinal'] = df['Date'].map(dt.datetime.toordinal)
+    X = df[['Date_Ordinal']]
+    model = LinearRegression().fit(X, df['Close'])
+    trend = model.predict(X)
+    colors = ['red' if row['Open'] - row['Close'] >= 0 else 'green' for index, row in df.iterrows()]
+    return df, trend, colors
+
+
+def _series_path(series):
+    series = series.with_indicators()
+    x = series.ordinals()
+    slope, intercept = linear_trend(x, series.close)
+    trend = intercept + slope * x
+    colors = volume_colors(series)
+    return series, trend, colors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare DataFrame vs OHLCV hot paths")
+    parser.add_argument('--bars', type=int, default=250, help="Bars per symbol (default: 250)")
+    parser.add_argument('--repeat', type=int, default=200, help="Timed iterations")
+    args = parser.parse_args()
+
+    raw = _synthetic_frame(args.bars)
+    series = OHLCV.from_frame(raw, "BENCH.NS")
+
+    df, _, _ = _dataframe_path(raw)
+    compact, _, _ = _series_path(series)
+    df_bytes = df.memory_usage(deep=True, index=True).sum()
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        _dataframe_path(raw)
+    df_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        _series_path(series)
+    series_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    print("\n" + "=" * 60)
+    print(f"📦 Memory per symbol ({args.bars} bars)")
+    print(f"   DataFrame: {df_bytes / 1024:8.1f} KiB")
+    print(f"   OHLCV:     {compact.nbytes / 1024:8.1f} KiB  ({df_bytes / compact.nbytes:.1f}x smaller)")
+    print(f"⚡ Indicators + trend + colours per request")
+    print(f"   DataFrame: {df_ms:8.3f} ms")
+    print(f"   OHLCV:     {series_ms:8.3f} ms  ({df_ms / series_ms:.1f}x faster)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,873 @@
+"""
+Stock Analysis Pipeline
+The dashboard as a DAG of memoized stages shared by app.py and web_dashboard.py:
+
+    resolve -> fetch -> indicators ----------------\\
+                     -> model -----> prediction -> figure -> render
+    news -> sentiment --------------/
+
+Daily, weekly and monthly history is read from the local price store
+(price_store.py) for any period or start/end range; intraday bars come
+straight from Yahoo.
+
+Every stage result is cached under a key derived from the stage name, its
+parameters and the content fingerprints of its inputs. A stage re-runs only
+when one of those changed, so e.g. a news refresh that brings new headlines
+re-scores sentiment and re-renders, but never recomputes indicators or refits
+the trend line.
+"""
+
+import html
+import time
+import pickle
+import traceback
+import hashlib
+import threading
+import datetime as dt
+import xml.etree.ElementTree as ET
+
+import yfinance as yf
+try:
+    from yfinance import shared as yf_shared
+except ImportError:
+    yf_shared = None
+import pandas as pd
+import numpy as np
+import requests
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+import nltk
+
+import live
+import assets
+import figures
+from cache import cache
+import upstream
+import price_store
+import forecast
+import symbols
+from ohlcv import OHLCV
+
+# --- NLTK SETUP ---
+try:
+    nltk.data.find('sentiment/vader_lexicon.zip')
+except LookupError:
+    print("📥 Downloading VADER sentiment lexicon...")
+    nltk.download('vader_lexicon', quiet=True)
+
+# --- CONFIGURATION ---
+COMMON_STOCKS = [
+    "IRB.NS", "TCS.NS", "INFY.NS", "WIPRO.NS", "HCLTECH.NS",
+    "RELIANCE.NS", "HDFC.NS", "ICICIBANK.NS", "SBIN.NS", "BAJAJFINSV.NS",
+    "ADANIPORTS.NS", "MARUTI.NS", "NTPC.NS", "POWERGRID.NS", "COAL.NS"
+]
+
+DEFAULT_STOCK = "IRB.NS"
+MAX_RETRIES = 3
+
+DEFAULT_INTERVAL = "1d"
+AUTO_INTERVAL = "auto"          # pick 1d/1wk/1mo from the length of the range
+HISTORY_INTERVALS = price_store.RESOLUTIONS
+# Intraday bar size -> (history to load, seconds between upstream polls)
+INTRADAY_INTERVALS = {
+    "1m": ("5d", 15),
+    "5m": ("1mo", 30),
+    "15m": ("1mo", 60),
+}
+INTERVAL_CHOICES = [AUTO_INTERVAL] + list(HISTORY_INTERVALS) + list(INTRADAY_INTERVALS)
+BAR_NAMES = {"1d": "Day", "1wk": "Week", "1mo": "Month"}
+
+DEFAULT_PERIOD = "1y"
+# Period -> days of history to chart (None: everything since listing)
+PERIODS = {
+    "1mo": 31, "3mo": 92, "6mo": 183, "1y": 365, "2y": 730,
+    "5y": 1826, "10y": 3652, "20y": 7305, "max": None,
+}
+
+# How long upstream results stay fresh before the stage re-runs (seconds)
+RESOLVE_TTL = 24 * 3600
+DAILY_FETCH_TTL = 300
+NEWS_TTL = 600
+STALE_KEEP = 24 * 3600          # how long stale_on_error stages keep a result to fall back on
+PAGE_CACHE_BYTES = 64 * 1024 * 1024     # memory quota for rendered charts / pages (per process)
+
+# Network ticker searches, shared by every worker through the cache's disk tier
+cache.namespace("ticker", ttl=RESOLVE_TTL, disk=True)
+
+
+def fetch_stock_data(symbol, retries=MAX_RETRIES, period='1y', interval=DEFAULT_INTERVAL,
+                     start=None, end=None):
+    """Fetch stock data with retry logic for reliability.
+
+    start/end (end exclusive, as in yfinance) take precedence over period.
+    """
+    if start is not None or end is not None:
+        span = {'start': start, 'end': end}
+    else:
+        span = {'period': period}
+
+    for attempt in range(retries):
+        try:
+            print(f"📥 Fetching {interval} data for {symbol} (attempt {attempt + 1}/{retries})...")
+            with upstream.guard.call('yahoo'):
+                df = yf.download(symbol, interval=interval, progress=False, **span)
+                # yfinance swallows HTTP errors and reports them per symbol instead
+                error = getattr(yf_shared, '_ERRORS', {}).get(symbol)
+                if error and upstream.is_throttle_error(error):
+                    raise upstream.Throttled(error)
+
+            if df is None or df.empty:
+                if attempt < retries - 1:
+                    print(f"⚠️ Empty result, retrying...")
+                    time.sleep(1)
+                continue
+
+            df = df.reset_index()
+            # Intraday frames are indexed by a tz-aware 'Datetime' column
+            if 'Datetime' in df.columns:
+                df = df.rename(columns={'Datetime': 'Date'})
+            if getattr(df['Date'].dt, 'tz', None) is not None:
+                # Keep the exchange's wall-clock times, and which timezone they are in
+                timezone = str(df['Date'].dt.tz)
+                df['Date'] = df['Date'].dt.tz_localize(None)
+                df.attrs['timezone'] = timezone
+            return df
+
+        except upstream.UpstreamUnavailable as e:
+            # Retrying would only add load while Yahoo is struggling
+            print(f"🔌 Yahoo unavailable: {e}")
+            break
+
+        except Exception as e:
+            error_msg = str(e)[:60]
+            print(f"⚠️ Attempt {attempt + 1} failed: {error_msg}")
+
+            if attempt < retries - 1:
+                print(f"🔄 Retrying in 2 seconds...")
+                time.sleep(2)
+
+    print(f"❌ Failed to fetch data after {retries} attempts")
+    return None
+
+def get_ticker_from_name(query):
+    """Dynamically find ticker from company name using Yahoo API"""
+    query = str(query).strip()
+
+    # Offline equity master first: exact tickers and well-matched company names
+    symbol = symbols.resolve(query)
+    if symbol:
+        return symbol
+
+    # If it's likely already a ticker (no spaces, mostly uppercase)
+    if " " not in query and sum(1 for c in query if c.isupper()) > len(query) / 2:
+        if not (query.endswith('.NS') or query.endswith('.BO')):
+            return query.upper() + ".NS"
+        return query.upper()
+
+    symbol = cache.get("ticker", query)
+    if symbol is None:
+        symbol = search_ticker(query)
+        if symbol:
+            cache.set("ticker", query, symbol)
+    if symbol:
+        return symbol
+
+    # Fallback to the original dumb behavior if API fails
+    fallback = query.replace(" ", "").upper()
+    if not (fallback.endswith('.NS') or fallback.endswith('.BO')):
+        return fallback + ".NS"
+    return fallback
+
+
+def search_ticker(query):
+    """Yahoo search for a company name; NSE/BSE listings first, None when nothing found"""
+    url = f"https://query2.finance.yahoo.com/v1/finance/search?q={query}"
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    })
+
+    try:
+        with upstream.guard.call('search'):
+            response = session.get(url, timeout=5)
+            if response.status_code == 429:
+                raise upstream.Throttled(response.status_code)
+        if response.status_code == 200:
+            data = response.json()
+            quotes = data.get('quotes', [])
+
+            # Look for NSE or BSE matches
+            for quote in quotes:
+                symbol = quote.get('symbol', '')
+                exchange = quote.get('exchange', '')
+                if exchange in ['NSI', 'BSE'] or symbol.endswith('.NS') or symbol.endswith('.BO'):
+                    return symbol
+
+            if quotes:
+                return quotes[0].get('symbol', '')
+
+    except Exception as e:
+        print(f"⚠️ Search error for {query}: {e}")
+    return None
+
+
+def next_bar_date(last_date, interval=DEFAULT_INTERVAL):
+    """Timestamp of the bar after last_date (skips weekends for daily bars)"""
+    if interval in INTRADAY_INTERVALS:
+        return last_date + dt.timedelta(minutes=int(interval[:-1]))
+    if interval == "1wk":
+        return last_date + dt.timedelta(days=7)
+    if interval == "1mo":
+        return (last_date.replace(day=1) + dt.timedelta(days=32)).replace(day=1)
+
+    tomorrow_date = last_date + dt.timedelta(days=1)
+    if tomorrow_date.weekday() >= 5:
+        tomorrow_date += dt.timedelta(days=(7 - tomorrow_date.weekday()))
+    return tomorrow_date
+
+
+def _parse_date(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, dt.date):
+        return value
+    try:
+        return dt.date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"invalid date {value!r}, expected YYYY-MM-DD")
+
+
+def history_range(interval=DEFAULT_INTERVAL, period=DEFAULT_PERIOD, start=None, end=None):
+    """Validate range arguments -> (interval, start, end) with dates resolved.
+
+    An explicit start overrides period; start=None on return means 'max'.
+    Intraday intervals ignore the range and return (interval, None, None).
+    """
+    if interval not in INTERVAL_CHOICES:
+        raise ValueError(f"interval must be one of {INTERVAL_CHOICES}")
+    if interval in INTRADAY_INTERVALS:
+        return interval, None, None
+
+    end = _parse_date(end) or dt.date.today()
+    start = _parse_date(start)
+    if start is None:
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {list(PERIODS)}")
+        if PERIODS[period] is not None:
+            start = end - dt.timedelta(days=PERIODS[period])
+    if start is not None and start > end:
+        raise ValueError("start must not be after end")
+
+    if interval == AUTO_INTERVAL:
+        interval = price_store.auto_resolution(start, end)
+    return interval, start, end
+
+
+def _fetch_daily_history(symbol, start, end):
+    """Daily bars from Yahoo for the price store; start=None loads everything"""
+    if start is None:
+        df = fetch_stock_data(symbol, retries=MAX_RETRIES, period='max')
+    else:
+        df = fetch_stock_data(symbol, retries=MAX_RETRIES, start=start,
+                              end=end + dt.timedelta(days=1))
+    if df is None or df.empty:
+        return None
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.droplevel(1)
+    return _daily_series(df, symbol)
+
+
+def _daily_series(df, symbol):
+    df = df.dropna(subset=['Open', 'High', 'Low', 'Close'])
+    if df.empty:
+        return None
+    if 'Date' not in df.columns:
+        df = df.reset_index()
+    return OHLCV.from_frame(df, symbol, '1d')
+
+
+def fetch_history_batch(symbols, start, end):
+    """Daily bars for many symbols in one yfinance request -> {symbol: OHLCV}"""
+    span = {'period': 'max'} if start is None else {'start': start, 'end': end + dt.timedelta(days=1)}
+    print(f"📥 Fetching daily history for {len(symbols)} symbols...")
+    try:
+        with upstream.guard.call('yahoo', max_wait=60):
+            raw = yf.download(list(symbols), interval='1d', group_by='ticker', progress=False, **span)
+    except Exception as e:
+        print(f"⚠️ Batch fetch failed: {str(e)[:60]}")
+        return {}
+    if raw is None or raw.empty:
+        return {}
+
+    series = {}
+    for symbol in symbols:
+        try:
+            df = raw[symbol] if isinstance(raw.columns, pd.MultiIndex) else raw
+        except KeyError:
+            continue
+        result = _daily_series(df.rename_axis('Date'), symbol)
+        if result is not None:
+            series[symbol] = result
+    return series
+
+
+# --- STAGE ENGINE ---
+def fingerprint(value):
+    """Content hash of a stage result, used to key the stages downstream"""
+    if isinstance(value, OHLCV):
+        return value.fingerprint()
+    h = hashlib.sha1()
+    if isinstance(value, pd.DataFrame):
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        h.update(repr(list(value.columns)).encode())
+    elif isinstance(value, np.ndarray):
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, str):
+        h.update(value.encode())
+    else:
+        h.update(pickle.dumps(value, protocol=4))
+    return h.hexdigest()
+
+
+class Stage:
+    """A named step: its upstream stages, the run parameters it reads, its TTL"""
+
+    __slots__ = ("name", "func", "inputs", "params", "ttl", "stale_on_error", "default",
+                 "namespace")
+
+    def __init__(self, name, func, inputs, params, ttl, stale_on_error, default, namespace):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = tuple(params)
+        self.ttl = ttl
+        self.stale_on_error = stale_on_error
+        self.default = default
+        self.namespace = namespace
+
+
+class Pipeline:
+    """Registry of stages; their results live in one cache namespace per stage (cache.py)"""
+
+    def __init__(self, name, store=cache):
+        self.name = name
+        self.cache = store
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def stage(self, name, inputs=(), params=(), ttl=None, stale_on_error=False, default=None,
+              quota=None, disk=False):
+        """Decorator registering func(*input_values, **params) as a stage.
+
+        ttl may be a number of seconds or a callable taking the stage params.
+        If the stage raises, stale_on_error serves the last cached result (kept
+        STALE_KEEP seconds) and default (a factory) is used, uncached, when
+        there is none. quota caps the stage's cached bytes in this process;
+        disk shares its results with the other workers on the host.
+        """
+        def register(func):
+            namespace = f"{self.name}.{name}"
+            fixed_ttl = None if callable(ttl) else ttl
+            keep = STALE_KEEP if stale_on_error and fixed_ttl is not None else fixed_ttl
+            self.cache.namespace(namespace, ttl=fixed_ttl, keep=keep, quota=quota, disk=disk)
+            self.stages[name] = Stage(name, func, inputs, params, ttl, stale_on_error, default,
+                                      namespace)
+            return func
+        return register
+
+    def run(self, targets, refresh=(), **params):
+        """Evaluate one stage (or a tuple of stages) and everything they need.
+
+        refresh names stages to re-run even if their cached result is fresh;
+        stages downstream of them only re-run if the result actually changed.
+        """
+        done = {}
+        if isinstance(targets, str):
+            return self._evaluate(targets, params, set(refresh), done)[0]
+        return {name: self._evaluate(name, params, set(refresh), done)[0] for name in targets}
+
+    def iterate(self, targets, refresh=(), **params):
+        """run() for several targets, yielding (name, value) as each one completes"""
+        done = {}
+        for name in targets:
+            yield name, self._evaluate(name, params, set(refresh), done)[0]
+
+    def _evaluate(self, name, params, refresh, done):
+        if name in done:
+            return done[name]
+
+        stage = self.stages[name]
+        inputs = [self._evaluate(dep, params, refresh, done) for dep in stage.inputs]
+        kwargs = {p: params.get(p) for p in stage.params}
+
+        key_parts = [name, repr(sorted(kwargs.items()))] + [fp for _, fp in inputs]
+        key = hashlib.sha1("|".join(key_parts).encode()).hexdigest()
+
+        ttl = stage.ttl(**kwargs) if callable(stage.ttl) else stage.ttl
+        now = time.time()
+        entry = self.cache.lookup(stage.namespace, key, ttl)
+        fresh = entry is not None and entry.fresh and name not in refresh
+        if fresh:
+            with self.lock:
+                self.hits += 1
+            result = entry.value
+        else:
+            try:
+                value = stage.func(*[v for v, _ in inputs], **kwargs)
+            except Exception as e:
+                result = self._fallback(stage, entry, e)
+                done[name] = result
+                return result
+            result = (value, fingerprint(value))
+            with self.lock:
+                self.misses += 1
+            self.cache.set(stage.namespace, key, result, stored_at=now)
+
+        done[name] = result
+        return result
+
+    def _fallback(self, stage, entry, error):
+        """Stale or default result for a failed stage (re-raises if neither)"""
+        if stage.stale_on_error and entry is not None:
+            age = time.time() - entry.stored_at
+            print(f"⚠️ {stage.name} failed ({str(error)[:60]}), serving {age:.0f}s old result")
+            with self.lock:
+                self.stale += 1
+            return entry.value
+        if stage.default is not None:
+            print(f"⚠️ {stage.name} failed ({str(error)[:60]}), using default")
+            value = stage.default()
+            return (value, fingerprint(value))
+        raise error
+
+    def clear(self):
+        """Drop every cached stage result held in this process"""
+        for stage in self.stages.values():
+            self.cache.clear(stage.namespace)
+
+    def stats(self):
+        namespaces = self.cache.stats()["namespaces"]
+        entries = sum(namespaces[s.namespace]["entries"] for s in self.stages.values())
+        with self.lock:
+            return {"entries": entries, "hits": self.hits, "misses": self.misses,
+                    "stale": self.stale}
+
+
+dashboard_pipeline = Pipeline("dashboard")
+stage = dashboard_pipeline.stage
+_vader = None
+
+
+def _fetch_ttl(interval, **_):
+    return INTRADAY_INTERVALS[interval][1] if interval in INTRADAY_INTERVALS else DAILY_FETCH_TTL
+
+
+# --- STAGES ---
+@stage("resolve", params=("query",), ttl=RESOLVE_TTL, disk=True)
+def resolve_stage(query):
+    """Company name or ticker -> Yahoo symbol"""
+    return get_ticker_from_name(query)
+
+
+@stage("fetch", inputs=("resolve",), params=("interval", "start", "end"), ttl=_fetch_ttl,
+       stale_on_error=True, disk=True)
+def fetch_stage(symbol, interval, start, end):
+    """OHLCV bars; history comes from the price store, intraday keeps completed bars only"""
+    if interval not in INTRADAY_INTERVALS:
+        series = price_store.store.load(symbol, interval, start, end, _fetch_daily_history)
+        if len(series) < 10:
+            raise ValueError(f"Not enough data for prediction ({len(series)} bars)")
+        return series
+
+    period = INTRADAY_INTERVALS[interval][0]
+    df = fetch_stock_data(symbol, retries=MAX_RETRIES, period=period, interval=interval)
+    if df is None or df.empty:
+        raise ValueError(f"No data available for {symbol}")
+
+    # Flatten MultiIndex columns if present
+    timezone = df.attrs.get('timezone')
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.droplevel(1)
+    df = df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
+
+    # The live feed only pushes completed bars, so render the same set
+    df = live.closed_bars(df, interval, timezone)
+    if len(df) < 10:
+        raise ValueError(f"Not enough data for prediction ({len(df)} bars)")
+    # Past this point everything works on compact arrays, not the DataFrame
+    return OHLCV.from_frame(df, symbol, interval)
+
+
+@stage("indicators", inputs=("fetch",))
+def indicators_stage(series):
+    """SMA 20 and RSI 14"""
+    return series.with_indicators()
+
+
+@stage("news", inputs=("resolve",), ttl=NEWS_TTL, stale_on_error=True, default=list, disk=True)
+def news_stage(symbol):
+    """Raw Google News headlines as (title, pubDate) pairs"""
+    print("📡 Fetching news...")
+    encoded_symbol = symbol.replace(".NS", "").replace(".BO", "")
+    rss_url = f"https://news.google.com/rss/search?q={encoded_symbol}+stock+india&hl=en-IN&gl=IN&ceid=IN:en"
+
+    with upstream.guard.call('news'):
+        response = requests.get(rss_url, timeout=5)
+        if response.status_code == 429:
+            raise upstream.Throttled(response.status_code)
+    root = ET.fromstring(response.content)
+
+    items = []
+    for item in root.findall('.//item')[:10]:
+        title_elem = item.find('title')
+        pubDate_elem = item.find('pubDate')
+
+        if title_elem is not None and pubDate_elem is not None:
+            items.append((title_elem.text, pubDate_elem.text))
+    return items
+
+
+@stage("sentiment", inputs=("news",))
+def sentiment_stage(items):
+    """VADER-scored headlines and the average mood"""
+    global _vader
+    if _vader is None:
+        _vader = SentimentIntensityAnalyzer()
+
+    sentiment_score = 0
+    latest_headlines = []
+    for title, pubDate in items:
+        score = _vader.polarity_scores(title)['compound']
+        sentiment_score += score
+
+        sentiment_label = "🟢" if score > 0.05 else "🔴" if score < -0.05 else "⚪"
+        latest_headlines.append(f"{sentiment_label} {title} ({pubDate[:16]})")
+
+    avg_sentiment = sentiment_score / len(items) if items else 0
+    return {'avg': avg_sentiment, 'headlines': latest_headlines}
+
+
+@stage("model", inputs=("fetch",), params=("interval", "forecaster"))
+def model_stage(series, interval, forecaster):
+    """Trend line plus the chosen forecaster's projection to the next bar"""
+    print(f"🤖 Running {forecaster} model...")
+    last_date = series.datetime_at(-1)
+    tomorrow_date = next_bar_date(last_date, interval)
+    # Daily bars are fit on datetime.toordinal(), intraday bars on epoch seconds
+    if interval in INTRADAY_INTERVALS:
+        tomorrow_x = (tomorrow_date - dt.datetime(1970, 1, 1)).total_seconds()
+    else:
+        tomorrow_x = tomorrow_date.toordinal()
+
+    # Fitted models are persisted and only fed the bars they have not seen yet
+    trend_model = forecast.models.fitted(series, "linear").absorbed(series)
+    slope, intercept = trend_model.coefficients()
+    if forecaster == "linear":
+        base_price = trend_model.next_value(series, tomorrow_x)
+    else:
+        base_price = forecast.models.fitted(series, forecaster).forecast(series, tomorrow_x)
+
+    return {
+        'last_date': last_date,
+        'tomorrow_date': tomorrow_date,
+        'trend': intercept + slope * series.ordinals(),
+        'base_price': base_price,
+    }
+
+
+@stage("prediction", inputs=("model", "indicators", "sentiment"))
+def prediction_stage(model, series, sentiment):
+    """Trend projection adjusted for news mood and RSI, with a High/Low band"""
+    base_price = model['base_price']
+    avg_sentiment = sentiment['avg']
+
+    # Apply Sentiment Adjustment
+    volatility = 0.025 # 2.5% sway based on news
+    news_impact = base_price * (avg_sentiment * volatility)
+
+    # ** RSI Adjustment **
+    # If RSI > 70 (Overbought), dampen the target
+    # If RSI < 30 (Oversold), boost the target
+    current_rsi = float(series.rsi[-1])
+    rsi_factor = 1.0
+    if current_rsi > 70:
+        rsi_factor = 0.99  # 1% Pullback expected
+    elif current_rsi < 30:
+        rsi_factor = 1.01  # 1% Bounce expected
+
+    predicted_close = (base_price + news_impact) * rsi_factor
+
+    # ESTIMATE RANGE (High/Low) based on recent volatility
+    recent_volatility = float(np.mean(series.high[-14:] - series.low[-14:], dtype=np.float64))
+    return dict(model,
+                current_rsi=current_rsi,
+                rsi_factor=rsi_factor,
+                predicted_close=predicted_close,
+                predicted_high=predicted_close + (recent_volatility * 0.8),
+                predicted_low=predicted_close - (recent_volatility * 0.8))
+
+
+@stage("figure", inputs=("resolve", "indicators", "prediction", "sentiment"), params=("interval",),
+       quota=PAGE_CACHE_BYTES, disk=True)
+def figure_stage(symbol, series, prediction, sentiment, interval):
+    """Plotly chart (price + SMA/trend/prediction, volume, RSI) as an HTML fragment"""
+    print("🎨 Creating chart...")
+    # Spec written straight from the arrays, no graph_objects validation (figures.py)
+    figure = figures.dashboard_figure(symbol, series, prediction, sentiment)
+    return figures.figure_html(figure, live.CHART_DIV_ID)
+
+
+# --- PAGE FRAGMENTS ---
+# The cached render stage joins these; stream_dashboard() sends them as they are ready
+PAGE_END = "</body>\n</html>"
+ANALYSIS_HEADER = '<h2 style="color: #00ccff; margin-top: 40px;">📊 Technical & AI Analysis</h2>'
+
+
+def page_head():
+    return f'<html>\n<head><meta charset="utf-8" />{assets.head_tags()}</head>\n<body>'
+
+
+def selector_html(symbol, selected, period, start, end, forecaster):
+    """Title, stock/interval/period/forecaster selectors, range and search forms"""
+    start_value = html.escape(start.isoformat() if start and period is None else "")
+    end_value = html.escape(end.isoformat() if end and end != dt.date.today() else "")
+    # The symbol can be whatever was typed in (an unknown name falls back to itself)
+    symbol_value = html.escape(symbol)
+    selected_value = html.escape(selected)
+    forecaster_value = html.escape(forecaster)
+    range_fields = (f'<input type="hidden" name="period" value="{html.escape(period or "")}">'
+                    f'<input type="hidden" name="start" value="{start_value}">'
+                    f'<input type="hidden" name="end" value="{end_value}">'
+                    f'<input type="hidden" name="forecaster" value="{forecaster_value}">')
+    return f"""
+    <div class="selector">
+        <h1>🤖 AI Stock Report Dashboard</h1>
+        <h3 style="color: #00ccff;">📊 Current Stock: <b>{symbol_value}</b></h3>
+
+        <form method="GET" action="/" style="margin-bottom: 20px;">
+            <label for="symbol" style="font-size: 18px; color: #00ccff;"><b>Select Stock:</b></label><br><br>
+            <select name="symbol" id="symbol">
+                <option value="">-- Choose a stock --</option>
+                {''.join([f'<option value="{s}">{s}</option>' for s in COMMON_STOCKS])}
+            </select>
+            <select name="interval" id="interval">
+                {''.join([f'<option value="{i}"{" selected" if i == selected else ""}>{i}</option>' for i in INTERVAL_CHOICES])}
+            </select>
+            <select name="period" id="period">
+                {''.join([f'<option value="{p}"{" selected" if p == period else ""}>{p}</option>' for p in PERIODS])}
+            </select>
+            <select name="forecaster" id="forecaster">
+                {''.join([f'<option value="{f}"{" selected" if f == forecaster else ""}>{f}</option>' for f in forecast.FORECASTERS])}
+            </select>
+            <button type="submit">Analyze</button>
+        </form>
+
+        <form method="GET" action="/" style="margin-bottom: 20px;">
+            <input type="hidden" name="symbol" value="{symbol_value}">
+            <input type="hidden" name="interval" value="{selected_value}">
+            <input type="hidden" name="forecaster" value="{forecaster_value}">
+            <label for="start"><b>From:</b></label>
+            <input type="date" name="start" id="start" value="{start_value}">
+            <label for="end"><b>To:</b></label>
+            <input type="date" name="end" id="end" value="{end_value}">
+            <button type="submit">Show Range</button>
+        </form>
+
+        <hr>
+
+        <form method="GET" action="/">
+            <label style="font-size: 18px; color: #00ccff;"><b>Search Custom Stock:</b></label><br><br>
+            <input type="text" name="symbol" id="symbol-search" list="symbol-suggestions"
+                   autocomplete="off" placeholder="e.g., TATAMOTORS, ADANIGREEN" required>
+            <datalist id="symbol-suggestions"></datalist>
+            <input type="hidden" name="interval" value="{selected_value}">
+            {range_fields}
+            <button type="submit">Search</button>
+        </form>
+        <p><a href="/correlation" style="color: #00ccff;">🔗 How the stocks move together</a></p>
+    </div>
+"""
+
+
+def price_box(series, interval):
+    """Last bar and its RSI"""
+    intraday = interval in INTRADAY_INTERVALS
+    last_date = series.datetime_at(-1)
+    current_rsi = float(series.rsi[-1])
+
+    # Determine RSI Status Text
+    rsi_status = "Neutral"
+    rsi_color = "white"
+    if current_rsi > 70:
+        rsi_status = "Overbought (High Risk)"
+        rsi_color = "red"
+    elif current_rsi < 30:
+        rsi_status = "Oversold (Bounce Likely)"
+        rsi_color = "green"
+
+    date_label = last_date if intraday else last_date.date()
+    bar_name = "Bar" if intraday else BAR_NAMES[interval]
+    return f"""
+    <div class="box">
+        <h2>📅 Previous {bar_name}</h2>
+        <p><b>Date:</b> <span id="last-date">{date_label}</span></p>
+        <p><b>Close:</b> ₹<span id="last-close">{float(series.close[-1]):.2f}</span></p>
+        <p><b>High:</b> ₹<span id="last-high">{float(series.high[-1]):.2f}</span></p>
+        <p><b>Low:</b> ₹<span id="last-low">{float(series.low[-1]):.2f}</span></p>
+        <p><b>Vol:</b> <span id="last-volume">{int(series.volume[-1] / 1000)}</span>k</p>
+        <p style="border-top: 1px solid #555; padding-top: 10px;">
+           <b>RSI (14):</b> <span id="last-rsi" style="color: {rsi_color}">{current_rsi:.1f}</span><br>
+           <small>{rsi_status}</small>
+        </p>
+    </div>
+"""
+
+
+def prediction_box(prediction, sentiment, interval, forecaster):
+    """Next-bar target and High/Low band"""
+    intraday = interval in INTRADAY_INTERVALS
+    tomorrow_date = prediction['tomorrow_date']
+    target_label = tomorrow_date if intraday else tomorrow_date.date()
+    if intraday:
+        box_title = "⏱️ Next Bar Prediction"
+    elif interval == "1d":
+        box_title = "🚀 Tomorrow's Prediction"
+    else:
+        box_title = f"🚀 Next {BAR_NAMES[interval]}'s Prediction"
+    return f"""
+    <div class="box">
+        <h2>{box_title}</h2>
+        <p><b>Target Date:</b> <span id="target-date">{target_label}</span></p>
+        <p style="font-size: 20px; font-weight: bold; color: cyan;">Target: ₹<span id="pred-close">{prediction['predicted_close']:.2f}</span></p>
+        <p><b>Likely High:</b> ₹<span id="pred-high">{prediction['predicted_high']:.2f}</span></p>
+        <p><b>Likely Low:</b> ₹<span id="pred-low">{prediction['predicted_low']:.2f}</span></p>
+        <p><i>(Model: {forecaster} | News: {sentiment['avg']:.2f} | RSI Adj: {prediction['rsi_factor']})</i></p>
+    </div>
+"""
+
+
+def news_box(sentiment):
+    latest_headlines = sentiment['headlines']
+    return f"""
+    <div class="box" style="width: 600px; text-align: left;">
+        <h2>📰 Top Market News</h2>
+        <ul style="font-size: 13px; line-height: 1.6;">
+            {''.join([f'<li>{html.escape(h)}</li>' for h in latest_headlines]) if latest_headlines else '<li>No news found</li>'}
+        </ul>
+    </div>
+"""
+
+
+def chart_html(chart, symbol, prediction, interval):
+    """Chart div, plus the live-update script for intraday bars"""
+    if interval in INTRADAY_INTERVALS:
+        return chart + live.client_script(symbol, interval, prediction['last_date'])
+    return chart
+
+
+def not_available_html(symbol):
+    return (f'<div class="error-msg"><h2>❌ Data Not Available</h2>'
+            f"<p>Stock '{html.escape(symbol)}' not found or Yahoo Finance API is temporarily unavailable. "
+            f'Check the symbol, try another stock or refresh in a minute.</p></div>')
+
+
+@stage("render", inputs=("resolve", "indicators", "prediction", "sentiment", "figure"),
+       params=("interval", "selected", "period", "start", "end", "forecaster"),
+       quota=PAGE_CACHE_BYTES)
+def render_stage(symbol, series, prediction, sentiment, chart, interval, selected, period,
+                 start, end, forecaster):
+    """Full dashboard page: selector, summary boxes, news and the chart"""
+    return "".join([
+        page_head(),
+        selector_html(symbol, selected or interval, period, start, end, forecaster),
+        ANALYSIS_HEADER,
+        price_box(series, interval),
+        prediction_box(prediction, sentiment, interval, forecaster),
+        news_box(sentiment),
+        chart_html(chart, symbol, prediction, interval),
+        PAGE_END,
+    ])
+
+
+def dashboard_params(query, interval=DEFAULT_INTERVAL, period=DEFAULT_PERIOD, start=None,
+                     end=None, forecaster=forecast.DEFAULT_FORECASTER):
+    """Pipeline run parameters for the dashboard's arguments (ValueError if invalid)"""
+    if forecaster not in forecast.FORECASTERS:
+        raise ValueError(f"forecaster must be one of {list(forecast.FORECASTERS)}")
+    resolved, range_start, range_end = history_range(interval, period, start, end)
+    if start:
+        period = None    # an explicit start overrides the period
+    return dict(query=query, interval=resolved, selected=interval, period=period,
+                start=range_start, end=range_end, forecaster=forecaster)
+
+
+def analyze(query, interval=DEFAULT_INTERVAL, targets=("render",), refresh=(),
+            period=DEFAULT_PERIOD, start=None, end=None, forecaster=forecast.DEFAULT_FORECASTER):
+    """Run the pipeline for a symbol; returns {stage: value} for targets"""
+    params = dashboard_params(query, interval, period, start, end, forecaster)
+    return dashboard_pipeline.run(tuple(targets), refresh=refresh, **params)
+
+
+def generate_dashboard(symbol, interval=DEFAULT_INTERVAL, period=DEFAULT_PERIOD, start=None,
+                       end=None, forecaster=forecast.DEFAULT_FORECASTER):
+    """Generate stock dashboard for given symbol"""
+    print(f"--- 🚀 ANALYZING: {symbol} ({interval}, {start or period} → {end or 'today'}) ---")
+    try:
+        report = analyze(symbol, interval, period=period, start=start, end=end,
+                         forecaster=forecaster)['render']
+        print("✅ Dashboard generated successfully")
+        return report
+    except Exception as e:
+        print(f"❌ Error generating dashboard: {e}")
+        # The page only says "not available", so keep the full trace in the log
+        traceback.print_exc()
+        return None
+
+
+def stream_dashboard(symbol, interval=DEFAULT_INTERVAL, period=DEFAULT_PERIOD, start=None,
+                     end=None, forecaster=forecast.DEFAULT_FORECASTER):
+    """generate_dashboard() as a stream of HTML pieces, each sent once its stages are done.
+
+    The head (CSS, scripts) and the forms go out before any data is fetched.
+    Invalid arguments raise ValueError here, before the response starts.
+    """
+    params = dashboard_params(symbol, interval, period, start, end, forecaster)
+    return _dashboard_pieces(params)
+
+
+def _dashboard_pieces(params):
+    interval = params['interval']
+
+    def shell(symbol):
+        return (selector_html(symbol, params['selected'], params['period'], params['start'],
+                              params['end'], params['forecaster']) + ANALYSIS_HEADER)
+
+    # The head (CSS, scripts) goes out first; the forms show the resolved ticker,
+    # which is a cheap, cached stage
+    yield page_head()
+    print(f"--- 🚀 STREAMING: {params['query']} ({interval}) ---")
+    values = {}
+    try:
+        for name, value in dashboard_pipeline.iterate(
+                ("resolve", "indicators", "sentiment", "prediction", "figure"), **params):
+            values[name] = value
+            if name == "resolve":
+                yield shell(value)
+            elif name == "indicators":
+                yield price_box(value, interval)
+            elif name == "prediction":
+                # The prediction needs the news mood, so both boxes are ready together
+                yield (prediction_box(value, values["sentiment"], interval, params['forecaster'])
+                       + news_box(values["sentiment"]))
+            elif name == "figure":
+                yield chart_html(value, values["resolve"], values["prediction"], interval)
+        print("✅ Dashboard streamed successfully")
+    except Exception as e:
+        print(f"❌ Error generating dashboard: {e}")
+        traceback.print_exc()
+        if "resolve" not in values:
+            yield shell(params['query'])
+        yield not_available_html(values.get("resolve", params['query']))
+    yield PAGE_END
@@ -0,0 +1,288 @@
+"""
+Local Price Store
+Daily OHLCV history per symbol in SQLite, with weekly and monthly bars
+pre-aggregated at write time. Rows are clustered on (symbol, resolution, day)
+so any date range is a single index range scan, and long views read the
+coarse tables: 20 years of monthly bars is 240 rows, fewer than 1 year daily.
+
+Upstream is only asked for what the store is missing: older history than
+has been fetched so far, or the latest bars once they are DAILY_REFRESH_TTL old.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import datetime as dt
+
+import numpy as np
+
+from ohlcv import OHLCV, PRICE_DTYPE
+
+# --- CONFIGURATION ---
+STORE_DB = os.environ.get(
+    "PRICE_STORE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "prices.sqlite"),
+)
+RESOLUTIONS = ("1d", "1wk", "1mo")
+DAILY_REFRESH_TTL = 300
+HEAD_SLACK_DAYS = 7     # history starting this long after the asked date = listing date
+
+# Chart span (days) -> resolution picked for interval='auto'
+AUTO_RESOLUTION = ((2 * 366, "1d"), (10 * 366, "1wk"))
+
+EPOCH = dt.date(1970, 1, 1)
+
+
+def to_epoch_day(day):
+    return (day - EPOCH).days
+
+
+def from_epoch_day(t):
+    return EPOCH + dt.timedelta(days=int(t))
+
+
+def auto_resolution(start, end):
+    """Coarsest-needed resolution for a span; start=None means 'max'"""
+    if start is None:
+        return "1mo"
+    span = (end - start).days
+    for limit, resolution in AUTO_RESOLUTION:
+        if span <= limit:
+            return resolution
+    return "1mo"
+
+
+def period_start(t, resolution):
+    """Epoch day(s) of the Monday / first of the month a day falls in"""
+    t = np.asarray(t, dtype=np.int64)
+    if resolution == "1wk":
+        # 1970-01-01 was a Thursday, so Monday-based weekday is (t + 3) % 7
+        return t - (t + 3) % 7
+    if resolution == "1mo":
+        return t.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    return t
+
+
+def aggregate(t, o, h, l, c, v, resolution):
+    """Daily arrays (sorted by t) -> weekly/monthly bars labelled by period start"""
+    keys = period_start(t, resolution)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(t)] - 1
+    return (keys[starts], o[starts], np.maximum.reduceat(h, starts),
+            np.minimum.reduceat(l, starts), c[ends], np.add.reduceat(v, starts))
+
+
+def _reaches_listing(series, start):
+    """True once a fetch has gone back to the first day the symbol traded"""
+    return start is None or int(series.t[0]) > to_epoch_day(start) + HEAD_SLACK_DAYS
+
+
+class PriceStore:
+    """SQLite-backed multi-resolution OHLCV history"""
+
+    def __init__(self, path=STORE_DB):
+        self.path = path
+        self._local = threading.local()
+        self._listeners = []
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bars ("
+                " symbol TEXT, res TEXT, t INTEGER,"
+                " open REAL, high REAL, low REAL, close REAL, volume INTEGER,"
+                " PRIMARY KEY (symbol, res, t)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                " symbol TEXT PRIMARY KEY, first_t INTEGER, last_t INTEGER,"
+                " complete_head INTEGER, fetched_at REAL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # --- WRITES ---
+    def subscribe(self, listener):
+        """Call listener(symbol, last_t) whenever a symbol's newest bars are written"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def upsert_daily(self, series, complete_head=False):
+        """Store daily bars and rebuild the weekly/monthly bars they touch"""
+        if len(series) == 0:
+            return
+        symbol = series.symbol
+        t = series.t.astype(np.int64)
+        rows = zip(t.tolist(), series.open.tolist(), series.high.tolist(),
+                   series.low.tolist(), series.close.tolist(), series.volume.tolist())
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars VALUES (?, '1d', ?, ?, ?, ?, ?, ?)",
+                ((symbol,) + r for r in rows),
+            )
+            # Re-aggregate each resolution from the start of its first touched period
+            starts = {resolution: int(period_start(t[0], resolution))
+                      for resolution in RESOLUTIONS[1:]}
+            daily = self._read(conn, symbol, "1d", min(starts.values()), None)
+            for resolution, from_t in starts.items():
+                first = np.searchsorted(daily[0], from_t)
+                agg = aggregate(*(a[first:] for a in daily), resolution)
+                conn.execute("DELETE FROM bars WHERE symbol = ? AND res = ? AND t >= ?",
+                             (symbol, resolution, int(agg[0][0])))
+                conn.executemany(
+                    f"INSERT INTO bars VALUES (?, '{resolution}', ?, ?, ?, ?, ?, ?)",
+                    ((symbol,) + r for r in zip(*(a.tolist() for a in agg))),
+                )
+
+            row = conn.execute("SELECT first_t, last_t, complete_head FROM coverage WHERE symbol = ?",
+                               (symbol,)).fetchone()
+            first_t, last_t = int(t[0]), int(t[-1])
+            if row is not None:
+                first_t, last_t = min(first_t, row[0]), max(last_t, row[1])
+                complete_head = complete_head or bool(row[2])
+            conn.execute("INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?, ?)",
+                         (symbol, first_t, last_t, int(complete_head), time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        # Older history being back-filled doesn't change the latest bar
+        if row is None or int(t[-1]) >= row[1]:
+            for listener in self._listeners:
+                try:
+                    listener(symbol, last_t)
+                except Exception as e:
+                    print(f"⚠️ Price store listener failed: {str(e)[:60]}")
+
+    # --- READS ---
+    @staticmethod
+    def _read(conn, symbol, resolution, start_t, end_t):
+        sql = "SELECT t, open, high, low, close, volume FROM bars WHERE symbol = ? AND res = ? AND t >= ?"
+        args = [symbol, resolution, -10 ** 9 if start_t is None else int(start_t)]
+        if end_t is not None:
+            sql += " AND t <= ?"
+            args.append(int(end_t))
+        rows = conn.execute(sql + " ORDER BY t", args).fetchall()
+        data = np.array(rows, dtype=np.float64).reshape(-1, 6)
+        return (data[:, 0].astype(np.int64), data[:, 1], data[:, 2], data[:, 3],
+                data[:, 4], data[:, 5].astype(np.int64))
+
+    def coverage(self, symbol):
+        row = self._conn().execute(
+            "SELECT first_t, last_t, complete_head, fetched_at FROM coverage WHERE symbol = ?",
+            (symbol,)).fetchone()
+        if row is None:
+            return None
+        return {"first_t": row[0], "last_t": row[1], "complete_head": bool(row[2]),
+                "fetched_at": row[3]}
+
+    def range(self, symbol, resolution, start=None, end=None):
+        """Bars between two dates (inclusive) as an OHLCV series"""
+        start_t = None if start is None else to_epoch_day(start)
+        end_t = None if end is None else to_epoch_day(end)
+        if start_t is not None:
+            # Include the week/month that contains start
+            start_t = int(period_start(start_t, resolution))
+        t, o, h, l, c, v = self._read(self._conn(), symbol, resolution, start_t, end_t)
+        return OHLCV(symbol, resolution, "D", t, o.astype(PRICE_DTYPE), h.astype(PRICE_DTYPE),
+                     l.astype(PRICE_DTYPE), c.astype(PRICE_DTYPE), v)
+
+    def panel(self, symbols, resolution, start=None, end=None):
+        """Bars of many symbols aligned by date: (t, {field: dates x symbols}), NaN gaps"""
+        frames = [self.range(symbol, resolution, start, end) for symbol in symbols]
+        t = np.unique(np.concatenate([f.t for f in frames])) if frames else np.zeros(0, np.int64)
+        fields = {k: np.full((len(t), len(symbols)), np.nan)
+                  for k in ("open", "high", "low", "close", "volume")}
+        for j, frame in enumerate(frames):
+            rows = np.searchsorted(t, frame.t)
+            for k, values in fields.items():
+                values[rows, j] = getattr(frame, k)
+        return t, fields
+
+    # --- SYNC WITH UPSTREAM ---
+    def plan(self, symbol, start, end):
+        """Upstream requests needed to serve [start, end]: [(from, to, is_head)]
+
+        from None means the full listed history.
+        """
+        today = dt.date.today()
+        cov = self.coverage(symbol)
+        if cov is None:
+            return [(start, today, True)]
+
+        requests = []
+        first = from_epoch_day(cov["first_t"])
+        last = from_epoch_day(cov["last_t"])
+        if not cov["complete_head"] and (start is None or start < first):
+            requests.append((start, first, True))
+        if end >= last and time.time() - cov["fetched_at"] > DAILY_REFRESH_TTL:
+            # Re-fetch the last stored day too: it may have been a partial session
+            requests.append((last, today, False))
+        return requests
+
+    def ensure(self, symbol, start, end, fetch):
+        """Fetch whatever part of [start, end] the store lacks or holds stale.
+
+        fetch(symbol, start_date_or_None, end_date) -> daily OHLCV or None.
+        """
+        for fetch_start, fetch_end, head in self.plan(symbol, start, end):
+            series = fetch(symbol, fetch_start, fetch_end)
+            if series is not None:
+                self.upsert_daily(series, complete_head=head and _reaches_listing(series, fetch_start))
+            else:
+                self._touch(symbol)
+
+    def ensure_many(self, symbols, start, end, fetch_many):
+        """ensure() for many symbols with at most two upstream requests.
+
+        fetch_many(symbols, start_date_or_None, end_date) -> {symbol: daily OHLCV}.
+        Symbols missing older history share one request, those only needing
+        the latest bars share another.
+        """
+        groups = {True: {}, False: {}}
+        for symbol in symbols:
+            requests = self.plan(symbol, start, end)
+            if requests:
+                head = any(r[2] for r in requests)
+                froms = [r[0] for r in requests]
+                groups[head][symbol] = None if None in froms else min(froms)
+
+        today = dt.date.today()
+        for head, wanted in groups.items():
+            if not wanted:
+                continue
+            froms = list(wanted.values())
+            fetch_start = None if None in froms else min(froms)
+            fetched = fetch_many(list(wanted), fetch_start, today)
+            for symbol in wanted:
+                series = fetched.get(symbol)
+                if series is not None:
+                    self.upsert_daily(series, complete_head=head and _reaches_listing(series, fetch_start))
+                else:
+                    self._touch(symbol)
+
+    def _touch(self, symbol):
+        # Nothing new upstream; don't ask again until the TTL passes
+        self._conn().execute("UPDATE coverage SET fetched_at = ? WHERE symbol = ?",
+                             (time.time(), symbol))
+
+    def load(self, symbol, resolution, start, end, fetch):
+        """Sync with upstream as needed, then serve the range from the store"""
+        try:
+            self.ensure(symbol, start, end, fetch)
+        except Exception as e:
+            print(f"⚠️ History sync failed for {symbol}: {str(e)[:60]}")
+        return self.range(symbol, resolution, start, end)
+
+
+store = PriceStore()
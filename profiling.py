@@ -0,0 +1,247 @@
+"""
+Request Profiler
+Opt-in sampling profiler for Flask requests. A profiled request has its
+thread's stack sampled every PROFILE_INTERVAL seconds. The samples are saved
+as a collapsed-stack file (one "frame;frame;frame count" line per stack), the
+input format of flamegraph.pl, speedscope.app and inferno.
+
+A request is profiled when an admin adds ?profile=1, or at random with
+probability PROFILE_SAMPLE_RATE. Admin means the X-Admin-Token header matches
+ADMIN_TOKEN; with no token configured nobody is admin (behind a reverse proxy
+every client looks like localhost). The slowest recent profiles are listed at
+/admin/profiles.
+"""
+
+import os
+import sys
+import hmac
+import time
+import random
+import sqlite3
+import threading
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode
+
+from flask import Response, abort, g, jsonify, request, stream_with_context
+
+# --- CONFIGURATION ---
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "profiles"),
+)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = 0.005        # seconds between stack samples
+INDEX_SIZE = 200                # profiles kept (older ones and their files are deleted)
+SLOWEST_LIMIT = 20
+MAX_SLOWEST_LIMIT = INDEX_SIZE
+
+# Long-lived or trivial endpoints that sampling never picks
+SKIP_ENDPOINTS = {"stream", "export_data", "assets", "profiles", "profile_file", "health",
+                  "suggest", "cache_stats"}
+
+
+class Sampler(threading.Thread):
+    """Background thread counting the stacks one other thread is running"""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileIndex:
+    """Rolling SQLite index of saved profiles, shared by all workers"""
+
+    def __init__(self, directory=PROFILE_DIR):
+        self.directory = directory
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), timeout=10,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL, method TEXT, path TEXT,"
+                " query TEXT, status INTEGER, seconds REAL, samples INTEGER, file TEXT)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def save(self, sampler, seconds, status):
+        """Write the collapsed stacks and index them; returns the profile id"""
+        conn = self._conn()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        slug = request.path.strip("/").replace("/", "_") or "index"
+        filename = f"{stamp}-{slug}-{os.getpid()}-{int(seconds * 1000)}ms.collapsed"
+        with open(os.path.join(self.directory, filename), "w") as f:
+            f.write(sampler.collapsed())
+
+        cursor = conn.execute(
+            "INSERT INTO profiles (created, method, path, query, status, seconds, samples, file)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), request.method, request.path,
+             _saved_query(), status, seconds,
+             sampler.samples, filename),
+        )
+        self._trim(conn)
+        return cursor.lastrowid
+
+    def _trim(self, conn):
+        stale = conn.execute(
+            "SELECT id, file FROM profiles ORDER BY id DESC LIMIT -1 OFFSET ?", (INDEX_SIZE,)
+        ).fetchall()
+        for profile_id, filename in stale:
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+            conn.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
+
+    def slowest(self, limit=SLOWEST_LIMIT):
+        rows = self._conn().execute(
+            "SELECT id, created, method, path, query, status, seconds, samples, file"
+            " FROM profiles ORDER BY seconds DESC LIMIT ?", (limit,)
+        ).fetchall()
+        keys = ("id", "created", "method", "path", "query", "status", "seconds", "samples", "file")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def file_for(self, profile_id):
+        row = self._conn().execute("SELECT file FROM profiles WHERE id = ?",
+                                   (profile_id,)).fetchone()
+        return None if row is None else os.path.join(self.directory, row[0])
+
+
+index = ProfileIndex()
+
+
+def is_admin():
+    """X-Admin-Token matches ADMIN_TOKEN (never admin when it is unset)"""
+    if not ADMIN_TOKEN:
+        return False
+    supplied = request.headers.get("X-Admin-Token", "")
+    return hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode())
+
+
+def _saved_query():
+    """Query string for the index, minus any token a client put in the URL"""
+    pairs = parse_qsl(request.query_string.decode(errors="replace"), keep_blank_values=True)
+    return urlencode([(k, v) for k, v in pairs if k.lower() != "token"])
+
+
+def _should_profile():
+    if request.args.get("profile") == "1" and is_admin():
+        return True
+    return (PROFILE_SAMPLE_RATE > 0 and request.endpoint not in SKIP_ENDPOINTS
+            and random.random() < PROFILE_SAMPLE_RATE)
+
+
+def _start():
+    if _should_profile():
+        g.profile_started = time.perf_counter()
+        g.profiler = Sampler(threading.get_ident())
+        g.profiler.start()
+
+
+def _finish(status):
+    sampler = g.pop("profiler", None)
+    if sampler is None:
+        return None
+    seconds = time.perf_counter() - g.pop("profile_started")
+    sampler.stop()
+    try:
+        profile_id = index.save(sampler, seconds, status)
+    except Exception as e:
+        print(f"⚠️ Could not save profile: {e}")
+        return None
+    print(f"🔥 Profiled {request.path} in {seconds * 1000:.0f} ms "
+          f"({sampler.samples} samples) -> /admin/profiles/{profile_id}")
+    return profile_id
+
+
+def _profiled(body, status):
+    try:
+        yield from body
+    finally:
+        _finish(status)
+
+
+def _after(response):
+    if "profiler" in g and response.is_streamed:
+        # The body is generated after this hook runs: keep sampling until it is sent
+        g.profile_streaming = True
+        response.response = stream_with_context(_profiled(response.response, response.status_code))
+        return response
+    profile_id = _finish(response.status_code)
+    if profile_id is not None:
+        response.headers["X-Profile-Id"] = str(profile_id)
+    return response
+
+
+def _teardown(error):
+    # Only still running if the view raised before after_request (or it is streaming)
+    if "profiler" in g and not g.get("profile_streaming"):
+        _finish(500)
+
+
+def profiles():
+    """Slowest recent profiled requests"""
+    if not is_admin():
+        abort(403)
+    try:
+        limit = int(request.args.get("limit", SLOWEST_LIMIT))
+    except ValueError:
+        limit = SLOWEST_LIMIT
+    limit = max(1, min(limit, MAX_SLOWEST_LIMIT))
+    return jsonify({"slowest": index.slowest(limit)})
+
+
+def profile_file(profile_id):
+    """One profile's collapsed stacks (open in speedscope.app or flamegraph.pl)"""
+    if not is_admin():
+        abort(403)
+    path = index.file_for(profile_id)
+    if path is None or not os.path.exists(path):
+        abort(404)
+    with open(path) as f:
+        body = f.read()
+    return Response(body, mimetype="text/plain",
+                    headers={"Content-Disposition": f"attachment; filename={os.path.basename(path)}"})
+
+
+def register(app):
+    """Install the profiling hooks and /admin/profiles routes on a Flask app"""
+    app.before_request(_start)
+    app.after_request(_after)
+    app.teardown_request(_teardown)
+    app.add_url_rule("/admin/profiles", "profiles", profiles)
+    app.add_url_rule("/admin/profiles/<int:profile_id>", "profile_file", profile_file)
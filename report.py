@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Static Report Generator
+Renders the full dashboard for a universe of symbols into static files,
+using the same pipeline as the Flask app, so end-of-day reports can be
+served by nginx (or any static host) without running any Python:
+
+    reports/
+        index.html              links to every report, with its prediction
+        TCS.NS.html             the dashboard page
+        TCS.NS.json             last bar, prediction, sentiment, headlines
+        assets/plotly.<hash>.js fingerprinted assets (+ .gz for gzip_static)
+        manifest.json           data version of every report
+
+Price history is synced into the local store first (batched upstream
+requests). A symbol is re-rendered only when its bars or the report options
+changed since the last run; rendering is spread over a process pool.
+
+    python report.py --out reports --workers 4
+    python report.py TCS.NS INFY.NS --period 5y --forecaster ridge --force
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import datetime as dt
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import price_store
+
+MANIFEST = "manifest.json"
+
+
+def report_name(symbol):
+    """File stem for a symbol (M&M.NS -> M_M.NS)"""
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in symbol)
+
+
+def _write(path, data):
+    """Atomic write, so the web server never serves a half-written file"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _plain(value):
+    """Stage results -> JSON-safe values"""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items() if not isinstance(v, np.ndarray)}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, (dt.date, dt.datetime)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def data_version(symbol, interval, start, end, options):
+    """Fingerprint of the stored bars in [start, end] plus the report options.
+
+    options are the arguments as given (e.g. period '1y'), not the resolved
+    dates, which move every day for a rolling period even when no bar does.
+    """
+    series = price_store.store.range(symbol, interval, start, end)
+    if len(series) == 0:
+        return None
+    return hashlib.sha1((series.fingerprint() + options).encode()).hexdigest()
+
+
+def render_symbol(symbol, out_dir, interval, period, start, end, forecaster):
+    """Worker: run the dashboard pipeline for one symbol and write its files"""
+    from pipeline import analyze
+    import assets
+
+    began = time.perf_counter()
+    result = analyze(symbol, interval, targets=("render", "prediction", "sentiment", "indicators"),
+                     period=period, start=start, end=end, forecaster=forecaster)
+    series = result["indicators"]
+    stem = report_name(symbol)
+
+    summary = {
+        "symbol": symbol,
+        "interval": series.interval,
+        "generated": dt.datetime.now().isoformat(timespec="seconds"),
+        "last_bar": {
+            "date": series.datetime_at(-1).date().isoformat(),
+            "open": float(series.open[-1]), "high": float(series.high[-1]),
+            "low": float(series.low[-1]), "close": float(series.close[-1]),
+            "volume": int(series.volume[-1]), "sma20": float(series.sma20[-1]),
+            "rsi": float(series.rsi[-1]),
+        },
+        "prediction": _plain(result["prediction"]),
+        "sentiment": _plain(result["sentiment"]),
+        "forecaster": forecaster,
+    }
+    # Relative asset links, so the reports also work when hosted under a subpath
+    _write(os.path.join(out_dir, f"{stem}.html"), assets.relative(result["render"]))
+    _write(os.path.join(out_dir, f"{stem}.json"), json.dumps(summary, indent=2))
+    return summary, time.perf_counter() - began
+
+
+def write_assets(out_dir):
+    """Copy the fingerprinted assets the pages link to (and pre-gzipped twins)"""
+    import assets
+
+    asset_dir = os.path.join(out_dir, "assets")
+    os.makedirs(asset_dir, exist_ok=True)
+    for name in assets.SOURCES:
+        asset = assets.get(name)
+        path = os.path.join(asset_dir, asset.filename)
+        if not os.path.exists(path):
+            _write(path, asset.body)
+            _write(path + ".gz", asset.gzipped)
+
+
+def write_index(out_dir, manifest):
+    rows = []
+    for symbol in sorted(manifest):
+        entry = manifest[symbol]
+        rows.append(
+            f"<tr><td><a href=\"{entry['file']}\">{symbol}</a></td>"
+            f"<td>{entry['date']}</td><td>₹{entry['close']:.2f}</td>"
+            f"<td>{entry['target_date']}</td><td>₹{entry['predicted_close']:.2f}</td>"
+            f"<td>{entry['rendered']}</td></tr>"
+        )
+    html = f"""<html>
+<head><meta charset="utf-8"><title>Stock Reports</title>
+<style>
+body{{background: #111; color: #ddd; font-family: sans-serif; padding: 20px;}}
+a{{color: #00ccff;}} td, th{{padding: 6px 14px; text-align: left;}} th{{color: #00ccff;}}
+</style></head>
+<body>
+<h1>🤖 AI Stock Reports</h1>
+<table>
+<tr><th>Stock</th><th>Last Bar</th><th>Close</th><th>Target Date</th><th>Target</th><th>Rendered</th></tr>
+{''.join(rows)}
+</table>
+</body>
+</html>
+"""
+    _write(os.path.join(out_dir, "index.html"), html)
+
+
+def generate_reports(symbols, out_dir, interval, period, start, end, forecaster,
+                     workers=None, force=False):
+    """Sync, diff against the manifest, render what changed; returns (rendered, skipped)
+
+    interval/period/start/end are the dashboard's arguments (e.g. 'auto', '1y').
+    """
+    from pipeline import fetch_history_batch, history_range
+    from export import EXPORT_BATCH
+
+    resolved, range_start, range_end = history_range(interval, period, start, end)
+    options = f"{resolved}|{period}|{start}|{end}|{forecaster}"
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    for i in range(0, len(symbols), EXPORT_BATCH):
+        price_store.store.ensure_many(symbols[i:i + EXPORT_BATCH], range_start, range_end,
+                                      fetch_history_batch)
+
+    todo = {}
+    skipped = 0
+    for symbol in symbols:
+        version = data_version(symbol, resolved, range_start, range_end, options)
+        if version is None:
+            print(f"⚠️ {symbol}: no data, skipped")
+            continue
+        entry = manifest.get(symbol)
+        unchanged = (entry is not None and entry["version"] == version and
+                     os.path.exists(os.path.join(out_dir, entry["file"])))
+        if unchanged and not force:
+            skipped += 1
+        else:
+            todo[symbol] = version
+
+    write_assets(out_dir)
+    print(f"🖨️ Rendering {len(todo)} reports ({skipped} unchanged)...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render_symbol, symbol, out_dir, interval, period, start, end,
+                               forecaster): symbol for symbol in todo}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                summary, seconds = future.result()
+            except Exception as e:
+                print(f"❌ {symbol}: {str(e)[:80]}")
+                continue
+            prediction = summary["prediction"]
+            manifest[symbol] = {
+                "version": todo[symbol],
+                "file": f"{report_name(symbol)}.html",
+                "rendered": summary["generated"],
+                "date": summary["last_bar"]["date"],
+                "close": summary["last_bar"]["close"],
+                "target_date": prediction["tomorrow_date"][:10],
+                "predicted_close": prediction["predicted_close"],
+            }
+            print(f"✅ {symbol} in {seconds:.2f}s")
+
+    _write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+    write_index(out_dir, manifest)
+    return len(todo), skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render dashboard reports to static files")
+    parser.add_argument('symbols', nargs='*', help="Tickers (default: COMMON_STOCKS)")
+    parser.add_argument('--out', default="reports", help="Output directory (default: reports)")
+    parser.add_argument('--period', default=None, help="History window (default: dashboard default)")
+    parser.add_argument('--start', help="Range start, YYYY-MM-DD (overrides --period)")
+    parser.add_argument('--end', help="Range end, YYYY-MM-DD (default: today)")
+    parser.add_argument('--interval', default=None, help="1d, 1wk, 1mo or auto (default)")
+    parser.add_argument('--forecaster', default=None, help="linear (default), ridge or holt")
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="Re-render unchanged symbols too")
+    args = parser.parse_args()
+
+    from pipeline import (COMMON_STOCKS, AUTO_INTERVAL, DEFAULT_PERIOD, INTRADAY_INTERVALS,
+                          get_ticker_from_name, history_range)
+    from forecast import FORECASTERS, DEFAULT_FORECASTER
+
+    period = args.period or DEFAULT_PERIOD
+    forecaster = args.forecaster or DEFAULT_FORECASTER
+    if forecaster not in FORECASTERS:
+        print(f"❌ --forecaster must be one of {list(FORECASTERS)}")
+        sys.exit(1)
+    interval = args.interval or AUTO_INTERVAL
+    try:
+        resolved, _, _ = history_range(interval, period, args.start, args.end)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if resolved in INTRADAY_INTERVALS:
+        print("❌ Static reports cover daily, weekly and monthly bars only")
+        sys.exit(1)
+    symbols = list(dict.fromkeys(get_ticker_from_name(s) for s in args.symbols)) or COMMON_STOCKS
+
+    began = time.perf_counter()
+    rendered, skipped = generate_reports(symbols, args.out, interval, period, args.start,
+                                         args.end, forecaster, workers=args.workers,
+                                         force=args.force)
+    print("\n" + "=" * 60)
+    print(f"🖨️ {rendered} rendered, {skipped} unchanged, in {time.perf_counter() - began:.1f}s")
+    print(f"📁 {os.path.abspath(args.out)}/index.html")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
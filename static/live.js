@@ -0,0 +1,46 @@
+// Live intraday updates: extend the rendered chart in place as bars arrive.
+// Configuration comes from the inline window.LIVE_CONFIG set by live.client_script().
+(function () {
+    var cfg = window.LIVE_CONFIG;
+    if (!cfg) { return; }
+    var gd = document.getElementById(cfg.div);
+    var tr = cfg.traces;
+    function setText(id, value) {
+        var el = document.getElementById(id);
+        if (el) { el.textContent = value; }
+    }
+    var lastId = null;
+    function onBars(e) {
+        var d = JSON.parse(e.data), b = d.bars, p = d.prediction;
+        lastId = e.lastEventId || lastId;
+        if (b.t.length) {
+            Plotly.extendTraces(gd, {x: [b.t], open: [b.o], high: [b.h], low: [b.l], close: [b.c]}, [tr.ohlc]);
+            Plotly.extendTraces(gd, {x: [b.t], y: [b.v], 'marker.color': [b.color]}, [tr.volume]);
+            Plotly.extendTraces(gd, {x: [b.t, b.t], y: [b.sma, b.rsi]}, [tr.sma, tr.rsi]);
+            var n = b.t.length - 1;
+            setText('last-date', b.t[n].replace('T', ' '));
+            setText('last-close', b.c[n].toFixed(2));
+            setText('last-high', b.h[n].toFixed(2));
+            setText('last-low', b.l[n].toFixed(2));
+            setText('last-volume', Math.floor(b.v[n] / 1000));
+            setText('last-rsi', b.rsi[n].toFixed(1));
+        }
+        Plotly.restyle(gd, {x: [p.trend_t, [p.t, p.t]], y: [p.trend_y, [p.low, p.high]]}, [tr.trend, tr.range]);
+        Plotly.restyle(gd, {x: [[p.t]], y: [[p.close]], text: [[p.close.toFixed(1)]]}, [tr.prediction]);
+        setText('target-date', p.t.replace('T', ' '));
+        setText('pred-close', p.close.toFixed(2));
+        setText('pred-high', p.high.toFixed(2));
+        setText('pred-low', p.low.toFixed(2));
+    }
+    function connect() {
+        var url = lastId ? cfg.url.replace(/since=[^&]*/, 'since=' + encodeURIComponent(lastId)) : cfg.url;
+        var source = new EventSource(url);
+        source.addEventListener('bars', onBars);
+        // The browser only reconnects by itself after a dropped stream, not after
+        // an error response (503 when the server has too many viewers)
+        source.onerror = function () {
+            if (source.readyState === EventSource.CLOSED) { setTimeout(connect, cfg.retry); }
+        };
+    }
+    connect();
+})();
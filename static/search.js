@@ -0,0 +1,28 @@
+// Search-as-you-type: fill the custom stock box's <datalist> from /api/suggest.
+(function () {
+    var input = document.getElementById('symbol-search');
+    var list = document.getElementById('symbol-suggestions');
+    if (!input || !list) { return; }
+    var timer = null, latest = '';
+    function show(matches) {
+        list.innerHTML = '';
+        matches.forEach(function (m) {
+            var option = document.createElement('option');
+            option.value = m.symbol;
+            option.label = m.name + ' (' + m.exchange + ')';
+            list.appendChild(option);
+        });
+    }
+    input.addEventListener('input', function () {
+        var q = input.value.trim();
+        clearTimeout(timer);
+        if (q.length < 2) { show([]); return; }
+        timer = setTimeout(function () {
+            latest = q;
+            fetch('/api/suggest?q=' + encodeURIComponent(q))
+                .then(function (r) { return r.ok ? r.json() : {suggestions: []}; })
+                .then(function (d) { if (q === latest) { show(d.suggestions); } })
+                .catch(function () {});
+        }, 80);
+    });
+})();
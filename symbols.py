@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Offline Symbol Index
+In-memory search over the NSE/BSE equity master lists, so company names
+resolve to tickers and the search box can suggest as you type without a
+network round trip.
+
+Matching, best first: exact ticker, prefix of the ticker / a name word / the
+whole name, then trigram similarity (Dice coefficient) for typos and partial
+words. NSE listings rank above BSE ones for the same score.
+
+Master files are read from SYMBOL_MASTER (paths separated by os.pathsep),
+else data/EQUITY_L.csv (NSE) and data/EQUITY_BSE.csv (BSE) when present, plus
+the small symbol_master.csv shipped with the app. To fetch the full NSE list:
+
+    python symbols.py --update
+    python symbols.py "tata con"          # try a query (prints timings)
+"""
+
+import os
+import csv
+import sys
+import time
+import bisect
+import argparse
+import threading
+from collections import Counter
+
+# --- CONFIGURATION ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEED_MASTER = os.path.join(BASE_DIR, "symbol_master.csv")
+DEFAULT_MASTERS = [os.path.join(BASE_DIR, "data", "EQUITY_L.csv"),
+                   os.path.join(BASE_DIR, "data", "EQUITY_BSE.csv")]
+NSE_MASTER_URL = "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
+
+SUFFIXES = {"NSE": ".NS", "BSE": ".BO"}
+STOPWORDS = {"limited", "ltd", "the", "and", "of"}
+SUGGEST_LIMIT = 8
+PREFIX_SCAN = 200           # prefix keys examined per query
+MIN_SIMILARITY = 0.3        # trigram Dice below this is not a suggestion
+RESOLVE_MIN_SCORE = 150     # ...and below this (Dice 0.5) not a confident resolution
+RESOLVE_MARGIN = 100        # best must beat the next company by a score band to resolve
+
+# score bands
+EXACT_TICKER = 1000
+TICKER_PREFIX = 600
+NAME_PREFIX = 500
+WORD_PREFIX = 400
+EXACT_BONUS = 50
+TRIGRAM_WEIGHT = 300
+
+
+def normalize(text):
+    """Lowercase words without punctuation or legal-form noise"""
+    cleaned = "".join(c if c.isalnum() else " " for c in str(text).lower())
+    return " ".join(w for w in cleaned.split() if w not in STOPWORDS)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def looks_like_ticker(query):
+    """Same rule as get_ticker_from_name: no spaces and mostly uppercase"""
+    return " " not in query and sum(1 for c in query if c.isupper()) > len(query) / 2
+
+
+def split_suffix(query):
+    """'tcs.ns' -> ('TCS', '.NS'); no suffix -> ('TCS', None)"""
+    upper = query.strip().upper()
+    for suffix in SUFFIXES.values():
+        if upper.endswith(suffix):
+            return upper[:-len(suffix)], suffix
+    return upper, None
+
+
+def read_master(path):
+    """Rows of (code, name, exchange) from an NSE EQUITY_L or BSE equity list"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [h.strip().upper() for h in next(reader)]
+        if "SYMBOL" in header:
+            code_col, name_col, exchange = header.index("SYMBOL"), header.index("NAME OF COMPANY"), "NSE"
+        elif "SECURITY ID" in header:
+            code_col, exchange = header.index("SECURITY ID"), "BSE"
+            name_col = header.index("ISSUER NAME") if "ISSUER NAME" in header else header.index("SECURITY NAME")
+        else:
+            raise ValueError(f"{path}: not an NSE or BSE equity master file")
+        for row in reader:
+            if len(row) > max(code_col, name_col) and row[code_col].strip():
+                yield row[code_col].strip().upper(), row[name_col].strip(), exchange
+
+
+class SymbolIndex:
+    """Prefix + trigram index over (symbol, name, exchange) entries"""
+
+    def __init__(self, rows):
+        self.entries = []           # (symbol, code, name, exchange, gram count)
+        self.by_code = {}
+        self.grams = {}
+        keys = []
+        seen = set()
+
+        for code, name, exchange in rows:
+            symbol = code + SUFFIXES[exchange]
+            if symbol in seen:
+                continue
+            seen.add(symbol)
+            entry_id = len(self.entries)
+            normalized = normalize(name)
+            grams = trigrams(normalized) | trigrams(code.lower())
+            self.entries.append((symbol, code, name, exchange, len(grams)))
+            self.by_code.setdefault(code.lower(), []).append(entry_id)
+
+            keys.append((code.lower(), entry_id, TICKER_PREFIX))
+            keys.append((normalized, entry_id, NAME_PREFIX))
+            for word in set(normalized.split()):
+                keys.append((word, entry_id, WORD_PREFIX))
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(entry_id)
+
+        keys.sort()
+        self.keys = [k for k, _, _ in keys]
+        self.key_entries = [(entry_id, band) for _, entry_id, band in keys]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _scores(self, query, limit):
+        code, _ = split_suffix(query)
+        normalized = normalize(query)
+        scores = {}
+
+        for entry_id in self.by_code.get(code.lower(), ()):
+            scores[entry_id] = EXACT_TICKER
+        if not normalized:
+            return scores
+
+        start = bisect.bisect_left(self.keys, normalized)
+        for j in range(start, min(start + PREFIX_SCAN, len(self.keys))):
+            key = self.keys[j]
+            if not key.startswith(normalized):
+                break
+            entry_id, band = self.key_entries[j]
+            score = band + (EXACT_BONUS if key == normalized else 0)
+            if score > scores.get(entry_id, 0):
+                scores[entry_id] = score
+
+        if len(scores) < limit:
+            query_grams = trigrams(normalized)
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self.grams.get(gram, ()))
+            for entry_id, count in shared.items():
+                dice = 2 * count / (len(query_grams) + self.entries[entry_id][4])
+                if dice >= MIN_SIMILARITY and entry_id not in scores:
+                    scores[entry_id] = dice * TRIGRAM_WEIGHT
+        return scores
+
+    def _ranked(self, scores, limit):
+        def rank(item):
+            entry_id, score = item
+            symbol, code, name, exchange, _ = self.entries[entry_id]
+            return (-score, exchange != "NSE", len(name), symbol)
+        return sorted(scores.items(), key=rank)[:limit]
+
+    def suggest(self, query, limit=SUGGEST_LIMIT):
+        """Best matches for a partial ticker or company name"""
+        ranked = self._ranked(self._scores(query, limit), limit)
+        return [
+            {"symbol": self.entries[i][0], "name": self.entries[i][2],
+             "exchange": self.entries[i][3], "score": round(score, 1)}
+            for i, score in ranked
+        ]
+
+    def resolve(self, query):
+        """Ticker for a query, or None when nothing matches confidently.
+
+        Ticker-looking queries (and any with an exchange suffix) only match
+        exact tickers, so a listed symbol that is missing from the master is
+        not swapped for a similar one. Names resolve only when one company
+        clearly wins: "tata" matches several, so it is left to the search.
+        """
+        query = str(query).strip()
+        if not query:
+            return None
+        code, suffix = split_suffix(query)
+        if suffix is not None or looks_like_ticker(query):
+            for entry_id in self.by_code.get(code.lower(), ()):
+                symbol = self.entries[entry_id][0]
+                if suffix is None or symbol.endswith(suffix):
+                    return symbol
+            return None
+
+        scores = self._scores(query, 1)
+        ranked = self._ranked(scores, len(scores))
+        if not ranked or ranked[0][1] < RESOLVE_MIN_SCORE:
+            return None
+        best_id, best_score = ranked[0]
+        company = normalize(self.entries[best_id][2])
+        for entry_id, score in ranked[1:]:
+            # The same company's other listing (NSE vs BSE) is not a rival
+            if normalize(self.entries[entry_id][2]) != company:
+                if best_score - score < RESOLVE_MARGIN:
+                    return None
+                break
+        return self.entries[best_id][0]
+
+
+def master_files():
+    configured = os.environ.get("SYMBOL_MASTER")
+    if configured:
+        paths = configured.split(os.pathsep)
+    else:
+        paths = [p for p in DEFAULT_MASTERS if os.path.exists(p)]
+    return paths + [SEED_MASTER]
+
+
+def load_index(paths=None):
+    rows = []
+    for path in paths or master_files():
+        try:
+            rows.extend(read_master(path))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Skipping symbol master {path}: {e}")
+    # NSE first so it wins ties and de-duplication
+    rows.sort(key=lambda r: r[2] != "NSE")
+    return SymbolIndex(rows)
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                began = time.perf_counter()
+                _index = load_index()
+                print(f"🔎 Symbol index: {len(_index)} listings "
+                      f"in {(time.perf_counter() - began) * 1000:.0f} ms")
+    return _index
+
+
+def resolve(query):
+    return get_index().resolve(query)
+
+
+def suggest(query, limit=SUGGEST_LIMIT):
+    return get_index().suggest(query, limit)
+
+
+def update_master(path=DEFAULT_MASTERS[0]):
+    """Download NSE's current equity list into data/"""
+    import requests
+
+    response = requests.get(NSE_MASTER_URL, timeout=30,
+                            headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"})
+    response.raise_for_status()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(response.content)
+    print(f"✅ Saved {path} ({len(response.content) // 1024} KiB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or update the offline symbol index")
+    parser.add_argument('queries', nargs='*', help="Names or tickers to look up")
+    parser.add_argument('--update', action='store_true', help="Download the NSE equity master")
+    parser.add_argument('--limit', type=int, default=SUGGEST_LIMIT)
+    args = parser.parse_args()
+
+    if args.update:
+        update_master()
+    index = get_index()
+    for query in args.queries:
+        repeat = 1000
+        began = time.perf_counter()
+        for _ in range(repeat):
+            matches = index.suggest(query, args.limit)
+        micros = (time.perf_counter() - began) / repeat * 1e6
+        print(f"\n🔎 {query!r} -> {index.resolve(query)}  ({micros:.0f} µs per suggest)")
+        for m in matches:
+            print(f"   {m['symbol']:<16} {m['score']:>7}  {m['name']}")
+    if not args.queries and not args.update:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Cache Disk Tier Tests
+Byte totals kept by the usage triggers match the entries, quotas evict least
+recently used rows, and a broken disk path only logs.
+
+    python -m pytest test_cache.py
+"""
+
+import sqlite3
+
+import pytest
+
+import cache as cache_module
+
+
+def disk_totals(path):
+    conn = sqlite3.connect(path)
+    usage = dict(conn.execute("SELECT ns, bytes FROM usage"))
+    actual = dict(conn.execute("SELECT ns, SUM(size) FROM entries GROUP BY ns"))
+    conn.close()
+    return usage, actual
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    cache = cache_module.Cache(disk_path=str(tmp_path / "cache.sqlite"), disk_bytes=200_000)
+    cache.namespace("a", disk=True, disk_quota=50_000)
+    cache.namespace("b", disk=True)
+    return cache
+
+
+def test_usage_matches_entries(disk_cache):
+    for i in range(20):
+        disk_cache.set("a", i, "x" * 1000)
+        disk_cache.set("b", i, "y" * 2000)
+    disk_cache.set("b", 3, "z" * 10)              # overwrite changes the size
+    disk_cache.delete("b", 4)
+    disk_cache.clear("a", disk=True)
+    usage, actual = disk_totals(disk_cache.disk_path)
+    assert usage["a"] == 0 and "a" not in actual
+    assert usage["b"] == actual["b"]
+
+
+def test_quotas_evict_least_recently_used(disk_cache):
+    for i in range(100):
+        disk_cache.set("a", i, "x" * 1000)
+    usage, actual = disk_totals(disk_cache.disk_path)
+    assert usage["a"] == actual["a"] <= 50_000
+    assert disk_cache._disk_get(disk_cache.namespaces["a"], 99, 0) is not None
+    assert disk_cache._disk_get(disk_cache.namespaces["a"], 0, 0) is None
+
+    for i in range(150):
+        disk_cache.set("b", i, "y" * 2000)
+    usage, actual = disk_totals(disk_cache.disk_path)
+    assert sum(usage.values()) == sum(actual.values()) <= 200_000
+
+
+def test_existing_database_gets_usage(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE entries (ns TEXT, key TEXT, stored_at REAL, used REAL,"
+                 " size INTEGER, value BLOB, PRIMARY KEY (ns, key))")
+    conn.execute("INSERT INTO entries VALUES ('a', 'k', 0, 0, 123, x'00')")
+    conn.commit()
+    conn.close()
+    cache = cache_module.Cache(disk_path=path)
+    cache.namespace("a", disk=True)
+    cache.set("a", "k2", "v")
+    usage, actual = disk_totals(path)
+    assert usage == actual and usage["a"] > 123
+
+
+def test_disk_errors_only_warn(tmp_path, capsys):
+    cache = cache_module.Cache(disk_path=str(tmp_path / "missing" / "dir" / "cache.sqlite"))
+    cache.namespace("a", disk=True)
+    (tmp_path / "missing").write_text("not a directory")
+    cache.set("a", "k", 1)
+    cache.delete("a", "k")
+    cache.clear(disk=True)
+    assert cache.get("a", "missing") is None
+    assert capsys.readouterr().out.count("⚠️ Cache") == 4
@@ -0,0 +1,64 @@
+"""
+Export Tests
+An exported date range must carry the same SMA 20, RSI and predictions as the
+full history has on those dates (warm-up read from before the start, not
+back-filled), and leave them empty where there is not enough history.
+
+    python -m pytest test_export.py
+"""
+
+import datetime as dt
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import export
+import price_store
+from ohlcv import OHLCV, _synthetic_frame
+
+SYMBOL = "TEST.NS"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = price_store.PriceStore(str(tmp_path / "prices.sqlite"))
+    frame = _synthetic_frame(900)
+    store.upsert_daily(OHLCV.from_frame(frame, SYMBOL), complete_head=True)
+    monkeypatch.setattr(price_store, "store", store)
+
+    def offline(*_):
+        raise RuntimeError("offline")
+    monkeypatch.setattr(export, "fetch_history_batch", offline)
+    return store
+
+
+def exported(start, end, interval="1d"):
+    body = b"".join(export.stream([SYMBOL], "csv", interval, start, end))
+    return pd.read_csv(io.BytesIO(body), parse_dates=["date"])
+
+
+@pytest.mark.parametrize("interval,days", [("1d", 31), ("1wk", 180), ("1mo", 365)])
+def test_slice_matches_full_history(store, interval, days):
+    full = export.symbol_frame(store.range(SYMBOL, interval))
+    end = dt.date(2026, 10, 16)
+    part = exported(end - dt.timedelta(days=days), end, interval)
+
+    assert len(part) > 3
+    expected = full.set_index("date").loc[part["date"]]
+    for column in ("sma20", "rsi", "pred_close", "pred_high", "pred_low"):
+        assert part[column].notna().all()
+    for column in ("sma20", "rsi", "pred_close", "pred_high", "pred_low"):
+        np.testing.assert_allclose(part[column].to_numpy(), expected[column].to_numpy(),
+                                   rtol=1e-6)
+
+
+def test_no_backfill_without_history(store):
+    first = price_store.from_epoch_day(int(store.range(SYMBOL, "1d").t[0]))
+    part = exported(first, first + dt.timedelta(days=60))
+    assert part["sma20"].iloc[:19].isna().all()
+    assert part["sma20"].iloc[19:].notna().all()
+    assert part["rsi"].iloc[:13].isna().all()
+    assert part["rsi"].iloc[13:].notna().all()
+    assert part["pred_close"].isna().all()      # under a year of bars of history
@@ -0,0 +1,49 @@
+"""
+Figure Builder Tests
+The direct spec (figures.dashboard_figure) must serialize to exactly the page
+the graph_objects path produced, for every bar type and both JSON engines.
+
+    python -m pytest test_figures.py
+"""
+
+import numpy as np
+import plotly.io as pio
+import pytest
+
+import figures
+
+CASES = [("1d", 250), ("1wk", 120), ("1mo", 40), ("5m", 375), ("1m", 2)]
+
+
+def both_paths(symbol, series, prediction, sentiment):
+    old = figures.plotly_figure_html(symbol, series, prediction, sentiment, div_id="stock-chart")
+    new = figures.figure_html(figures.dashboard_figure(symbol, series, prediction, sentiment),
+                              "stock-chart")
+    return old, new
+
+
+@pytest.fixture(params=["json", "orjson"])
+def engine(request):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    previous = pio.json.config.default_engine
+    pio.json.config.default_engine = request.param
+    yield request.param
+    pio.json.config.default_engine = previous
+
+
+@pytest.mark.parametrize("interval,bars", CASES)
+def test_same_bytes_as_graph_objects(engine, interval, bars):
+    series, prediction, sentiment = figures.sample_inputs(bars, interval, seed=bars)
+    old, new = both_paths("TCS.NS", series, prediction, sentiment)
+    assert new == old
+
+
+def test_gaps_and_markup_in_symbol(engine):
+    series, prediction, sentiment = figures.sample_inputs(60, "1d", seed=7)
+    series.sma20[:19] = np.nan              # warm-up bars serialize as null
+    prediction['predicted_close'] = np.float64(prediction['predicted_close'])
+    sentiment['avg'] = -0.5
+    old, new = both_paths("M&M.NS</script>", series, prediction, sentiment)
+    assert new == old
+    assert "null" in new and "</script>\"" not in new
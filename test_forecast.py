@@ -0,0 +1,57 @@
+"""
+Forecaster Tests
+A stored model slid along a rolling window must forecast what a fresh fit on
+that window does, and the store keeps one model per symbol and forecaster.
+
+    python -m pytest test_forecast.py
+"""
+
+import numpy as np
+import pytest
+
+import forecast
+from ohlcv import OHLCV, _synthetic_frame
+
+WINDOW = 250
+
+
+@pytest.fixture
+def store(tmp_path):
+    return forecast.ModelStore(str(tmp_path / "models.sqlite"))
+
+
+@pytest.fixture(scope="module")
+def history():
+    return OHLCV.from_frame(_synthetic_frame(600, 3), "TEST.NS")
+
+
+@pytest.mark.parametrize("name", list(forecast.FORECASTERS))
+def test_rolling_window_matches_refit(store, history, name):
+    for end in range(WINDOW + 1, len(history), 5):
+        window = history.slice(end - WINDOW, end)
+        next_x = window.ordinals()[-1] + 1
+        stored = store.fitted(window, name).forecast(window, next_x)
+        fresh = forecast.FORECASTERS[name]().update(window.slice(0, WINDOW - 1))
+        assert stored == pytest.approx(fresh.forecast(window, next_x), rel=1e-9)
+
+    assert store.fits == 1
+    assert store.updates > 50
+    rows = store._conn().execute("SELECT COUNT(*) FROM models").fetchone()[0]
+    assert rows == 1
+
+
+def test_changed_bars_refit(store, history):
+    window = history.slice(0, WINDOW)
+    store.fitted(window, "linear")
+    revised = history.slice(0, WINDOW)
+    revised.close = revised.close.copy()
+    revised.close[100] += 1
+    store.fitted(revised, "linear")
+    assert store.fits == 2
+
+
+def test_unchanged_window_is_a_hit(store, history):
+    window = history.slice(0, WINDOW)
+    store.fitted(window, "ridge")
+    store.fitted(window, "ridge")
+    assert (store.fits, store.hits) == (1, 1)
@@ -0,0 +1,49 @@
+"""
+Indicator Tests
+SMA 20 and RSI 14 on the compact arrays must equal the pandas formulas the
+dashboard used before (rolling means over Close.diff(), warm-up back-filled),
+and the backtester's panel RSI must agree with them wherever it is defined.
+
+    python -m pytest test_ohlcv.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+from ohlcv import OHLCV, _synthetic_frame, rsi, sma
+
+
+def pandas_indicators(close):
+    """The dashboard's original pandas version"""
+    close = pd.Series(close)
+    sma20 = close.rolling(window=20).mean()
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    loss[loss == 0] = 0.0001
+    rsi14 = 100 - (100 / (1 + gain / loss))
+    return sma20.bfill().to_numpy(), rsi14, rsi14.bfill().to_numpy()
+
+
+@pytest.mark.parametrize("bars", [15, 60, 400])
+def test_matches_pandas(bars):
+    close = OHLCV.from_frame(_synthetic_frame(bars, seed=bars), "TEST.NS").close
+    sma20, raw_rsi, rsi14 = pandas_indicators(close.astype(np.float64))
+    assert raw_rsi.first_valid_index() == 13
+    np.testing.assert_allclose(rsi(close), rsi14, rtol=1e-5)
+    if bars >= 20:
+        np.testing.assert_allclose(sma(close), sma20, rtol=1e-5)
+
+
+def test_panel_rsi_matches_series():
+    close = OHLCV.from_frame(_synthetic_frame(120, seed=1), "TEST.NS").close.astype(np.float64)
+    listed_later = np.r_[np.full(30, np.nan), close[30:]]
+    panel = backtest.rolling_rsi(np.column_stack([close, listed_later]))
+
+    _, expected, _ = pandas_indicators(close)
+    np.testing.assert_allclose(panel[:, 0], expected.to_numpy(), rtol=1e-9, equal_nan=True)
+    _, expected_late, _ = pandas_indicators(close[30:])
+    assert np.isnan(panel[:43, 1]).all()
+    np.testing.assert_allclose(panel[30:, 1], expected_late.to_numpy(), rtol=1e-9, equal_nan=True)
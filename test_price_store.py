@@ -0,0 +1,57 @@
+"""
+Price Store Tests
+Weekly and monthly bars written at upsert time must equal the daily history
+aggregated with pandas, also after tail refreshes that only touch a few days.
+
+    python -m pytest test_price_store.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import price_store
+from ohlcv import OHLCV
+
+SYMBOL = "TEST.NS"
+RULES = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def daily_frame(start, end):
+    dates = pd.bdate_range(start, end)
+    close = 100 + np.arange(len(dates), dtype=np.float64)
+    return pd.DataFrame({"Date": dates, "Open": close - 0.5, "High": close + 1,
+                         "Low": close - 1, "Close": close,
+                         "Volume": 1000 + np.arange(len(dates), dtype=np.float64)})
+
+
+def expected(frame, resolution):
+    rule = {"1wk": "W-MON", "1mo": "MS"}[resolution]
+    kwargs = {"label": "left", "closed": "left"} if resolution == "1wk" else {}
+    return frame.set_index("Date").resample(rule, **kwargs).agg(RULES).dropna()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return price_store.PriceStore(str(tmp_path / "prices.sqlite"))
+
+
+# A week that starts in September and ends in October
+@pytest.mark.parametrize("tail", [("2026-10-01", "2026-10-02"), ("2026-09-29", "2026-10-01"),
+                                  ("2026-11-02", "2026-11-03")])
+@pytest.mark.parametrize("resolution", ["1wk", "1mo"])
+def test_tail_refresh_keeps_aggregates(store, tail, resolution):
+    frame = daily_frame("2026-08-03", tail[0])
+    store.upsert_daily(OHLCV.from_frame(frame.iloc[:-1], SYMBOL))
+    refresh = daily_frame("2026-08-03", tail[1])
+    store.upsert_daily(OHLCV.from_frame(refresh[refresh["Date"] >= tail[0]], SYMBOL))
+
+    bars = store.range(SYMBOL, resolution)
+    reference = expected(refresh, resolution)
+    np.testing.assert_array_equal(bars.dates().astype("datetime64[D]"),
+                                  reference.index.values.astype("datetime64[D]"))
+    np.testing.assert_allclose(bars.open, reference["Open"], rtol=1e-6)
+    np.testing.assert_allclose(bars.high, reference["High"], rtol=1e-6)
+    np.testing.assert_allclose(bars.low, reference["Low"], rtol=1e-6)
+    np.testing.assert_allclose(bars.close, reference["Close"], rtol=1e-6)
+    np.testing.assert_array_equal(bars.volume, reference["Volume"].astype(np.int64))
@@ -0,0 +1,45 @@
+"""
+Symbol Index Tests
+Names resolve offline only when one company clearly matches; ambiguous
+prefixes are left to the search / suggestion list.
+
+    python -m pytest test_symbols.py
+"""
+
+import pytest
+
+import symbols
+
+
+@pytest.fixture(scope="module")
+def index():
+    nse = [("TATASTEEL", "Tata Steel Limited", "NSE"),
+           ("TATAPOWER", "The Tata Power Company Limited", "NSE"),
+           ("TCS", "Tata Consultancy Services Limited", "NSE"),
+           ("INFY", "Infosys Limited", "NSE"),
+           ("HDFCBANK", "HDFC Bank Limited", "NSE"),
+           ("HDFCLIFE", "HDFC Life Insurance Company Limited", "NSE")]
+    bse = [("500209", "Infosys Ltd", "BSE")]
+    return symbols.SymbolIndex(nse + bse)
+
+
+@pytest.mark.parametrize("query", ["tata", "hdfc"])
+def test_ambiguous_prefix_does_not_resolve(index, query):
+    assert index.resolve(query) is None
+    assert len(index.suggest(query)) >= 2
+
+
+@pytest.mark.parametrize("query,symbol", [
+    ("tata steel", "TATASTEEL.NS"),
+    ("tata consultancy", "TCS.NS"),
+    ("hdfc life", "HDFCLIFE.NS"),
+    ("infosys", "INFY.NS"),         # NSE and BSE listings of one company are not rivals
+    ("TCS", "TCS.NS"),
+    ("500209.BO", "500209.BO"),
+])
+def test_clear_match_resolves(index, query, symbol):
+    assert index.resolve(query) == symbol
+
+
+def test_seed_master_leaves_tata_to_search():
+    assert symbols.load_index([symbols.SEED_MASTER]).resolve("tata") is None
@@ -0,0 +1,201 @@
+"""
+Upstream Rate Limiter & Circuit Breaker
+Token buckets and breaker state for Yahoo Finance, the Yahoo search API and
+Google News, kept in a small SQLite file so every gunicorn worker (and the
+CLI tools) on the host draws from the same per-host budget.
+
+Budgets adapt: a throttling response halves the host's refill rate and each
+success wins back a tenth of the configured rate. After repeated failures the
+breaker opens and callers fail fast until a single probe succeeds.
+"""
+
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# --- CONFIGURATION ---
+STATE_DB = os.environ.get(
+    "UPSTREAM_STATE_DB", os.path.join(tempfile.gettempdir(), "stock_upstream.sqlite")
+)
+
+# host -> refill rate (requests/second) and burst size
+UPSTREAM_BUDGETS = {
+    "yahoo": {"rate": 2.0, "burst": 5},    # yf.download
+    "search": {"rate": 2.0, "burst": 5},   # query2.finance.yahoo.com search
+    "news": {"rate": 1.0, "burst": 3},     # news.google.com RSS
+}
+
+MIN_RATE_FRACTION = 0.05    # adaptive floor, as a fraction of the budget
+RECOVERY_FRACTION = 0.1     # rate regained per success
+FAILURE_THRESHOLD = 3       # consecutive failures before the breaker opens
+BASE_COOLDOWN = 30          # first open period (seconds), doubles each time
+MAX_COOLDOWN = 600
+PROBE_TIMEOUT = 30          # a half-open probe that never reports back expires
+MAX_WAIT = 5                # longest a caller will queue for a token (seconds)
+
+
+class UpstreamUnavailable(RuntimeError):
+    """Raised when a host's breaker is open or its budget is exhausted"""
+
+
+class UpstreamGuard:
+    """Shared token bucket + circuit breaker per upstream host"""
+
+    def __init__(self, path=STATE_DB, budgets=UPSTREAM_BUDGETS):
+        self.path = path
+        self.budgets = budgets
+        self._local = threading.local()
+
+    def _conn(self):
+        # One connection per thread and process (gunicorn forks after import)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS upstream ("
+                " host TEXT PRIMARY KEY, tokens REAL, rate REAL, updated REAL,"
+                " failures INTEGER, state TEXT, opened_until REAL, cooldown REAL,"
+                " probe_at REAL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self, host):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, rate, updated, failures, state, opened_until, cooldown, probe_at"
+                " FROM upstream WHERE host = ?", (host,)
+            ).fetchone()
+            if row is None:
+                budget = self.budgets[host]
+                row = (budget["burst"], budget["rate"], time.time(), 0, "closed", 0.0,
+                       BASE_COOLDOWN, 0.0)
+            state = dict(zip(("tokens", "rate", "updated", "failures", "state",
+                              "opened_until", "cooldown", "probe_at"), row))
+            yield state
+            conn.execute(
+                "INSERT OR REPLACE INTO upstream VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (host, state["tokens"], state["rate"], state["updated"], state["failures"],
+                 state["state"], state["opened_until"], state["cooldown"], state["probe_at"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def acquire(self, host, max_wait=MAX_WAIT):
+        """Take one token for host, waiting up to max_wait for a refill"""
+        deadline = time.time() + max_wait
+        while True:
+            with self._transaction(host) as s:
+                now = time.time()
+                budget = self.budgets[host]
+                s["tokens"] = min(budget["burst"], s["tokens"] + (now - s["updated"]) * s["rate"])
+                s["updated"] = now
+
+                if s["state"] == "open":
+                    if now < s["opened_until"]:
+                        raise UpstreamUnavailable(
+                            f"{host} circuit open for {s['opened_until'] - now:.0f}s more")
+                    # Cooldown over: let exactly one caller probe the upstream
+                    s["state"] = "half_open"
+                    s["probe_at"] = now
+                    s["tokens"] = max(s["tokens"] - 1, 0)
+                    return
+                if s["state"] == "half_open":
+                    if now - s["probe_at"] < PROBE_TIMEOUT:
+                        raise UpstreamUnavailable(f"{host} is being probed after an outage")
+                    s["probe_at"] = now
+                    return
+
+                if s["tokens"] >= 1:
+                    s["tokens"] -= 1
+                    return
+                wait = (1 - s["tokens"]) / s["rate"]
+
+            if now + wait > deadline:
+                raise UpstreamUnavailable(f"{host} rate budget exhausted")
+            time.sleep(wait)
+
+    def record_success(self, host):
+        with self._transaction(host) as s:
+            budget = self.budgets[host]
+            s["failures"] = 0
+            s["state"] = "closed"
+            s["cooldown"] = BASE_COOLDOWN
+            s["rate"] = min(budget["rate"], s["rate"] + budget["rate"] * RECOVERY_FRACTION)
+
+    def record_failure(self, host, throttled=False):
+        with self._transaction(host) as s:
+            budget = self.budgets[host]
+            now = time.time()
+            s["failures"] += 1
+            if throttled:
+                s["rate"] = max(budget["rate"] * MIN_RATE_FRACTION, s["rate"] / 2)
+                s["tokens"] = min(s["tokens"], 0.0)
+            if s["state"] == "half_open" or s["failures"] >= FAILURE_THRESHOLD:
+                if s["state"] == "half_open":
+                    s["cooldown"] = min(MAX_COOLDOWN, s["cooldown"] * 2)
+                s["state"] = "open"
+                s["opened_until"] = now + s["cooldown"]
+                print(f"🔌 {host} circuit opened for {s['cooldown']:.0f}s")
+
+    def is_open(self, host):
+        """True while callers for host would fail fast"""
+        row = self._conn().execute(
+            "SELECT state, opened_until FROM upstream WHERE host = ?", (host,)
+        ).fetchone()
+        return row is not None and row[0] == "open" and time.time() < row[1]
+
+    def status(self):
+        rows = self._conn().execute(
+            "SELECT host, state, rate, failures, opened_until FROM upstream"
+        ).fetchall()
+        now = time.time()
+        return {
+            host: {
+                "state": state,
+                "rate": round(rate, 3),
+                "failures": failures,
+                "retry_in": max(0, round(opened_until - now)) if state == "open" else 0,
+            }
+            for host, state, rate, failures, opened_until in rows
+        }
+
+    @contextmanager
+    def call(self, host, max_wait=MAX_WAIT):
+        """Guard one upstream request; failures inside the block are recorded.
+
+        Raise Throttled inside the block to report a rate-limit response.
+        """
+        self.acquire(host, max_wait)
+        try:
+            yield
+        except Throttled:
+            self.record_failure(host, throttled=True)
+            raise UpstreamUnavailable(f"{host} is throttling requests")
+        except Exception as e:
+            self.record_failure(host, throttled=is_throttle_error(e))
+            raise
+        else:
+            self.record_success(host)
+
+
+class Throttled(Exception):
+    """Signal from inside guard.call() that the upstream rate-limited us"""
+
+
+def is_throttle_error(message):
+    message = str(message).lower()
+    return "429" in message or "too many requests" in message or "rate limit" in message
+
+
+guard = UpstreamGuard()